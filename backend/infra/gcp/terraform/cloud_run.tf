@@ -61,9 +61,14 @@ resource "google_cloud_run_v2_service" "fastapi_app" {
         }
       }
 
+      env {
+        name  = "LOG_FILE_ENABLED"
+        value = "false"
+      }
+
       startup_probe {
         http_get {
-          path = "/health"
+          path = "/api/v1/health/readyz"
           port = 8000
         }
         failure_threshold = 3
@@ -73,7 +78,7 @@ resource "google_cloud_run_v2_service" "fastapi_app" {
 
       liveness_probe {
         http_get {
-          path = "/health"
+          path = "/api/v1/health/livez"
           port = 8000
         }
         failure_threshold = 3
@@ -27,6 +27,15 @@ class Settings(BaseSettings):
     HOST: str = Field(default="0.0.0.0")
     PORT: int = Field(default=8000)
     WORKERS: int = Field(default=1)
+    SERVER_BACKLOG: int = Field(default=2048)  # listen() queue shared by all workers
+    SERVER_KEEPALIVE_SECONDS: int = Field(default=5)  # keep below the load balancer's
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = Field(default=30)  # drain before forced exit
+    # Worker recycling (production); 0 disables
+    WORKER_MAX_REQUESTS: int = Field(default=10_000)
+    WORKER_MAX_REQUESTS_JITTER: int = Field(default=1_000)  # spreads restarts apart
+    WORKER_MAX_RSS_MB: int = Field(default=768)
+    WORKER_RSS_CHECK_INTERVAL_SECONDS: float = Field(default=5.0)
+    WORKER_CPU_AFFINITY: bool = Field(default=False)  # pin worker i to CPU i
 
     # --- Database ---
     MONGODB_URI: str = Field(default="mongodb://localhost:27017")
@@ -44,6 +53,111 @@ class Settings(BaseSettings):
     # --- External API Keys ---
     MAPBOX_TOKEN: str = Field(default="your_mapbox_token_here")
 
+    # --- Metrics ---
+    METRICS_MAX_ENDPOINT_LABELS: int = Field(default=200)
+    SLOW_OPERATION_THRESHOLD_MS: int = Field(default=250)  # Mongo/Redis/HTTP calls
+    SERVER_TIMING_ENABLED: bool = Field(default=True)
+    SERVER_TIMING_REQUIRE_HEADER: bool = Field(default=False)  # only with X-Server-Timing
+    # Shared mmap directory for Prometheus when running more than one worker
+    PROMETHEUS_MULTIPROC_DIR: Path = Field(default=Path("/tmp/shipthis-metrics"))
+
+    # --- Request Timeouts ---
+    REQUEST_TIMEOUT_SECONDS: int = Field(default=30)
+    # Budget per path prefix (longest match wins); downstream calls derive from it
+    REQUEST_TIMEOUT_ROUTE_BUDGETS: dict[str, float] = Field(
+        default_factory=lambda: {
+            "/api/v1/routes": 25.0,
+            "/api/v1/searches": 10.0,
+            "/api/v1/auth": 10.0,
+            "/api/v1/health": 5.0,
+        }
+    )
+
+    # --- Adaptive Concurrency ---
+    CONCURRENCY_LIMIT_ENABLED: bool = Field(default=True)
+    CONCURRENCY_INITIAL_LIMIT: int = Field(default=20)  # per route class, per worker
+    CONCURRENCY_MIN_LIMIT: int = Field(default=2)
+    CONCURRENCY_MAX_LIMIT: int = Field(default=200)
+    CONCURRENCY_LATENCY_TOLERANCE: float = Field(default=2.0)  # x no-load latency
+    CONCURRENCY_BACKOFF_RATIO: float = Field(default=0.9)
+    CONCURRENCY_RETRY_AFTER_SECONDS: int = Field(default=1)
+    # Path prefix -> route class; each class gets its own limit ("default" otherwise)
+    CONCURRENCY_ROUTE_CLASSES: dict[str, str] = Field(
+        default_factory=lambda: {
+            "/api/v1/routes": "routes",
+            "/api/v1/searches": "searches",
+            "/api/v1/auth": "auth",
+        }
+    )
+
+    # --- Startup ---
+    # Cold-start budget (process start to ready); exceeding it logs a warning
+    STARTUP_TARGET_SECONDS: float = Field(default=5.0)
+
+    # --- Health Checks ---
+    HEALTH_SAMPLE_INTERVAL_SECONDS: float = Field(default=10.0)
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = Field(default=2.0)  # per dependency ping
+    # /readyz fails once the snapshot is older than this many intervals
+    HEALTH_MAX_STALE_INTERVALS: int = Field(default=3)
+
+    # --- Diagnostics ---
+    # Shared secret for /api/v1/admin (X-Admin-Key); admin endpoints are off when unset
+    ADMIN_API_KEY: str | None = Field(default=None)
+    LOOP_MONITOR_ENABLED: bool = Field(default=True)
+    LOOP_MONITOR_INTERVAL_SECONDS: float = Field(default=0.25)
+    SLOW_CALLBACK_THRESHOLD_MS: int = Field(default=100)
+    PROFILING_MAX_SECONDS: int = Field(default=60)
+    PROFILING_INTERVAL_MS: float = Field(default=5.0)
+    PROFILING_PROFILE_TTL_SECONDS: int = Field(default=900)  # per-request profiles, in Redis
+
+    # --- Fault Injection (testing tail latency; never enable in production) ---
+    FAULT_INJECTION_ENABLED: bool = Field(default=False)
+    # Rules as in app.utils.faults.FaultRule, e.g.
+    # [{"target": "mapbox", "percentage": 10, "latency_ms": 500, "error_percentage": 20}]
+    FAULT_INJECTION_RULES: list[dict] = Field(default_factory=list)
+
+    # --- Directions Cache ---
+    DIRECTIONS_CACHE_ENABLED: bool = Field(default=True)
+    DIRECTIONS_CACHE_TTL_SECONDS: int = Field(default=21600)  # traffic-aware, so hours
+    # Background warming of the most searched corridors (one worker per cycle)
+    CORRIDOR_WARMER_ENABLED: bool = Field(default=True)
+    CORRIDOR_WARMER_TOP_N: int = Field(default=300)
+    CORRIDOR_WARMER_LOOKBACK_DAYS: int = Field(default=30)
+    CORRIDOR_WARMER_INTERVAL_SECONDS: float = Field(default=900.0)
+    CORRIDOR_WARMER_RATE_PER_SECOND: float = Field(default=2.0)  # Mapbox calls
+    # Refresh entries expiring within this; above the interval so none lapse
+    CORRIDOR_WARMER_REFRESH_BEFORE_SECONDS: float = Field(default=1800.0)
+
+    # --- Nearby Route Reuse ---
+    # Reuse a recent search's routes when both ends are within the radius
+    ROUTE_REUSE_ENABLED: bool = Field(default=True)
+    ROUTE_REUSE_RADIUS_METERS: float = Field(default=500.0)
+    # Max age of a reusable search per transport mode; modes not listed never reuse
+    ROUTE_REUSE_MAX_AGE_SECONDS: dict[str, float] = Field(
+        default_factory=lambda: {
+            "land": 21600.0,  # traffic-aware durations
+            "sea": 604800.0,
+            "air": 604800.0,
+        }
+    )
+
+    # --- Mode Comparison (POST /api/v1/routes/compare) ---
+    # Modes still computing after this are returned as "timeout"
+    ROUTE_COMPARE_TIMEOUT_SECONDS: float = Field(default=8.0)
+
+    # --- Idempotency (Idempotency-Key on POST /api/v1/routes/calculate) ---
+    IDEMPOTENCY_TTL_SECONDS: int = Field(default=86400)  # completed responses replayed
+    # In-flight lock; outlives the routes budget so a slow first call keeps its key
+    IDEMPOTENCY_LOCK_SECONDS: int = Field(default=60)
+    IDEMPOTENCY_WAIT_SECONDS: float = Field(default=20.0)  # duplicates wait, then 409
+
+    # --- Response Compression ---
+    COMPRESSION_MINIMUM_SIZE: int = Field(default=1024)  # bytes
+    COMPRESSION_OFFLOAD_SIZE: int = Field(default=65536)  # compress in a thread above this
+    COMPRESSION_GZIP_LEVEL: int = Field(default=6)
+    COMPRESSION_BROTLI_QUALITY: int = Field(default=4)
+    COMPRESSION_ZSTD_LEVEL: int = Field(default=3)
+
     # --- Logging Configuration ---
     LOG_LEVEL: str = Field(default="INFO")
     LOG_FORMAT: str = Field(default="json")
@@ -54,17 +168,31 @@ class Settings(BaseSettings):
     LOG_COMPRESSION: str = Field(default="zip")
     LOG_BACKTRACE: bool = Field(default=True)
     LOG_DIAGNOSE: bool = Field(default=False)
+    # JSON file sink; disable where stdout is collected (e.g. Cloud Run)
+    LOG_FILE_ENABLED: bool = Field(default=True)
 
     # --- Rate Limiting ---
     RATE_LIMIT_ENABLED: bool = Field(default=True)
     RATE_LIMIT_REQUESTS: int = Field(default=100)
     RATE_LIMIT_PERIOD: int = Field(default=60)
+    RATE_LIMIT_RESERVATION_SIZE: int = Field(default=10)  # tokens claimed per Redis call
+    RATE_LIMIT_ROUTE_LIMITS: dict[str, int] = Field(
+        default_factory=lambda: {
+            "/api/v1/routes/calculate": 30,
+            "/api/v1/routes/calculate_multi_origin": 10,
+            "/api/v1/auth/login": 10,
+            "/api/v1/auth/register": 5,
+        }
+    )
 
     # --- JWT Authentication ---
     JWT_SECRET_KEY: str = Field(default="super-secret-change-this-in-production")
     JWT_ALGORITHM: str = Field(default="HS256")
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=10080)  # 7 days
     JWT_REFRESH_TOKEN_EXPIRE_MINUTES: int = Field(default=10080)  # 7 days
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = Field(default=100_000)
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = Field(default=0.001)
+    TOKEN_REVOCATION_REBUILD_INTERVAL: int = Field(default=3600)  # seconds
 
     # --- File Upload ---
     MAX_UPLOAD_SIZE: int = Field(default=10485760)  # 10MB
@@ -73,6 +201,8 @@ class Settings(BaseSettings):
     )
 
     # --- OpenTelemetry ---
+    OTEL_ENABLED: bool = Field(default=False)
+    OTEL_SAMPLING_RATIO: float = Field(default=0.1)  # new traces; parent decision wins
     OTEL_EXPORTER_OTLP_ENDPOINT: str = Field(default="http://localhost:4317")
     OTEL_SERVICE_NAME: str = Field(default="langchain-fastapi")
     OTEL_TRACES_EXPORTER: str = Field(default="otlp")
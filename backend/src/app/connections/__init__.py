@@ -1,12 +1,15 @@
 """Database connection dependencies."""
 
-from app.connections.mongodb import create_mongo_client
-from app.connections.redis import create_redis_client
+from app.connections.http import create_http_client, get_http_client
+from app.connections.mongodb import create_mongo_client, get_db
+from app.connections.redis import create_redis_client, get_redis
 
 
 __all__ = [
+    "create_http_client",
     "create_mongo_client",
     "create_redis_client",
     "get_db",
+    "get_http_client",
     "get_redis",
 ]
@@ -0,0 +1,70 @@
+"""Shared outbound HTTP client."""
+
+import httpx
+from fastapi import Request
+
+from app.connections.instrumentation import (
+    http_service,
+    on_http_request,
+    on_http_response,
+)
+from app.utils.faults import fault_injector
+
+
+class FaultInjectingTransport(httpx.AsyncBaseTransport):
+    """
+    Applies injected faults (app.utils.faults) to outbound requests.
+
+    Sits below the client's event hooks, so injected latency, upstream 503s and
+    read timeouts are observed by instrumentation like real ones.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        fault = fault_injector.pick(http_service(request.url.host))
+        if fault is not None:
+            await fault.wait(request.extensions.get("timeout", {}).get("read"))
+            if fault.outcome == "timeout":
+                raise httpx.ReadTimeout("Injected timeout", request=request)
+            if fault.outcome == "error":
+                return httpx.Response(
+                    503, json={"message": "Injected fault"}, request=request
+                )
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_http_client(
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    """
+    Create the process-wide async HTTP client used for external APIs.
+
+    Keeping one pooled client lets connections (and TLS sessions) be reused
+    across requests instead of being rebuilt for every upstream call.
+    ``transport`` replaces the network (e.g. a Mapbox emulator in benchmarks).
+    """
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0,
+            ),
+        )
+    return httpx.AsyncClient(
+        transport=FaultInjectingTransport(transport),
+        timeout=httpx.Timeout(20.0, connect=5.0),
+        event_hooks={
+            "request": [on_http_request],
+            "response": [on_http_response],
+        },
+    )
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
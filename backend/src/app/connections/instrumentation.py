@@ -0,0 +1,317 @@
+"""Latency instrumentation for downstream dependencies: MongoDB, Redis and HTTP APIs."""
+
+import asyncio
+import time
+from functools import partial
+
+import httpx
+from prometheus_client import Counter, Histogram
+from pymongo import monitoring
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from app.config.settings import get_settings
+from app.middleware.server_middleware import correlation_id_var, metrics_registry
+from app.utils import deadline, tracing
+from app.utils.faults import Fault, fault_injector
+from app.utils.logger import logger
+from app.utils.request_cost import record_cost
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+mongo_command_duration_seconds = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency in seconds",
+    ["collection", "command", "status"],
+    buckets=_LATENCY_BUCKETS,
+    registry=metrics_registry,
+)
+
+redis_command_duration_seconds = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency in seconds",
+    ["command", "status"],
+    buckets=_LATENCY_BUCKETS,
+    registry=metrics_registry,
+)
+
+redis_pipeline_commands = Histogram(
+    "redis_pipeline_commands",
+    "Commands sent per Redis pipeline or transaction",
+    ["command"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000),
+    registry=metrics_registry,
+)
+
+http_client_request_duration_seconds = Histogram(
+    "http_client_request_duration_seconds",
+    "Outbound HTTP request latency in seconds",
+    ["service", "operation", "status"],
+    buckets=_LATENCY_BUCKETS,
+    registry=metrics_registry,
+)
+
+slow_operations_total = Counter(
+    "slow_operations_total",
+    "Downstream operations slower than SLOW_OPERATION_THRESHOLD_MS",
+    ["dependency"],
+    registry=metrics_registry,
+)
+
+# Outbound hosts mapped to a stable service label
+_HTTP_SERVICES = {"api.mapbox.com": "mapbox"}
+
+_slow_threshold = get_settings().SLOW_OPERATION_THRESHOLD_MS / 1000
+
+
+def _log_slow(dependency: str, operation: str, duration: float, **extra) -> None:
+    if duration < _slow_threshold:
+        return
+    correlation_id = correlation_id_var.get() or "unknown"
+    slow_operations_total.labels(dependency=dependency).inc()
+    logger.warning(
+        f"[{correlation_id}] Slow {dependency} operation: {operation} took {duration * 1000:.1f}ms",
+        correlation_id=correlation_id,
+        dependency=dependency,
+        operation=operation,
+        duration_ms=round(duration * 1000, 1),
+        **extra,
+    )
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Records per collection/command latency for every MongoDB command.
+
+    Motor runs commands on executor threads, so state is keyed by request and
+    connection id rather than held in context variables. When tracing is enabled
+    each command also gets a client span, parented to the request span through
+    the context Motor copies into the executor.
+    """
+
+    # Handshake and session housekeeping are not interesting as latency
+    IGNORED_COMMANDS = frozenset(
+        {"hello", "ismaster", "isMaster", "saslStart", "saslContinue", "endSessions"}
+    )
+
+    def __init__(self):
+        self._pending: dict[tuple, tuple] = {}
+
+    @staticmethod
+    def _key(event) -> tuple:
+        return (event.request_id, event.connection_id, event.operation_id)
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name in self.IGNORED_COMMANDS:
+            return
+        fault = fault_injector.pick("mongo")
+        if fault is not None:
+            # On Motor's executor thread, holding the thread and pooled connection
+            # as a slow server would; a timeout hangs past the request deadline
+            time.sleep(fault.hang_for(deadline.remaining()))
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            # getMore carries the cursor id; the collection is a separate field
+            target = event.command.get("collection", event.database_name)
+
+        span = None
+        tracer = tracing.get_tracer()
+        if tracer is not None:
+            span = tracer.start_span(
+                f"mongo {event.command_name} {target}",
+                kind=tracing.SpanKind.CLIENT,
+                attributes={
+                    "db.system": "mongodb",
+                    "db.name": event.database_name,
+                    "db.operation": event.command_name,
+                    "db.mongodb.collection": target,
+                },
+            )
+        self._pending[self._key(event)] = (target, span)
+
+    def _finish(self, event, status: str) -> None:
+        pending = self._pending.pop(self._key(event), None)
+        if pending is None:
+            return
+        collection, span = pending
+        if span is not None:
+            if status != "ok":
+                tracing.mark_error(span, description=str(getattr(event, "failure", "")))
+            span.end()
+        duration = event.duration_micros / 1_000_000
+        record_cost("mongo", duration)
+        mongo_command_duration_seconds.labels(
+            collection=collection, command=event.command_name, status=status
+        ).observe(duration)
+        _log_slow("mongo", f"{collection}.{event.command_name}", duration, status=status)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "error")
+
+
+async def _observe_redis(client: Redis, command: str, call, attributes: dict | None = None):
+    """One round trip to Redis (``call()``), timed, traced and bounded by the deadline."""
+    left = deadline.remaining()
+    if left is not None and left <= 0:
+        raise deadline.DeadlineExceeded(f"redis {command}")
+
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        with tracing.start_span(
+            f"redis {command}",
+            kind=tracing.SpanKind.CLIENT if tracing.SpanKind else None,
+            attributes={"db.system": "redis", "db.operation": command, **(attributes or {})},
+        ):
+            async with asyncio.timeout(left):
+                fault = fault_injector.pick("redis")
+                if fault is not None:
+                    await _inject(client, fault, command)
+                return await call()
+    except TimeoutError as e:
+        status = "error"
+        if left is not None:
+            raise deadline.DeadlineExceeded(f"redis {command}") from e
+        raise
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        record_cost("redis", duration)
+        redis_command_duration_seconds.labels(command=command, status=status).observe(duration)
+        _log_slow("redis", command, duration, status=status)
+
+
+async def _inject(client: Redis, fault: Fault, command: str) -> None:
+    await fault.wait(client.connection_pool.connection_kwargs.get("socket_timeout"))
+    if fault.outcome == "timeout":
+        raise RedisTimeoutError(f"Injected timeout on {command}")
+    if fault.outcome == "error":
+        raise RedisConnectionError(f"Injected error on {command}")
+
+
+class InstrumentedRedis(Redis):
+    """
+    Redis client that records latency for every command it executes.
+
+    Within a request, each command (including redis-py's own retries) is bounded
+    by the request's remaining deadline rather than only the socket timeout.
+    Pipelines it creates are instrumented as one operation each.
+    """
+
+    async def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        return await _observe_redis(
+            self, command, partial(super().execute_command, *args, **options)
+        )
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> "InstrumentedPipeline":
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class InstrumentedPipeline(Pipeline):
+    """
+    Pipeline whose ``execute`` is recorded like a command: ``PIPELINE``, or
+    ``MULTI`` for a transaction, with the number of queued commands on the
+    span and in ``redis_pipeline_commands``.
+
+    Commands run immediately while WATCHing, and pub/sub connections, are not
+    instrumented.
+    """
+
+    async def execute(self, raise_on_error: bool = True):
+        size = len(self.command_stack)
+        if not size:
+            return await super().execute(raise_on_error)
+        command = "MULTI" if self.is_transaction or self.explicit_transaction else "PIPELINE"
+        redis_pipeline_commands.labels(command=command).observe(size)
+        return await _observe_redis(
+            self,
+            command,
+            partial(super().execute, raise_on_error),
+            {"db.operation.batch.size": size},
+        )
+
+
+def http_service(host: str) -> str:
+    """Stable service label for an outbound host (e.g. ``mapbox``)."""
+    return _HTTP_SERVICES.get(host, host)
+
+
+def _http_labels(request: httpx.Request) -> tuple[str, str]:
+    service = http_service(request.url.host)
+    parts = request.url.path.split("/")
+    if service == "mapbox" and len(parts) > 4:
+        # /directions/v5/mapbox/{profile}/{coordinates}
+        return service, f"{parts[1]}/{parts[4]}"
+    return service, parts[1] if len(parts) > 1 else "/"
+
+
+async def on_http_request(request: httpx.Request) -> None:
+    request.extensions["instrumentation_start"] = time.perf_counter()
+
+    tracer = tracing.get_tracer()
+    if tracer is not None:
+        service, operation = _http_labels(request)
+        span = tracer.start_span(
+            f"{service} {operation}",
+            kind=tracing.SpanKind.CLIENT,
+            attributes={
+                "http.request.method": request.method,
+                "server.address": request.url.host,
+                "url.path": request.url.path,
+            },
+        )
+        request.extensions["instrumentation_span"] = span
+        # Propagate trace context to the upstream service
+        tracing.propagate.inject(
+            request.headers, context=tracing.trace.set_span_in_context(span)
+        )
+
+
+async def on_http_response(response: httpx.Response) -> None:
+    span = response.request.extensions.get("instrumentation_span")
+    if span is not None:
+        span.set_attribute("http.response.status_code", response.status_code)
+        if response.status_code >= 500:
+            tracing.mark_error(span, description=f"HTTP {response.status_code}")
+        span.end()
+    _observe_http(
+        response.request,
+        str(response.status_code),
+        int(response.headers.get("content-length", 0)),
+    )
+
+
+def observe_http_error(exc: httpx.HTTPError) -> None:
+    """Record a transport-level failure, which never reaches the response hook."""
+    try:
+        request = exc.request
+    except RuntimeError:
+        return
+    span = request.extensions.pop("instrumentation_span", None)
+    if span is not None:
+        tracing.mark_error(span, exc)
+        span.end()
+    _observe_http(request, type(exc).__name__)
+
+
+def _observe_http(request: httpx.Request, status: str, nbytes: int = 0) -> None:
+    start = request.extensions.get("instrumentation_start")
+    if start is None:
+        return
+    duration = time.perf_counter() - start
+    service, operation = _http_labels(request)
+    record_cost(service, duration, nbytes)
+    http_client_request_duration_seconds.labels(
+        service=service, operation=operation, status=status
+    ).observe(duration)
+    _log_slow(service, operation, duration, status=status)
@@ -4,6 +4,8 @@ from beanie import init_beanie
 from fastapi import Request
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
+from app.connections.instrumentation import MongoCommandListener
+
 
 async def create_mongo_client(uri: str, db_name: str, document_models: list):
     """
@@ -27,6 +29,8 @@ async def create_mongo_client(uri: str, db_name: str, document_models: list):
         retryReads=True,
         retryWrites=True,
         tz_aware=True,
+        # Per collection/command latency metrics and slow-command logging
+        event_listeners=[MongoCommandListener()],
     )
     database = client[db_name]
 
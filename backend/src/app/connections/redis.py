@@ -4,6 +4,8 @@ from redis.asyncio import Redis
 from redis.backoff import ExponentialBackoff
 from redis.retry import Retry
 
+from app.connections.instrumentation import InstrumentedRedis
+
 
 def create_redis_client(url: str) -> Redis:
     """
@@ -26,7 +28,7 @@ def create_redis_client(url: str) -> Redis:
     #     max_connections=50,
     # )
 
-    return Redis.from_url(
+    return InstrumentedRedis.from_url(
         url,
         db=0,
         # Connection & command timeouts
@@ -12,5 +12,6 @@ __all__ = [
 
     "health",
     "auth",
+    "admin",
 
 ]
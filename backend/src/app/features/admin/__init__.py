@@ -0,0 +1,8 @@
+"""Operational admin endpoints (diagnostics), guarded by ADMIN_API_KEY."""
+
+from app.features.admin.dependency import is_admin_key, require_admin
+
+__all__ = [
+    "is_admin_key",
+    "require_admin",
+]
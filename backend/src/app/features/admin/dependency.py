@@ -0,0 +1,20 @@
+import secrets
+
+from fastapi import Header, HTTPException
+
+from app.config.settings import get_settings
+
+
+def is_admin_key(key: str | None) -> bool:
+    """Whether ``key`` matches ADMIN_API_KEY (always False when none is configured)."""
+    admin_key = get_settings().ADMIN_API_KEY
+    return bool(admin_key and key) and secrets.compare_digest(key, admin_key)
+
+
+def require_admin(x_admin_key: str | None = Header(None)) -> None:
+    """Allow the request only with a matching X-Admin-Key header."""
+    if not get_settings().ADMIN_API_KEY:
+        # Admin endpoints do not exist unless a key is configured
+        raise HTTPException(status_code=404, detail="Not found")
+    if not is_admin_key(x_admin_key):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
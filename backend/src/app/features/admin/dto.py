@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+
+from app.utils.faults import FaultRule
+
+
+class LoopMonitorStatus(BaseModel):
+    enabled: bool
+    interval_seconds: float
+    slow_callback_threshold_ms: int
+    stalls: int
+
+
+class LoopMonitorUpdate(BaseModel):
+    enabled: bool | None = None
+    slow_callback_threshold_ms: int | None = Field(None, ge=10, le=10_000)
+
+
+class FaultInjectionStatus(BaseModel):
+    enabled: bool
+    rules: list[FaultRule]
+
+
+class FaultInjectionUpdate(BaseModel):
+    enabled: bool
+    rules: list[FaultRule] = Field(default_factory=list)
@@ -0,0 +1,175 @@
+import asyncio
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response
+from redis.asyncio import Redis
+
+from app.config.settings import get_settings
+from app.connections.redis import get_redis
+from app.features.admin.dependency import require_admin
+from app.features.admin.dto import (
+    FaultInjectionStatus,
+    FaultInjectionUpdate,
+    LoopMonitorStatus,
+    LoopMonitorUpdate,
+)
+from app.utils.faults import fault_injector
+from app.utils.logger import logger
+from app.utils.loop_monitor import LoopMonitor, get_loop_monitor
+from app.utils.profiler import AllocationTracker, SamplingProfiler, profile_store
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+
+ProfileFormat = Literal["speedscope", "collapsed"]
+
+# One worker-wide profile at a time; concurrent ones would skew each other
+_profile_lock = asyncio.Lock()
+
+
+def _download_headers(name: str) -> dict[str, str]:
+    filename = name.replace(" ", "_").replace("/", "_") + ".speedscope.json"
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def _render_profile(
+    name: str,
+    profiler: SamplingProfiler,
+    allocations: AllocationTracker | None,
+    fmt: ProfileFormat,
+) -> Response:
+    if fmt == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    return ORJSONResponse(
+        profiler.speedscope(name, allocations), headers=_download_headers(name)
+    )
+
+
+def _loop_monitor_status(monitor: LoopMonitor) -> LoopMonitorStatus:
+    return LoopMonitorStatus(
+        enabled=monitor.enabled,
+        interval_seconds=monitor.interval,
+        slow_callback_threshold_ms=round(monitor.threshold * 1000),
+        stalls=monitor.stalls,
+    )
+
+
+@router.get("/loop-monitor", response_model=LoopMonitorStatus)
+async def get_loop_monitor_status(monitor: LoopMonitor = Depends(get_loop_monitor)):
+    return _loop_monitor_status(monitor)
+
+
+@router.patch("/loop-monitor", response_model=LoopMonitorStatus)
+async def update_loop_monitor(
+    body: LoopMonitorUpdate,
+    monitor: LoopMonitor = Depends(get_loop_monitor),
+):
+    """Toggle the monitor or change its threshold for this worker, without a restart."""
+    if body.slow_callback_threshold_ms is not None:
+        monitor.threshold = body.slow_callback_threshold_ms / 1000
+    if body.enabled is True:
+        monitor.start()
+    elif body.enabled is False:
+        await monitor.stop()
+    return _loop_monitor_status(monitor)
+
+
+@router.get("/faults", response_model=FaultInjectionStatus)
+async def get_fault_injection():
+    return FaultInjectionStatus(enabled=fault_injector.enabled, rules=fault_injector.rules)
+
+
+@router.put("/faults", response_model=FaultInjectionStatus)
+async def update_fault_injection(body: FaultInjectionUpdate):
+    """
+    Replace this worker's fault-injection rules and turn injection on or off.
+
+    Refused in production unless FAULT_INJECTION_ENABLED was set deliberately.
+    """
+    settings = get_settings()
+    if (
+        body.enabled
+        and settings.ENVIRONMENT == "production"
+        and not settings.FAULT_INJECTION_ENABLED
+    ):
+        raise HTTPException(
+            status_code=403, detail="Fault injection is disabled in production"
+        )
+    fault_injector.configure(enabled=body.enabled, rules=body.rules)
+    logger.warning(
+        f"Fault injection {'enabled' if body.enabled else 'disabled'}",
+        rules=[rule.model_dump() for rule in body.rules],
+    )
+    return FaultInjectionStatus(enabled=fault_injector.enabled, rules=fault_injector.rules)
+
+
+@router.delete("/faults", response_model=FaultInjectionStatus)
+async def clear_fault_injection():
+    fault_injector.configure(enabled=False, rules=[])
+    logger.info("Fault injection cleared")
+    return FaultInjectionStatus(enabled=False, rules=[])
+
+
+@router.post("/profile", response_model=None)
+async def profile_worker(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float | None = Query(None, ge=1, le=100),
+    format: ProfileFormat = "speedscope",
+    allocations: bool = False,
+) -> Response:
+    """
+    Sample every thread of this worker for ``seconds`` and return the profile.
+
+    ``speedscope`` output opens in https://www.speedscope.app; ``collapsed``
+    feeds flamegraph.pl. ``allocations`` adds a tracemalloc allocation profile
+    (speedscope only).
+    """
+    settings = get_settings()
+    if seconds > settings.PROFILING_MAX_SECONDS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"seconds must be at most {settings.PROFILING_MAX_SECONDS}",
+        )
+    if allocations and format != "speedscope":
+        raise HTTPException(
+            status_code=422, detail="Allocation tracking requires the speedscope format"
+        )
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profile_lock:
+        interval = (interval_ms or settings.PROFILING_INTERVAL_MS) / 1000
+        profiler = SamplingProfiler(interval)
+        tracker = AllocationTracker() if allocations else None
+        if tracker:
+            tracker.start()
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+            if tracker:
+                tracker.stop()
+
+    return _render_profile(f"worker {seconds:g}s", profiler, tracker, format)
+
+
+@router.get("/profiles/{profile_id}", response_model=None)
+async def get_request_profile(
+    profile_id: str,
+    format: ProfileFormat = "speedscope",
+    redis: Redis = Depends(get_redis),
+) -> Response:
+    """A per-request profile captured by sending ``X-Profile`` with a request."""
+    stored = await profile_store.get(redis, profile_id, format)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    name, body = stored
+    if format == "collapsed":
+        return PlainTextResponse(body)
+    return Response(body, media_type="application/json", headers=_download_headers(name))
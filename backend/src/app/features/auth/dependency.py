@@ -1,4 +1,5 @@
 # app/features/auth/dependency.py
+from beanie import PydanticObjectId
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
@@ -6,8 +7,11 @@ from jose import JWTError, jwt
 from app.connections.mongodb import get_db
 from app.connections.redis import get_redis
 from app.features.auth.repository import RefreshTokenRepository, UserRepository
+from app.features.auth.revocation import TokenRevocationList, get_token_revocations
 from app.features.auth.security import ALGORITHM, SECRET_KEY
 from app.features.auth.service import AuthService
+from app.utils.request_cost import track_cost
+from app.utils.tracing import traced
 
 security = HTTPBearer()
 
@@ -23,27 +27,46 @@ def get_refresh_token_repository(redis=Depends(get_redis)) -> RefreshTokenReposi
 def get_auth_service(
     user_repo=Depends(get_user_repository),
     refresh_token_repo=Depends(get_refresh_token_repository),
+    token_revocations=Depends(get_token_revocations),
 ) -> AuthService:
-    return AuthService(user_repo, refresh_token_repo)
+    return AuthService(user_repo, refresh_token_repo, token_revocations)
 
 
-async def get_current_user(
+@traced("auth.verify_token")
+async def get_token_payload(
     creds: HTTPAuthorizationCredentials = Depends(security),
+    token_revocations: TokenRevocationList = Depends(get_token_revocations),
+) -> dict:
+    with track_cost("auth"):
+        try:
+            payload = jwt.decode(
+                creds.credentials,
+                SECRET_KEY,
+                algorithms=[ALGORITHM],
+            )
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        if payload.get("type") != "access":
+            raise HTTPException(status_code=401, detail="Invalid token type")
+
+        if await token_revocations.is_revoked(payload.get("jti")):
+            raise HTTPException(status_code=401, detail="Token revoked")
+
+    return payload
+
+
+def get_current_user_id(payload: dict = Depends(get_token_payload)) -> PydanticObjectId:
+    """Authenticated user id without loading the user document."""
+    return PydanticObjectId(payload["sub"])
+
+
+@traced("auth.load_user")
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
     user_repo: UserRepository = Depends(get_user_repository),
 ):
-    try:
-        payload = jwt.decode(
-            creds.credentials,
-            SECRET_KEY,
-            algorithms=[ALGORITHM],
-        )
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    if payload.get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid token type")
-
-    user = await user_repo.get_by_id(payload["sub"])
+    user = await user_repo.get_by_id(payload["sub"])  # timed as mongo
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
@@ -31,3 +31,24 @@ class RefreshTokenRepository:
 
     async def revoke(self, jti: str):
         await self.redis.delete(f"refresh_token:{jti}")
+
+
+class RevokedTokenRepository:
+    CHANNEL = "auth:revoked_tokens"
+    PREFIX = "revoked_token:"
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def store(self, jti: str, ttl_seconds: int):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.setex(f"{self.PREFIX}{jti}", ttl_seconds, 1)
+            pipe.publish(self.CHANNEL, jti)
+            await pipe.execute()
+
+    async def exists(self, jti: str) -> bool:
+        return await self.redis.exists(f"{self.PREFIX}{jti}") == 1
+
+    async def scan_jtis(self):
+        async for key in self.redis.scan_iter(match=f"{self.PREFIX}*", count=1000):
+            yield key.removeprefix(self.PREFIX)
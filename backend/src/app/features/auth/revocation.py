@@ -0,0 +1,152 @@
+"""Access-token revocation backed by Redis and a per-worker Bloom filter."""
+
+import asyncio
+import hashlib
+import math
+
+from fastapi import Request
+from redis.asyncio import Redis
+
+from app.features.auth.repository import RevokedTokenRepository
+from app.utils.logger import logger
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a single blake2b digest."""
+
+    __slots__ = ("size", "hash_count", "bits")
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TokenRevocationList:
+    """
+    Process-wide view of revoked access-token ``jti``s.
+
+    Redis is the source of truth. Every worker mirrors it into a Bloom filter that
+    is kept current through pub/sub, so only possible matches cost a Redis round trip.
+    The filter is rebuilt from Redis periodically to shed expired entries and after
+    a pub/sub reconnect, when messages may have been missed.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        capacity: int,
+        error_rate: float,
+        rebuild_interval: int,
+    ):
+        self.repo = RevokedTokenRepository(redis)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._pending: set[str] | None = None
+        self._listener: asyncio.Task | None = None
+        self._rebuilder: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Load the current revocation set and start the sync tasks."""
+        try:
+            await self.rebuild()
+        except Exception as e:
+            logger.error(f"Token revocation list initial load failed: {e}")
+        self._listener = asyncio.create_task(self._listen(), name="token-revocation-listener")
+        self._rebuilder = asyncio.create_task(self._rebuild_periodically(), name="token-revocation-rebuilder")
+
+    async def stop(self) -> None:
+        for task in (self._listener, self._rebuilder):
+            if task:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in (self._listener, self._rebuilder) if t), return_exceptions=True
+        )
+
+    async def revoke(self, jti: str, ttl_seconds: int) -> None:
+        """Revoke a token until it would have expired anyway."""
+        if ttl_seconds <= 0:
+            return
+        self._bloom.add(jti)
+        await self.repo.store(jti, ttl_seconds)
+
+    async def is_revoked(self, jti: str | None) -> bool:
+        if not jti or jti not in self._bloom:
+            return False
+        try:
+            return await self.repo.exists(jti)
+        except Exception as e:
+            # A possible match we cannot confirm is treated as revoked
+            logger.warning(f"Token revocation lookup failed for {jti}: {e}")
+            return True
+
+    async def rebuild(self) -> None:
+        """Rebuild the Bloom filter from the revocation keys currently in Redis."""
+        self._pending = set()
+        try:
+            bloom = BloomFilter(self.capacity, self.error_rate)
+            count = 0
+            async for jti in self.repo.scan_jtis():
+                bloom.add(jti)
+                count += 1
+            for jti in self._pending:
+                bloom.add(jti)
+            self._bloom = bloom
+            logger.info("Token revocation list rebuilt", revoked_tokens=count)
+        finally:
+            self._pending = None
+
+    def _add_local(self, jti: str) -> None:
+        self._bloom.add(jti)
+        if self._pending is not None:
+            self._pending.add(jti)
+
+    async def _listen(self) -> None:
+        backoff = 1.0
+        while True:
+            pubsub = self.repo.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(RevokedTokenRepository.CHANNEL)
+                if backoff > 1.0:
+                    await self.rebuild()
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._add_local(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Token revocation subscription lost: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                await pubsub.aclose()
+
+    async def _rebuild_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.rebuild_interval)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.warning(f"Token revocation rebuild failed: {e}")
+
+
+def get_token_revocations(request: Request) -> TokenRevocationList:
+    return request.app.state.token_revocations
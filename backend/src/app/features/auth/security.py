@@ -1,9 +1,9 @@
 # app/features/auth/security.py
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from uuid import uuid4
 
 from jose import jwt
-from passlib.context import CryptContext
 
 from app.config.settings import get_settings
 
@@ -12,15 +12,22 @@ settings = get_settings()
 SECRET_KEY = settings.JWT_SECRET_KEY
 ALGORITHM = settings.JWT_ALGORITHM
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache
+def _pwd_context():
+    # passlib and its bcrypt backend are only needed on login/register, so they
+    # are imported on first use rather than on every cold start
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def verify_password(password: str, hash: str) -> bool:
-    return pwd_context.verify(password, hash)
+    return _pwd_context().verify(password, hash)
 
 
 def create_token(
@@ -29,15 +36,20 @@ def create_token(
     email: str,
     token_type: str,
     expires_minutes: int,
+    jti: str | None = None,
+    pair: str | None = None,
 ):
+    """``pair`` is the jti of the token issued with this one, revoked with it on logout."""
     now = datetime.now(timezone.utc)
     payload = {
         "sub": user_id,
         "email": email,
         "type": token_type,
-        "jti": str(uuid4()),
+        "jti": jti or str(uuid4()),
         "iat": int(now.timestamp()),
         "exp": int((now + timedelta(minutes=expires_minutes)).timestamp()),
     }
+    if pair:
+        payload["pair"] = pair
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
@@ -1,4 +1,5 @@
-from datetime import datetime, timezone
+from datetime import UTC, datetime
+from uuid import uuid4
 
 from fastapi import HTTPException
 from jose import JWTError, jwt
@@ -7,6 +8,7 @@ from app.config.settings import get_settings
 from app.features.auth.dto import RegisterRequest
 from app.features.auth.model import User
 from app.features.auth.repository import RefreshTokenRepository, UserRepository
+from app.features.auth.revocation import TokenRevocationList
 from app.features.auth.security import (
     ALGORITHM,
     SECRET_KEY,
@@ -20,9 +22,15 @@ settings = get_settings()
 
 
 class AuthService:
-    def __init__(self, user_repo: UserRepository, refresh_token_repo: RefreshTokenRepository):
+    def __init__(
+        self,
+        user_repo: UserRepository,
+        refresh_token_repo: RefreshTokenRepository,
+        token_revocations: TokenRevocationList,
+    ):
         self.user_repo = user_repo
         self.refresh_token_repo = refresh_token_repo
+        self.token_revocations = token_revocations
 
     async def register(self, data: RegisterRequest):
         try:
@@ -51,38 +59,48 @@ class AuthService:
                 logger.warning(f"Failed login attempt for email: {email}")
                 raise HTTPException(status_code=401, detail="Invalid credentials")
 
-            access = create_token(
-                user_id=str(user.id),
-                email=user.email,
-                token_type="access",
-                expires_minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES,
-            )
-
-            refresh = create_token(
-                user_id=str(user.id),
-                email=user.email,
-                token_type="refresh",
-                expires_minutes=settings.JWT_REFRESH_TOKEN_EXPIRE_MINUTES,
-            )
-
-            payload = jwt.decode(refresh, SECRET_KEY, algorithms=[ALGORITHM])
-            ttl = payload["exp"] - int(datetime.now(tz=timezone.utc).timestamp())
-
-            await self.refresh_token_repo.store(payload["jti"], payload["sub"], ttl)
-
+            tokens = await self._issue_tokens(user)
             logger.info(f"User logged in successfully: {email}")
-            return {
-                "access_token": access,
-                "refresh_token": refresh,
-                "user": user,
-                "token_type": "bearer",
-            }
+            return tokens
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Unexpected error during login for {email}: {str(e)}", exc_info=True)
             raise
 
+    async def _issue_tokens(self, user) -> dict:
+        """An access/refresh pair, each carrying the other's jti so logout ends both."""
+        access_jti, refresh_jti = str(uuid4()), str(uuid4())
+        access = create_token(
+            user_id=str(user.id),
+            email=user.email,
+            token_type="access",
+            expires_minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES,
+            jti=access_jti,
+            pair=refresh_jti,
+        )
+
+        refresh = create_token(
+            user_id=str(user.id),
+            email=user.email,
+            token_type="refresh",
+            expires_minutes=settings.JWT_REFRESH_TOKEN_EXPIRE_MINUTES,
+            jti=refresh_jti,
+            pair=access_jti,
+        )
+
+        payload = jwt.decode(refresh, SECRET_KEY, algorithms=[ALGORITHM])
+        ttl = payload["exp"] - int(datetime.now(tz=UTC).timestamp())
+
+        await self.refresh_token_repo.store(payload["jti"], payload["sub"], ttl)
+
+        return {
+            "access_token": access,
+            "refresh_token": refresh,
+            "user": user,
+            "token_type": "bearer",
+        }
+
     async def refresh(self, refresh_token: str):
         try:
             logger.info("Attempting to refresh token")
@@ -112,19 +130,32 @@ class AuthService:
                 raise HTTPException(status_code=401, detail="User not found")
 
             # issue new tokens
+            tokens = await self._issue_tokens(user)
             logger.info(f"Token refreshed successfully for user: {user.email}")
-            return await self.login(user.email, user.password_hash)
+            return tokens
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Unexpected error during token refresh: {str(e)}", exc_info=True)
             raise HTTPException(status_code=500, detail="Token refresh failed")
 
-    async def logout(self, refresh_token: str):
+    async def logout(self, token: str):
         try:
-            payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
             if payload.get("jti"):
-                await self.refresh_token_repo.revoke(payload["jti"])
+                # Either token of a login ends the session: revoke it and its pair
+                now = int(datetime.now(tz=UTC).timestamp())
+                if payload.get("type") == "access":
+                    # Access tokens are stateless: block the jti until it expires
+                    await self.token_revocations.revoke(payload["jti"], payload["exp"] - now)
+                    if payload.get("pair"):
+                        await self.refresh_token_repo.revoke(payload["pair"])
+                else:
+                    await self.refresh_token_repo.revoke(payload["jti"])
+                    if payload.get("pair"):
+                        # Issued together, so the access token expires this long after iat
+                        access_exp = payload["iat"] + settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+                        await self.token_revocations.revoke(payload["pair"], access_exp - now)
                 logger.info(f"User logged out successfully: {payload.get('sub')}")
         except JWTError as e:
             logger.warning(f"Logout with invalid token (idempotent): {str(e)}")
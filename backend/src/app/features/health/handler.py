@@ -3,18 +3,12 @@
 import time
 from typing import Any
 
-from fastapi import Request
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
 
 from app.utils.httpResponse import http_response
 
-from .service import (
-    check_database,
-    check_disk,
-    check_memory,
-    check_redis,
-    get_application_health,
-    get_system_health,
-)
+from .sampler import get_health_sampler
 
 
 async def self_info(request: Request) -> Any:
@@ -37,58 +31,21 @@ async def self_info(request: Request) -> Any:
 async def health_check(request: Request) -> Any:
     """
     Comprehensive health check endpoint.
-    Checks MongoDB, Redis, memory, and disk health.
+    Reports MongoDB, Redis, memory, and disk health from the sampler's cached
+    snapshot; no checks run on the request path.
     """
-    # Get MongoDB client from app.state
-    mongo_client = getattr(request.app.state, "mongo_client", None)
-
-    # Get Redis client
-    redis_client = None
-    try:
-        redis_client = getattr(request.app.state, "redis", None)
-    except RuntimeError:
-        redis_client = None
-
-    # Run async checks for external services
-    database_check = {"status": "unknown", "state": "not_configured"}
-    if mongo_client:
-        try:
-            database_check = await check_database(mongo_client)
-        except Exception as e:
-            database_check = {"status": "unhealthy", "state": "error", "error": str(e)}
-
-    redis_check = {"status": "unknown", "state": "not_configured"}
-    if redis_client:
-        try:
-            redis_check = await check_redis(redis_client)
-        except Exception as e:
-            redis_check = {"status": "unhealthy", "state": "error", "error": str(e)}
-
-    # Synchronous checks
-    memory_check = check_memory()
-    disk_check = check_disk()
-
-    # Determine overall health status
-    all_checks = [database_check, redis_check, memory_check, disk_check]
-    overall_status = "healthy"
-
-    if any(check.get("status") == "unhealthy" for check in all_checks):
-        overall_status = "unhealthy"
-    elif any(check.get("status") == "warning" for check in all_checks):
-        overall_status = "degraded"
-
-    health_data = {
-        "status": overall_status,
-        "timestamp": time.time(),
-        "application": get_application_health(),
-        "system": get_system_health(),
-        "checks": {
-            "database": database_check,
-            "redis": redis_check,
-            "memory": memory_check,
-            "disk": disk_check,
-        },
-    }
+    sampler = get_health_sampler(request)
+    snapshot = sampler.snapshot if sampler else None
+    if snapshot is None:
+        return http_response(
+            message="Health check: starting",
+            data={"status": "starting", "timestamp": time.time()},
+            status_code=503,
+            request=request,
+        )
+
+    overall_status = snapshot["status"]
+    health_data = {**snapshot, "sampleAge": f"{sampler.age:.2f} seconds"}
 
     # Return appropriate status code based on health
     status_code = 200 if overall_status == "healthy" else 503
@@ -99,3 +56,16 @@ async def health_check(request: Request) -> Any:
         status_code=status_code,
         request=request,
     )
+
+
+async def liveness() -> Response:
+    """Liveness probe: the event loop is serving requests."""
+    return ORJSONResponse({"status": "alive"})
+
+
+async def readiness(request: Request) -> Response:
+    """Readiness probe: a fresh snapshot shows required dependencies reachable."""
+    sampler = get_health_sampler(request)
+    if sampler is None or not sampler.ready:
+        return ORJSONResponse({"status": "not_ready"}, status_code=503)
+    return ORJSONResponse({"status": "ready"})
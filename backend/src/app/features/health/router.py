@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Request
 
-from .handler import health_check, self_info
+from .handler import health_check, liveness, readiness, self_info
 
 router = APIRouter(prefix="/api/v1/health", tags=["health"])
 
@@ -13,3 +13,13 @@ async def get_self(request: Request) -> object:
 @router.get("/", response_model=None)
 async def get_health(request: Request) -> object:
     return await health_check(request)
+
+
+@router.get("/livez", response_model=None)
+async def get_livez() -> object:
+    return await liveness()
+
+
+@router.get("/readyz", response_model=None)
+async def get_readyz(request: Request) -> object:
+    return await readiness(request)
@@ -0,0 +1,129 @@
+"""Background health sampler serving cached health snapshots."""
+
+import asyncio
+import time
+from typing import Any
+
+import psutil
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient
+from redis.asyncio import Redis
+
+from app.utils.logger import logger
+
+from .service import (
+    check_database,
+    check_disk,
+    check_memory,
+    check_redis,
+    get_application_health,
+    get_system_health,
+)
+
+
+def _overall_status(checks: dict[str, dict[str, Any]]) -> str:
+    if any(check.get("status") == "unhealthy" for check in checks.values()):
+        return "unhealthy"
+    if any(check.get("status") == "warning" for check in checks.values()):
+        return "degraded"
+    return "healthy"
+
+
+class HealthSampler:
+    """
+    Refreshes system, process, MongoDB and Redis health on an interval.
+
+    Probes and the full health report read ``snapshot`` only, so a health check
+    never performs I/O or blocking psutil calls on the request path. psutil work
+    runs in a thread; dependency pings are bounded by ``check_timeout``.
+    """
+
+    def __init__(
+        self,
+        mongo_client: AsyncIOMotorClient | None,
+        redis_client: Redis | None,
+        *,
+        interval: float,
+        check_timeout: float,
+        max_stale_intervals: int = 3,
+    ):
+        self.mongo_client = mongo_client
+        self.redis_client = redis_client
+        self.interval = interval
+        self.check_timeout = check_timeout
+        self.max_age = interval * max_stale_intervals
+        self.snapshot: dict[str, Any] | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def age(self) -> float | None:
+        """Seconds since the last completed sample."""
+        return time.time() - self.snapshot["timestamp"] if self.snapshot else None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Ready once a fresh sample shows MongoDB reachable.
+
+        Redis is optional for most features, so it does not gate readiness. A
+        stale snapshot means the sampler itself is stuck and counts as not ready.
+        """
+        age = self.age
+        return (
+            age is not None
+            and age <= self.max_age
+            and self.snapshot["checks"]["database"].get("status") == "healthy"
+        )
+
+    async def start(self) -> None:
+        # Prime psutil's CPU counters so the first real sample is meaningful
+        await asyncio.to_thread(psutil.cpu_percent, None)
+        await self.refresh()
+        self._task = asyncio.create_task(self._run(), name="health-sampler")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _check(self, check, client) -> dict[str, Any]:
+        if client is None:
+            return {"status": "unknown", "state": "not_configured"}
+        try:
+            return await asyncio.wait_for(check(client), timeout=self.check_timeout)
+        except TimeoutError:
+            return {"status": "unhealthy", "state": "timeout", "error": "health check timed out"}
+        except Exception as e:
+            return {"status": "unhealthy", "state": "error", "error": str(e)}
+
+    @staticmethod
+    def _sample_host() -> tuple[dict, dict, dict, dict]:
+        return get_system_health(), get_application_health(), check_memory(), check_disk()
+
+    async def refresh(self) -> None:
+        (system, application, memory, disk), database, redis = await asyncio.gather(
+            asyncio.to_thread(self._sample_host),
+            self._check(check_database, self.mongo_client),
+            self._check(check_redis, self.redis_client),
+        )
+        checks = {"database": database, "redis": redis, "memory": memory, "disk": disk}
+        self.snapshot = {
+            "status": _overall_status(checks),
+            "timestamp": time.time(),
+            "application": application,
+            "system": system,
+            "checks": checks,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Health sampling failed: {e}", exc_info=True)
+
+
+def get_health_sampler(request: Request) -> HealthSampler | None:
+    """The process health sampler, or None before startup has completed."""
+    return getattr(request.app.state, "health_sampler", None)
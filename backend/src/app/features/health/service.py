@@ -13,8 +13,13 @@ _start_time = time.time()
 
 
 def get_system_health() -> dict[str, Any]:
-    """Get system health metrics."""
-    cpu_percent = psutil.cpu_percent(interval=1)
+    """
+    Get system health metrics.
+
+    CPU usage is measured since the previous call (non-blocking), so callers
+    should sample periodically rather than per request.
+    """
+    cpu_percent = psutil.cpu_percent(interval=None)
     memory = psutil.virtual_memory()
 
     return {
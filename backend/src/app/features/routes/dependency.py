@@ -2,16 +2,41 @@
 from fastapi import Depends
 
 from app.config.settings import get_settings
+from app.connections.http import get_http_client
 from app.connections.mongodb import get_db
+from app.connections.redis import get_redis
+from app.features.routes.directions_cache import DirectionsCache
 from app.features.routes.mapbox import MapboxClient
 from app.features.routes.repository import RouteRepository
 from app.features.routes.service import RouteService
+from app.features.search.repository import SearchVersionRepository
 
 # from app.utils.logger import logger
 
 
-def get_route_service(db=Depends(get_db)) -> RouteService:
+def get_route_service(
+    db=Depends(get_db),
+    redis=Depends(get_redis),
+    http_client=Depends(get_http_client),
+) -> RouteService:
     settings = get_settings()
-    mapbox = MapboxClient(settings.MAPBOX_TOKEN)
+    mapbox = MapboxClient(settings.MAPBOX_TOKEN, http_client)
     repo = RouteRepository(db)
-    return RouteService(mapbox, repo)
+    versions = SearchVersionRepository(redis)
+    directions_cache = (
+        DirectionsCache(redis, ttl=settings.DIRECTIONS_CACHE_TTL_SECONDS)
+        if settings.DIRECTIONS_CACHE_ENABLED
+        else None
+    )
+    reuse_radius_m = (
+        settings.ROUTE_REUSE_RADIUS_METERS if settings.ROUTE_REUSE_ENABLED else None
+    )
+    return RouteService(
+        mapbox,
+        repo,
+        versions,
+        directions_cache,
+        reuse_radius_m=reuse_radius_m,
+        reuse_max_age=settings.ROUTE_REUSE_MAX_AGE_SECONDS,
+        compare_timeout=settings.ROUTE_COMPARE_TIMEOUT_SECONDS,
+    )
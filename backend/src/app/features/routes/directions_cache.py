@@ -0,0 +1,99 @@
+"""Redis cache of Mapbox directions, keyed by profile and rounded coordinates."""
+
+import orjson
+from prometheus_client import Counter
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.features.routes.mapbox import MapboxClient
+from app.middleware.server_middleware import metrics_registry
+from app.utils.logger import logger
+
+# 4 decimal places is ~11 m: clicks on the same address share an entry
+COORDINATE_PRECISION = 4
+
+directions_cache_requests_total = Counter(
+    "directions_cache_requests_total",
+    "Directions cache lookups by result",
+    ["result"],
+    registry=metrics_registry,
+)
+
+
+def _compact(response: dict) -> dict:
+    """Only what route calculation reads; steps and annotations are dropped."""
+    return {
+        "routes": [
+            {
+                "distance": route["distance"],
+                "duration": route["duration"],
+                "geometry": route["geometry"],
+            }
+            for route in response["routes"]
+        ]
+    }
+
+
+class DirectionsCache:
+    """
+    Directions per (profile, origin, destination) for ``ttl`` seconds.
+
+    Coordinates are rounded to ``COORDINATE_PRECISION`` decimals for the key,
+    the same rounding the corridor warmer groups searches by. Redis errors are
+    logged and treated as misses, so an unavailable cache only costs the
+    upstream call.
+    """
+
+    def __init__(self, redis: Redis, *, ttl: int):
+        self.redis = redis
+        self.ttl = ttl
+
+    @staticmethod
+    def key(profile: str, coordinates: list) -> str:
+        points = ";".join(
+            f"{round(lng, COORDINATE_PRECISION)},{round(lat, COORDINATE_PRECISION)}"
+            for lng, lat in coordinates
+        )
+        return f"directions:{profile}:{points}"
+
+    async def get(self, profile: str, coordinates: list) -> dict | None:
+        try:
+            cached = await self.redis.get(self.key(profile, coordinates))
+        except RedisError as e:
+            logger.warning(f"Directions cache read failed: {e}")
+            directions_cache_requests_total.labels(result="error").inc()
+            return None
+        directions_cache_requests_total.labels(result="miss" if cached is None else "hit").inc()
+        return None if cached is None else orjson.loads(cached)
+
+    async def fetch(self, mapbox: MapboxClient, profile: str, coordinates: list) -> dict:
+        """Directions from Mapbox, stored for later lookups."""
+        response = _compact(
+            await mapbox.get_directions(
+                profile=profile,
+                coordinates=coordinates,
+                alternatives=True,
+            )
+        )
+        try:
+            await self.redis.set(
+                self.key(profile, coordinates), orjson.dumps(response), ex=self.ttl
+            )
+        except RedisError as e:
+            logger.warning(f"Directions cache write failed: {e}")
+        return response
+
+    async def get_or_fetch(
+        self, mapbox: MapboxClient, profile: str, coordinates: list
+    ) -> dict:
+        cached = await self.get(profile, coordinates)
+        if cached is not None:
+            return cached
+        return await self.fetch(mapbox, profile, coordinates)
+
+    async def ttls(self, keys: list[str]) -> list[int]:
+        """Seconds left per key (-2 when missing), in one round trip."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.ttl(key)
+            return await pipe.execute()
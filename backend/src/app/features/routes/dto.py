@@ -5,8 +5,9 @@ from pydantic import BaseModel, Field
 
 class PointIn(BaseModel):
     name: str
-    lat: float
-    lng: float
+    # Bounded so stored points are valid for the 2dsphere indexes
+    lat: float = Field(ge=-90, le=90)
+    lng: float = Field(ge=-180, le=180)
 
     def to_coordinates(self):
         return [self.lng, self.lat]
@@ -28,6 +29,15 @@ class RouteCalculateForMultiOrginRequest(BaseModel):
     cargo_info: list[CargoInfo]
 
 
+class RouteCompareRequest(BaseModel):
+    origin: PointIn
+    destination: PointIn
+    cargo_weight_kg: float = Field(gt=0)
+    modes: list[Literal["land", "sea", "air"]] = Field(
+        default_factory=lambda: ["land", "sea", "air"], min_length=1
+    )
+
+
 
 class RouteGeometry(BaseModel):
     type: str
@@ -0,0 +1,203 @@
+"""Idempotency-Key support for POST endpoints, backed by Redis."""
+
+import asyncio
+import hashlib
+import secrets
+from collections.abc import Awaitable, Callable
+
+from fastapi import Request
+from fastapi.responses import Response
+from prometheus_client import Counter
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.config.settings import get_settings
+from app.middleware.server_middleware import metrics_registry
+from app.utils import deadline
+from app.utils.exceptions import APIException
+from app.utils.logger import logger
+from app.utils.request_cost import TimedORJSONResponse
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Delete the in-flight lock only if this execution still owns it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+idempotency_requests_total = Counter(
+    "idempotency_requests_total",
+    "Requests carrying an Idempotency-Key, by outcome",
+    ["outcome"],
+    registry=metrics_registry,
+)
+
+
+class IdempotencyKeyMismatch(APIException):
+    def __init__(self):
+        super().__init__(
+            status_code=422,
+            message="Idempotency-Key was already used with a different request body",
+            name="IdempotencyKeyMismatch",
+        )
+
+
+class IdempotencyKeyInProgress(APIException):
+    def __init__(self):
+        super().__init__(
+            status_code=409,
+            message="A request with this Idempotency-Key is still being processed",
+            name="IdempotencyKeyInProgress",
+        )
+
+
+class IdempotencyStore:
+    """
+    Runs a request at most once per (user, Idempotency-Key).
+
+    The first request claims an in-flight lock, executes and stores the
+    response bytes for ``ttl`` seconds; later requests with the same key and
+    body get those bytes back with ``Idempotent-Replayed: true``. A duplicate
+    arriving while the first is still running polls until it completes, for at
+    most ``wait`` seconds (capped by the request deadline), then gets 409. Only
+    successful responses are stored: if the first execution fails, its lock is
+    released and a retry executes again. If Redis is unavailable, requests
+    execute without deduplication.
+    """
+
+    _POLL_INITIAL = 0.025
+    _POLL_MAX = 0.25
+
+    def __init__(self, redis: Redis, *, ttl: int, lock_ttl: int, wait: float):
+        self.redis = redis
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait = wait
+
+    @staticmethod
+    def _key(scope: str, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return f"idempotency:{scope}:{digest}"
+
+    @staticmethod
+    def _replay(stored: dict, fingerprint: str) -> Response:
+        if stored["fingerprint"] != fingerprint:
+            idempotency_requests_total.labels(outcome="mismatch").inc()
+            raise IdempotencyKeyMismatch()
+        idempotency_requests_total.labels(outcome="replayed").inc()
+        return Response(
+            content=stored["body"].encode(),
+            status_code=int(stored["status"]),
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+    async def run(
+        self,
+        *,
+        scope: str,
+        key: str,
+        body: bytes,
+        execute: Callable[[], Awaitable],
+    ) -> Response:
+        """The stored response for ``key``, or the result of ``execute()`` once."""
+        base = self._key(scope, key)
+        response_key, lock_key = f"{base}:response", f"{base}:lock"
+        fingerprint = hashlib.sha256(body).hexdigest()
+        token = f"{secrets.token_hex(8)}:{fingerprint}"
+
+        try:
+            claimed = await self._claim(response_key, lock_key, token, fingerprint)
+        except RedisError as e:
+            logger.warning(f"Idempotency store unavailable, executing without it: {e}")
+            return TimedORJSONResponse(await execute())
+        if isinstance(claimed, Response):
+            return claimed
+
+        try:
+            response = TimedORJSONResponse(await execute())
+        except BaseException:
+            await self._release_quietly(lock_key, token)
+            raise
+
+        try:
+            with deadline.detached():
+                await self._store(response_key, lock_key, fingerprint, response)
+        except RedisError as e:
+            logger.warning(f"Storing idempotent response failed: {e}")
+            await self._release_quietly(lock_key, token)
+        idempotency_requests_total.labels(outcome="executed").inc()
+        return response
+
+    async def _store(
+        self, response_key: str, lock_key: str, fingerprint: str, response: Response
+    ) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                response_key,
+                mapping={
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "body": response.body.decode(),
+                },
+            )
+            pipe.expire(response_key, self.ttl)
+            pipe.delete(lock_key)
+            await pipe.execute()
+
+    async def _claim(
+        self, response_key: str, lock_key: str, token: str, fingerprint: str
+    ) -> Response | None:
+        """None once this request owns the key; otherwise the stored response."""
+        left = deadline.remaining()
+        wait_until = asyncio.get_running_loop().time() + (
+            self.wait if left is None else min(self.wait, left)
+        )
+        delay = self._POLL_INITIAL
+        waited = False
+        while True:
+            stored = await self.redis.hgetall(response_key)
+            if stored:
+                return self._replay(stored, fingerprint)
+            if await self.redis.set(lock_key, token, nx=True, ex=self.lock_ttl):
+                # The first execution may have completed between the two calls
+                stored = await self.redis.hgetall(response_key)
+                if stored:
+                    await self._release_quietly(lock_key, token)
+                    return self._replay(stored, fingerprint)
+                return None
+
+            owner = await self.redis.get(lock_key)
+            if owner and owner.partition(":")[2] != fingerprint:
+                idempotency_requests_total.labels(outcome="mismatch").inc()
+                raise IdempotencyKeyMismatch()
+            if not waited:
+                waited = True
+                idempotency_requests_total.labels(outcome="waited").inc()
+            if asyncio.get_running_loop().time() + delay > wait_until:
+                idempotency_requests_total.labels(outcome="in_progress").inc()
+                raise IdempotencyKeyInProgress()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._POLL_MAX)
+
+    async def _release_quietly(self, lock_key: str, token: str) -> None:
+        try:
+            # Also after the request deadline, or retries would wait out lock_ttl
+            with deadline.detached():
+                await self.redis.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+        except RedisError as e:
+            # The lock expires on its own after lock_ttl
+            logger.warning(f"Releasing idempotency lock failed: {e}")
+
+
+def get_idempotency_store(request: Request) -> IdempotencyStore:
+    settings = get_settings()
+    return IdempotencyStore(
+        request.app.state.redis,
+        ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+        lock_ttl=settings.IDEMPOTENCY_LOCK_SECONDS,
+        wait=settings.IDEMPOTENCY_WAIT_SECONDS,
+    )
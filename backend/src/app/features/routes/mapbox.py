@@ -1,10 +1,22 @@
 import httpx
 
+from app.connections.instrumentation import observe_http_error
+from app.utils.deadline import DeadlineExceeded, timeout_for
+
+MAPBOX_API_URL = "https://api.mapbox.com"
+
+# Profile used for route calculation
+DRIVING_PROFILE = "driving-traffic"
+
+# Default Mapbox timeout; within a request it is capped by the remaining deadline
+MAPBOX_TIMEOUT_SECONDS = 20.0
+
 
 class MapboxClient:
-    def __init__(self, token: str):
-        self.base_url = "https://api.mapbox.com/directions/v5/mapbox"
+    def __init__(self, token: str, client: httpx.AsyncClient):
+        self.base_url = f"{MAPBOX_API_URL}/directions/v5/mapbox"
         self.token = token
+        self.client = client
 
     async def get_directions(
         self,
@@ -24,10 +36,21 @@ class MapboxClient:
             "access_token": self.token,
         }
 
-        async with httpx.AsyncClient(timeout=20) as client:
-            resp = await client.get(
+        timeout = timeout_for(MAPBOX_TIMEOUT_SECONDS, "mapbox directions")
+        try:
+            resp = await self.client.get(
                 f"{self.base_url}/{profile}/{coord_str}",
                 params=params,
+                timeout=timeout,
             )
-            resp.raise_for_status()
-            return resp.json()
+        except httpx.TimeoutException as e:
+            observe_http_error(e)
+            if timeout < MAPBOX_TIMEOUT_SECONDS:
+                # Cut short by the request deadline, not Mapbox's own timeout
+                raise DeadlineExceeded("mapbox directions") from e
+            raise
+        except httpx.HTTPError as e:
+            observe_http_error(e)
+            raise
+        resp.raise_for_status()
+        return resp.json()
@@ -0,0 +1,28 @@
+"""Distance and duration estimates for sea and air, which Mapbox does not route."""
+
+from math import asin, cos, radians, sin, sqrt
+
+EARTH_RADIUS_KM = 6371.0
+
+# Shipping lanes and flight paths are longer than the great circle
+DETOUR_FACTORS = {"sea": 1.3, "air": 1.05}
+# Container ship at ~16 knots; cargo jet at cruise
+SPEEDS_KMH = {"sea": 30.0, "air": 800.0}
+
+
+def great_circle_km(a: list[float], b: list[float]) -> float:
+    """Haversine distance between two [lng, lat] points."""
+    lng1, lat1, lng2, lat2 = map(radians, (*a, *b))
+    h = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(h))
+
+
+def estimate(mode: str, coordinates: list) -> dict:
+    """Great-circle estimate for a ``sea`` or ``air`` leg between two points."""
+    origin, destination = coordinates
+    distance_km = great_circle_km(origin, destination) * DETOUR_FACTORS[mode]
+    return {
+        "distance_km": distance_km,
+        "duration_hours": distance_km / SPEEDS_KMH[mode],
+        "geometry": {"type": "LineString", "coordinates": [origin, destination]},
+    }
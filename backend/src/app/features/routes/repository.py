@@ -1,5 +1,13 @@
 from datetime import datetime
 
+from app.features.routes.directions_cache import COORDINATE_PRECISION
+
+EARTH_RADIUS_M = 6_378_100
+
+
+def _rounded(field: str) -> dict:
+    return {"$map": {"input": field, "in": {"$round": ["$$this", COORDINATE_PRECISION]}}}
+
 
 class RouteRepository:
     def __init__(self, db):
@@ -13,7 +21,7 @@ class RouteRepository:
         shortest,
         efficient,
     ):
-        await self.collection.insert_one(
+        result = await self.collection.insert_one(
             {
                 "user_id": user_id,
                 "origin": {
@@ -31,3 +39,56 @@ class RouteRepository:
                 "created_at": datetime.utcnow(),
             }
         )
+        return result.inserted_id
+
+    @staticmethod
+    def nearby_filter(
+        *,
+        origin: list[float],
+        destination: list[float],
+        transport_mode: str,
+        since: datetime,
+        radius_m: float,
+    ) -> dict:
+        """Searches with both ends within ``radius_m`` of the given points."""
+        radians = radius_m / EARTH_RADIUS_M
+        return {
+            "origin.coordinates": {"$geoWithin": {"$centerSphere": [origin, radians]}},
+            "destination.coordinates": {
+                "$geoWithin": {"$centerSphere": [destination, radians]}
+            },
+            "transport_mode": transport_mode,
+            "created_at": {"$gte": since},
+        }
+
+    async def find_recent_nearby(self, **kwargs) -> dict | None:
+        """The newest matching search (see ``nearby_filter``), routes only."""
+        return await self.collection.find_one(
+            self.nearby_filter(**kwargs),
+            {"cargo_weight_kg": 1, "shortest_route": 1, "efficient_route": 1},
+            sort=[("created_at", -1)],
+        )
+
+    @staticmethod
+    def corridors_pipeline(*, since: datetime, limit: int) -> list[dict]:
+        """Most searched origin/destination pairs, with coordinates rounded like cache keys."""
+        return [
+            {"$match": {"created_at": {"$gte": since}}},
+            {
+                "$group": {
+                    "_id": {
+                        "origin": _rounded("$origin.coordinates"),
+                        "destination": _rounded("$destination.coordinates"),
+                    },
+                    "searches": {"$sum": 1},
+                }
+            },
+            {"$sort": {"searches": -1}},
+            {"$limit": limit},
+        ]
+
+    async def top_corridors(self, *, since: datetime, limit: int) -> list[dict]:
+        cursor = self.collection.aggregate(
+            self.corridors_pipeline(since=since, limit=limit), allowDiskUse=True
+        )
+        return await cursor.to_list(length=limit)
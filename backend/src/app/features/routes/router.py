@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
 
 from app.features.auth.dependency import get_current_user
 from app.features.routes.dependency import get_route_service
 from app.features.routes.dto import (
     RouteCalculateForMultiOrginRequest,
     RouteCalculateRequest,
+    RouteCompareRequest,
 )
+from app.features.routes.idempotency import get_idempotency_store
 
 router = APIRouter(prefix="/api/v1/routes", tags=["Routes"])
 
@@ -15,10 +17,21 @@ async def calculate_route(
     payload: RouteCalculateRequest,
     user=Depends(get_current_user),
     service=Depends(get_route_service),
+    idempotency_store=Depends(get_idempotency_store),
+    idempotency_key: str | None = Header(
+        default=None, alias="Idempotency-Key", min_length=1, max_length=255
+    ),
 ):
-    return await service.calculate(
-        user_id=user.id,
-        payload=payload,
+    if idempotency_key is None:
+        return await service.calculate(
+            user_id=user.id,
+            payload=payload,
+        )
+    return await idempotency_store.run(
+        scope=str(user.id),
+        key=idempotency_key,
+        body=payload.model_dump_json().encode(),
+        execute=lambda: service.calculate(user_id=user.id, payload=payload),
     )
 
 @router.post("/calculate_multi_origin")
@@ -31,3 +44,12 @@ async def calculate_route_for_multi_origin(
         user_id=user.id,
         payload=payload,
     )
+
+
+@router.post("/compare")
+async def compare_modes(
+    payload: RouteCompareRequest,
+    user=Depends(get_current_user),
+    service=Depends(get_route_service),
+):
+    return await service.compare(payload=payload)
@@ -1,5 +1,44 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import httpx
+from prometheus_client import Counter
+from pymongo.errors import PyMongoError
+
+from app.config.enums import EMISSION_FACTORS
+from app.features.routes import modes
 from app.features.routes.emissions import EmissionCalculator
+from app.features.routes.mapbox import DRIVING_PROFILE
+from app.features.search.service import search_history_change
+from app.middleware.server_middleware import metrics_registry
+from app.utils import deadline
 from app.utils.logger import logger
+from app.utils.tracing import traced
+
+route_reuse_total = Counter(
+    "route_reuse_total",
+    "Route calculations answered from a recent nearby search, by outcome",
+    ["mode", "outcome"],
+    registry=metrics_registry,
+)
+
+route_compare_modes_total = Counter(
+    "route_compare_modes_total",
+    "Modes computed for route comparisons, by outcome",
+    ["mode", "status"],
+    registry=metrics_registry,
+)
+
+# Mode computations that outlived their comparison; kept referenced until done
+_detached: set[asyncio.Task] = set()
+
+
+def _detach(task: asyncio.Task) -> None:
+    """Let a late mode finish in the background (filling its cache), unobserved."""
+    _detached.add(task)
+    task.add_done_callback(_detached.discard)
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
 
 # RouteCalculateForMultiOrginRequest(
 #     cargo_info=[
@@ -34,11 +73,158 @@ from app.utils.logger import logger
 
 
 class RouteService:
-    def __init__(self, mapbox, repo):
+    def __init__(
+        self,
+        mapbox,
+        repo,
+        versions,
+        directions_cache=None,
+        reuse_radius_m=None,
+        reuse_max_age=None,
+        compare_timeout=10.0,
+    ):
         self.mapbox = mapbox
         self.repo = repo
+        self.versions = versions
+        self.directions_cache = directions_cache
+        # Nearby-route reuse: off without a radius; per mode, off without a max age
+        self.reuse_radius_m = reuse_radius_m
+        self.reuse_max_age = reuse_max_age or {}
+        self.compare_timeout = compare_timeout
         self.emissions = EmissionCalculator()
 
+    async def _reuse_recent_nearby(self, payload):
+        """
+        Routes of a recent search whose origin and destination are both within
+        ``reuse_radius_m`` of this one, with emissions rescaled to this cargo
+        weight (they are linear in it). None when there is no such search.
+        """
+        mode = payload.transport_mode
+        max_age = self.reuse_max_age.get(mode)
+        if not self.reuse_radius_m or not max_age:
+            return None
+        try:
+            found = await self.repo.find_recent_nearby(
+                origin=payload.origin.to_coordinates(),
+                destination=payload.destination.to_coordinates(),
+                transport_mode=mode,
+                since=datetime.now(UTC) - timedelta(seconds=max_age),
+                radius_m=self.reuse_radius_m,
+            )
+        except PyMongoError as e:
+            logger.warning(f"Nearby route lookup failed: {e}")
+            route_reuse_total.labels(mode=mode, outcome="error").inc()
+            return None
+        if found is None or not found.get("cargo_weight_kg"):
+            route_reuse_total.labels(mode=mode, outcome="miss").inc()
+            return None
+
+        route_reuse_total.labels(mode=mode, outcome="hit").inc()
+        scale = payload.cargo_weight_kg / found["cargo_weight_kg"]
+
+        def rescaled(route):
+            return {
+                "distance_km": route["distance_km"],
+                "duration_hours": route["duration_hours"],
+                "co2_emissions_kg": route["co2_emissions_kg"] * scale,
+                "geometry": route["geometry"],
+            }
+
+        return rescaled(found["shortest_route"]), rescaled(found["efficient_route"])
+
+    async def _directions(self, coordinates):
+        if self.directions_cache is None:
+            return await self.mapbox.get_directions(
+                profile=DRIVING_PROFILE,
+                coordinates=coordinates,
+                alternatives=True,
+            )
+        return await self.directions_cache.get_or_fetch(
+            self.mapbox, DRIVING_PROFILE, coordinates
+        )
+
+    async def _mode_route(self, mode, coordinates):
+        if mode != "land":
+            estimate = modes.estimate(mode, coordinates)
+            return {"source": "great_circle_estimate", **estimate}
+        response = await self._directions(coordinates)
+        route = min(response["routes"], key=lambda r: r["distance"])
+        return {
+            "source": "mapbox_driving",
+            "distance_km": route["distance"] / 1000,
+            "duration_hours": route["duration"] / 3600,
+            "geometry": route["geometry"],
+        }
+
+    @traced("routes.compare")
+    async def compare(self, *, payload):
+        """
+        Every requested mode between the same two points, computed concurrently.
+
+        Modes still running after ``compare_timeout`` (or when the request
+        deadline is near) are reported as ``timeout`` and the rest are returned;
+        a late mode keeps running in the background so its cache is filled for
+        the next comparison. Land is routed by Mapbox through the directions
+        cache; sea and air are great-circle estimates computed locally.
+        """
+        coordinates = [
+            payload.origin.to_coordinates(),
+            payload.destination.to_coordinates(),
+        ]
+        # Outside the request deadline: a mode that outlives the wait below keeps
+        # its own Mapbox timeout, so it can still finish and fill the cache
+        with deadline.detached():
+            tasks = {
+                mode: asyncio.create_task(self._mode_route(mode, coordinates))
+                for mode in dict.fromkeys(payload.modes)
+            }
+        left = deadline.remaining()
+        timeout = (
+            self.compare_timeout if left is None else min(self.compare_timeout, left)
+        )
+        try:
+            await asyncio.wait(tasks.values(), timeout=max(timeout, 0))
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                _detach(task)
+            raise
+
+        tonnes = payload.cargo_weight_kg / 1000
+        results = {}
+        for mode, task in tasks.items():
+            if not task.done():
+                _detach(task)
+                results[mode] = {"status": "timeout"}
+            else:
+                try:
+                    route = task.result()
+                except (deadline.DeadlineExceeded, httpx.TimeoutException):
+                    results[mode] = {"status": "timeout"}
+                except Exception as e:
+                    logger.warning(f"Route comparison failed for {mode}: {e}")
+                    results[mode] = {"status": "error"}
+                else:
+                    factor = EMISSION_FACTORS[mode]["default"]
+                    results[mode] = {
+                        "status": "ok",
+                        **route,
+                        "emission_factor": factor,
+                        "co2_emissions_kg": route["distance_km"] * tonnes * factor,
+                    }
+            status = results[mode]["status"]
+            route_compare_modes_total.labels(mode=mode, status=status).inc()
+
+        done = {mode: r for mode, r in results.items() if r["status"] == "ok"}
+        return {
+            "modes": results,
+            "complete": len(done) == len(results),
+            "lowest_emissions": min(
+                done, key=lambda m: done[m]["co2_emissions_kg"], default=None
+            ),
+            "fastest": min(done, key=lambda m: done[m]["duration_hours"], default=None),
+        }
+
+    @traced("routes.calculate_multi_origin")
     async def calculate_for_multi_origin(self, *, user_id, payload):
         # logger.info("payload", payload=payload.cargo_info)
 
@@ -48,11 +234,7 @@ class RouteService:
             dest = p.destination.to_coordinates()
             logger.info("origin/dest",p=p, origin=origin, dest=dest)
 
-            response = await self.mapbox.get_directions(
-                profile="driving-traffic",
-                coordinates=[origin, dest],
-                alternatives=True,
-            )
+            response = await self._directions([origin, dest])
             # logger.info("response", response=response)
 
             routes = []
@@ -80,12 +262,13 @@ class RouteService:
             shortest = min(routes, key=lambda r: r["distance_km"])
             efficient = min(routes, key=lambda r: r["co2_emissions_kg"])
 
-            await self.repo.save(
-                user_id=user_id,
-                payload=p,
-                shortest=shortest,
-                efficient=efficient,
-            )
+            async with search_history_change(self.versions, user_id):
+                await self.repo.save(
+                    user_id=user_id,
+                    payload=p,
+                    shortest=shortest,
+                    efficient=efficient,
+                )
 
             savings = shortest["co2_emissions_kg"] - efficient["co2_emissions_kg"]
             percent = (savings / shortest["co2_emissions_kg"]) * 100
@@ -100,46 +283,48 @@ class RouteService:
                 "efficient_route": efficient,
             }
 
+    @traced("routes.calculate")
     async def calculate(self, *, user_id, payload):
         origin = payload.origin.to_coordinates()
         dest = payload.destination.to_coordinates()
 
-        response = await self.mapbox.get_directions(
-            profile="driving-traffic",
-            coordinates=[origin, dest],
-            alternatives=True,
-        )
-        # logger.info("response",response=response)
+        reused = await self._reuse_recent_nearby(payload)
+        if reused is not None:
+            shortest, efficient = reused
+        else:
+            response = await self._directions([origin, dest])
+            # logger.info("response",response=response)
 
-        routes = []
-        for r in response["routes"]:
-            distance_km = r["distance"] / 1000
-            duration_h = r["duration"] / 3600
+            routes = []
+            for r in response["routes"]:
+                distance_km = r["distance"] / 1000
+                duration_h = r["duration"] / 3600
 
-            co2 = self.emissions.calculate_land(
-                distance_km=distance_km,
-                cargo_kg=payload.cargo_weight_kg,
-                segments={},
-            )
+                co2 = self.emissions.calculate_land(
+                    distance_km=distance_km,
+                    cargo_kg=payload.cargo_weight_kg,
+                    segments={},
+                )
 
-            routes.append(
-                {
-                    "distance_km": distance_km,
-                    "duration_hours": duration_h,
-                    "co2_emissions_kg": co2,
-                    "geometry": r["geometry"],
-                }
-            )
+                routes.append(
+                    {
+                        "distance_km": distance_km,
+                        "duration_hours": duration_h,
+                        "co2_emissions_kg": co2,
+                        "geometry": r["geometry"],
+                    }
+                )
 
-        shortest = min(routes, key=lambda r: r["distance_km"])
-        efficient = min(routes, key=lambda r: r["co2_emissions_kg"])
+            shortest = min(routes, key=lambda r: r["distance_km"])
+            efficient = min(routes, key=lambda r: r["co2_emissions_kg"])
 
-        await self.repo.save(
-            user_id=user_id,
-            payload=payload,
-            shortest=shortest,
-            efficient=efficient,
-        )
+        async with search_history_change(self.versions, user_id):
+            await self.repo.save(
+                user_id=user_id,
+                payload=payload,
+                shortest=shortest,
+                efficient=efficient,
+            )
 
         savings = shortest["co2_emissions_kg"] - efficient["co2_emissions_kg"]
         percent = (savings / shortest["co2_emissions_kg"]) * 100
@@ -0,0 +1,186 @@
+"""Background warming of the directions cache for the most searched corridors."""
+
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+
+from prometheus_client import Counter, Gauge
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.features.routes.directions_cache import DirectionsCache
+from app.features.routes.mapbox import DRIVING_PROFILE, MapboxClient
+from app.features.routes.repository import RouteRepository
+from app.middleware.server_middleware import metrics_registry
+from app.utils.logger import logger
+
+# Held for one interval by the worker that runs the cycle
+_CYCLE_LOCK_KEY = "corridor-warmer:cycle"
+# How often each worker tries to take the cycle; bounds how long a flush stays cold
+_POLL_SECONDS = 60.0
+# Mapbox is likely down: leave the rest of the cycle for the next one
+_MAX_CONSECUTIVE_FAILURES = 5
+
+corridor_warmer_corridors = Gauge(
+    "corridor_warmer_corridors",
+    "Corridors tracked by the cache warmer in its last cycle",
+    registry=metrics_registry,
+    multiprocess_mode="mostrecent",
+)
+
+corridor_warmer_warm_corridors = Gauge(
+    "corridor_warmer_warm_corridors",
+    "Tracked corridors with cached directions after the last cycle",
+    registry=metrics_registry,
+    multiprocess_mode="mostrecent",
+)
+
+corridor_warmer_coverage_ratio = Gauge(
+    "corridor_warmer_coverage_ratio",
+    "Share of tracked corridors with cached directions, before and after the last cycle",
+    ["when"],
+    registry=metrics_registry,
+    multiprocess_mode="mostrecent",
+)
+
+corridor_warmer_last_cycle_timestamp = Gauge(
+    "corridor_warmer_last_cycle_timestamp_seconds",
+    "Unix time the last warming cycle completed",
+    registry=metrics_registry,
+    multiprocess_mode="mostrecent",
+)
+
+corridor_warmer_fetches_total = Counter(
+    "corridor_warmer_fetches_total",
+    "Directions fetched by the cache warmer, by outcome",
+    ["outcome"],
+    registry=metrics_registry,
+)
+
+
+class CorridorWarmer:
+    """
+    Keeps directions for the ``top_n`` most searched corridors in the cache.
+
+    Corridors are mined from the last ``lookback_days`` of searches. Each cycle
+    fetches the ones that are missing or expire within ``refresh_before``
+    seconds, at most ``rate_per_second`` Mapbox calls, so popular corridors are
+    refreshed before their entries expire and first requests after a deploy or
+    a Redis flush hit the cache. With several workers, a Redis lock lets one of
+    them run each cycle.
+    """
+
+    def __init__(
+        self,
+        repo: RouteRepository,
+        mapbox: MapboxClient,
+        cache: DirectionsCache,
+        redis: Redis,
+        *,
+        top_n: int,
+        lookback_days: int,
+        interval: float,
+        rate_per_second: float,
+        refresh_before: float,
+    ):
+        self.repo = repo
+        self.mapbox = mapbox
+        self.cache = cache
+        self.redis = redis
+        self.top_n = top_n
+        self.lookback_days = lookback_days
+        self.interval = interval
+        self.spacing = 1 / rate_per_second
+        self.refresh_before = refresh_before
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="corridor-warmer")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def corridors(self) -> list[list]:
+        """[origin, destination] coordinate pairs, most searched first."""
+        since = datetime.now(UTC) - timedelta(days=self.lookback_days)
+        rows = await self.repo.top_corridors(since=since, limit=self.top_n)
+        pairs = []
+        for row in rows:
+            origin, destination = row["_id"]["origin"], row["_id"]["destination"]
+            # Skip documents with missing or malformed coordinates
+            if (
+                isinstance(origin, list)
+                and isinstance(destination, list)
+                and len(origin) == len(destination) == 2
+                and None not in origin + destination
+            ):
+                pairs.append([origin, destination])
+        return pairs
+
+    async def warm_once(self) -> dict:
+        """One cycle: fetch what is cold or about to expire. Returns a summary."""
+        pairs = await self.corridors()
+        keys = [self.cache.key(DRIVING_PROFILE, pair) for pair in pairs]
+        ttls = await self.cache.ttls(keys) if keys else []
+
+        stale = [pair for pair, ttl in zip(pairs, ttls) if ttl < self.refresh_before]
+        cold_before = sum(1 for ttl in ttls if ttl < 0)
+        fetched = failed = consecutive_failures = 0
+        for pair in stale:
+            if fetched or failed:
+                await asyncio.sleep(self.spacing)
+            try:
+                await self.cache.fetch(self.mapbox, DRIVING_PROFILE, pair)
+            except Exception as e:
+                failed += 1
+                consecutive_failures += 1
+                corridor_warmer_fetches_total.labels(outcome="error").inc()
+                logger.warning(f"Corridor warm-up fetch failed: {e}", corridor=pair)
+                if consecutive_failures >= _MAX_CONSECUTIVE_FAILURES:
+                    break
+                continue
+            fetched += 1
+            consecutive_failures = 0
+            corridor_warmer_fetches_total.labels(outcome="ok").inc()
+
+        tracked = len(pairs)
+        warm_before = tracked - cold_before
+        # Entries that were stale but not yet expired are still cached when a fetch fails
+        warm_after = min(tracked, warm_before + fetched)
+        summary = {
+            "corridors": tracked,
+            "refreshed": fetched,
+            "failed": failed,
+            "coverage_before": round(warm_before / tracked, 3) if tracked else 1.0,
+            "coverage_after": round(warm_after / tracked, 3) if tracked else 1.0,
+        }
+        corridor_warmer_corridors.set(tracked)
+        corridor_warmer_warm_corridors.set(warm_after)
+        corridor_warmer_coverage_ratio.labels(when="before").set(summary["coverage_before"])
+        corridor_warmer_coverage_ratio.labels(when="after").set(summary["coverage_after"])
+        corridor_warmer_last_cycle_timestamp.set(time.time())
+        return summary
+
+    async def _claim_cycle(self) -> bool:
+        try:
+            return bool(
+                await self.redis.set(
+                    _CYCLE_LOCK_KEY, "1", nx=True, ex=max(1, int(self.interval))
+                )
+            )
+        except RedisError as e:
+            logger.warning(f"Corridor warmer could not claim a cycle: {e}")
+            return False
+
+    async def _run(self) -> None:
+        # The first attempt is immediate, so a fresh deploy warms right away
+        while True:
+            if await self._claim_cycle():
+                try:
+                    summary = await self.warm_once()
+                    logger.info("Corridor cache warmed", **summary)
+                except Exception as e:
+                    logger.warning(f"Corridor warming failed: {e}", exc_info=True)
+            await asyncio.sleep(min(_POLL_SECONDS, self.interval))
@@ -1,7 +1,12 @@
-from app.features.search.dependency import get_search_repository, get_search_service
+from app.features.search.dependency import (
+    get_search_repository,
+    get_search_service,
+    get_search_version_repository,
+)
 
 __all__ = [
     "get_search_service",
     "get_search_repository",
+    "get_search_version_repository",
 
 ]
@@ -2,7 +2,7 @@ from fastapi import Depends
 
 from app.connections.mongodb import get_db
 from app.connections.redis import get_redis
-from app.features.search.repository import SearchRepository
+from app.features.search.repository import SearchRepository, SearchVersionRepository
 from app.features.search.service import SearchService
 
 
@@ -10,8 +10,12 @@ def get_search_repository(db=Depends(get_db)) -> SearchRepository:
     return SearchRepository(db)
 
 
+def get_search_version_repository(redis=Depends(get_redis)) -> SearchVersionRepository:
+    return SearchVersionRepository(redis)
+
+
 def get_search_service(
     repo=Depends(get_search_repository),
-    redis=Depends(get_redis),
+    versions=Depends(get_search_version_repository),
 ) -> SearchService:
-    return SearchService(repo, redis)
+    return SearchService(repo, versions)
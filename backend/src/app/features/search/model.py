@@ -6,6 +6,7 @@ from beanie import Document, Indexed, PydanticObjectId
 
 # from bson import ObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
 
 
 class TransportMode(str, Enum):
@@ -32,7 +33,7 @@ class Metadata(BaseModel):
 
 
 class Search(Document):
-    user_id: Annotated[PydanticObjectId, Indexed()]
+    user_id: PydanticObjectId
     origin: Location
     destination: Location
     cargo_weight_kg: float
@@ -46,3 +47,25 @@ class Search(Document):
 
     class Settings:
         name = "searches"
+        indexes = [
+            # A user's history, newest first: the list, count and stats queries
+            # all filter on user_id, and the default sort needs no in-memory SORT
+            IndexModel(
+                [("user_id", ASCENDING), ("created_at", DESCENDING)],
+                name="user_id_created_at",
+            ),
+            # Reuse of recent nearby routes: origin within a radius, same mode,
+            # newest first; the destination index narrows the other end
+            IndexModel(
+                [
+                    ("origin.coordinates", GEOSPHERE),
+                    ("transport_mode", ASCENDING),
+                    ("created_at", DESCENDING),
+                ],
+                name="origin_2dsphere_mode_created_at",
+            ),
+            IndexModel(
+                [("destination.coordinates", GEOSPHERE)],
+                name="destination_2dsphere",
+            ),
+        ]
@@ -1,12 +1,61 @@
+import time
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from redis.asyncio import Redis
+
+# Seeds a missing counter from the clock so versions never repeat after a Redis
+# flush or key expiry; a reused version could otherwise yield a false 304. Also
+# settles ARGV[3] changes marked pending, in the same step as the bump.
+_BUMP_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+local version = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if tonumber(ARGV[3]) > 0 and redis.call('DECRBY', KEYS[2], ARGV[3]) <= 0 then
+    redis.call('DEL', KEYS[2])
+end
+return version
+"""
 
 
 class SearchRepository:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.collection = db.searches
 
+    @staticmethod
+    def list_filter(user_id: ObjectId, mode: str | None) -> dict:
+        filter_q: dict = {"user_id": user_id}
+        if mode:
+            filter_q["transport_mode"] = mode
+        return filter_q
+
+    @staticmethod
+    def list_sort(sort: str) -> tuple[str, int]:
+        return sort.lstrip("-"), -1 if sort.startswith("-") else 1
+
+    @staticmethod
+    def stats_pipeline(user_id: ObjectId) -> list[dict]:
+        return [
+            {"$match": {"user_id": user_id}},
+            {
+                "$group": {
+                    "_id": None,
+                    "total_searches": {"$sum": 1},
+                    "avg_cargo_weight": {"$avg": "$cargo_weight_kg"},
+                    "total_co2_saved": {
+                        "$sum": {
+                            "$subtract": [
+                                "$shortest_route.co2_emissions_kg",
+                                "$efficient_route.co2_emissions_kg",
+                            ]
+                        }
+                    },
+                }
+            },
+        ]
+
     async def list(
         self,
         *,
@@ -16,15 +65,12 @@ class SearchRepository:
         sort: str,
         mode: str | None,
     ):
-        filter_q: dict = {"user_id": user_id}
-        if mode:
-            filter_q["transport_mode"] = mode
+        filter_q = self.list_filter(user_id, mode)
 
         total = await self.collection.count_documents(filter_q)
         skip = (page - 1) * limit
 
-        sort_field = sort.lstrip("-")
-        direction = -1 if sort.startswith("-") else 1
+        sort_field, direction = self.list_sort(sort)
 
         cursor = (
             self.collection.find(filter_q)
@@ -45,25 +91,75 @@ class SearchRepository:
         )
         return result.deleted_count == 1
 
-    async def stats(self, *, user_id: ObjectId):
-        pipeline = [
-            {"$match": {"user_id": user_id}},
-            {
-                "$group": {
-                    "_id": None,
-                    "total_searches": {"$sum": 1},
-                    "avg_cargo_weight": {"$avg": "$cargo_weight_kg"},
-                    "total_co2_saved": {
-                        "$sum": {
-                            "$subtract": [
-                                "$shortest_route.co2_emissions_kg",
-                                "$efficient_route.co2_emissions_kg",
-                            ]
-                        }
-                    },
-                }
-            },
-        ]
+    async def fingerprint(self, *, user_id: ObjectId) -> tuple[int, ObjectId | None]:
+        """
+        Search count and newest search id: changes on every save and delete,
+        since searches are never updated in place.
+        """
+        count = await self.collection.count_documents({"user_id": user_id})
+        newest = await self.collection.find_one(
+            {"user_id": user_id}, {"_id": 1}, sort=[("created_at", -1)]
+        )
+        return count, newest["_id"] if newest else None
 
+    async def stats(self, *, user_id: ObjectId):
+        pipeline = self.stats_pipeline(user_id)
         result = await self.collection.aggregate(pipeline).to_list(1)
         return result[0] if result else None
+
+
+class SearchVersionRepository:
+    """
+    Per-user counter bumped whenever the user's search history changes.
+
+    A change is marked pending before it is written and settled by the bump
+    that follows it. While any is pending the counter is not trusted, by every
+    worker, so a bump that failed cannot leave stale 304s behind.
+    """
+
+    TTL_SECONDS = 30 * 24 * 3600
+    # Outlives the bump retries; a marker never settled (the worker died) just
+    # expires, and content ETags are served until then
+    PENDING_TTL_SECONDS = 300
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    @staticmethod
+    def _key(user_id: ObjectId) -> str:
+        return f"searches:version:{user_id}"
+
+    @staticmethod
+    def _pending_key(user_id: ObjectId) -> str:
+        return f"searches:pending:{user_id}"
+
+    async def get(self, user_id: ObjectId) -> str | None:
+        """The user's version, or None while a change to their history is pending."""
+        version, pending = await self.redis.mget(
+            self._key(user_id), self._pending_key(user_id)
+        )
+        if pending is not None:
+            return None
+        if version is None:
+            seed = str(time.time_ns() // 1000)
+            await self.redis.set(self._key(user_id), seed, ex=self.TTL_SECONDS, nx=True)
+            version = await self.redis.get(self._key(user_id)) or seed
+        return version
+
+    async def begin_change(self, user_id: ObjectId) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incr(self._pending_key(user_id))
+            pipe.expire(self._pending_key(user_id), self.PENDING_TTL_SECONDS)
+            await pipe.execute()
+
+    async def bump(self, user_id: ObjectId, settle: int = 0) -> int:
+        """Bump the version, settling ``settle`` changes marked by begin_change."""
+        return await self.redis.eval(
+            _BUMP_SCRIPT,
+            2,
+            self._key(user_id),
+            self._pending_key(user_id),
+            time.time_ns() // 1000,
+            self.TTL_SECONDS,
+            settle,
+        )
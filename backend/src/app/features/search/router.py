@@ -1,22 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 
-from app.features.auth.dependency import get_current_user
+from app.features.auth.dependency import get_current_user_id
 from app.features.search.dependency import get_search_service
 
 router = APIRouter(prefix="/api/v1/searches", tags=["Searches"])
 
+# Cache-Control per route. Every view changes on save/delete (a deleted search
+# must stop being served), so clients revalidate; cheap thanks to ETags.
+CACHE_CONTROL_LIST = "private, no-cache"
+CACHE_CONTROL_STATS = "private, no-cache"
+CACHE_CONTROL_DETAIL = "private, no-cache"
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison, as required for If-None-Match (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
 
 @router.get("")
 async def list_searches(
+    response: Response,
     page: int = Query(1, ge=1),
     limit: int = Query(20, le=100),
     sort: str = "-created_at",
     mode: str | None = None,
-    user=Depends(get_current_user),
+    if_none_match: str | None = Header(None),
+    user_id=Depends(get_current_user_id),
     service=Depends(get_search_service),
 ):
+    etag = await service.etag(
+        user_id=user_id, variant=f"list:{page}:{limit}:{sort}:{mode}"
+    )
+    if etag:
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag, CACHE_CONTROL_LIST)
+        response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL_LIST
+
     return await service.list_searches(
-        user_id=user.id,
+        user_id=user_id,
         page=page,
         limit=limit,
         sort=sort,
@@ -24,38 +58,56 @@ async def list_searches(
     )
 
 
+@router.get("/stats")
+async def search_stats(
+    response: Response,
+    if_none_match: str | None = Header(None),
+    user_id=Depends(get_current_user_id),
+    service=Depends(get_search_service),
+):
+    etag = await service.etag(user_id=user_id, variant="stats")
+    if etag:
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag, CACHE_CONTROL_STATS)
+        response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL_STATS
+
+    return await service.get_stats(user_id=user_id)
+
+
 @router.get("/{search_id}")
 async def get_search(
     search_id: str,
-    user=Depends(get_current_user),
+    response: Response,
+    if_none_match: str | None = Header(None),
+    user_id=Depends(get_current_user_id),
     service=Depends(get_search_service),
 ):
+    etag = await service.etag(user_id=user_id, variant=f"detail:{search_id}")
+    if etag and _etag_matches(if_none_match, etag):
+        return _not_modified(etag, CACHE_CONTROL_DETAIL)
+
     result = await service.get_search(
         search_id=search_id,
-        user_id=user.id,
+        user_id=user_id,
     )
     if not result:
         raise HTTPException(404, "Search not found")
+    if etag:
+        response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL_DETAIL
     return result
 
 
 @router.delete("/{search_id}", status_code=204)
 async def delete_search(
     search_id: str,
-    user=Depends(get_current_user),
+    user_id=Depends(get_current_user_id),
     service=Depends(get_search_service),
 ):
     deleted = await service.delete_search(
         search_id=search_id,
-        user_id=user.id,
+        user_id=user_id,
     )
     if not deleted:
         raise HTTPException(404, "Search not found")
-
-
-@router.get("/stats")
-async def search_stats(
-    user=Depends(get_current_user),
-    service=Depends(get_search_service),
-):
-    return await service.get_stats(user_id=user.id)
@@ -1,14 +1,113 @@
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
 from math import ceil
 
 from bson import ObjectId
 
 from app.utils.logger import logger
 
+# Seconds between attempts to bump a version whose first bump failed
+_BUMP_RETRY_DELAYS = (1, 2, 5, 10, 30, 60, 120)
+
+# Users whose version bump this worker is retrying, with the pending changes
+# the retry settles once it lands
+_retrying: dict = {}
+_retries: set[asyncio.Task] = set()
+
+
+@asynccontextmanager
+async def search_history_change(versions, user_id):
+    """
+    Wrap a write to the user's search history.
+
+    The change is marked pending in Redis first, so every worker serves
+    content-derived ETags for the user until the version bump after the write
+    lands. Without the mark, a failed bump would leave the other workers
+    answering 304 for the old version.
+    """
+    try:
+        await versions.begin_change(user_id)
+        marked = True
+    except Exception as e:
+        logger.warning(f"Could not mark a search history change for {user_id}: {e}")
+        marked = False
+    try:
+        yield
+    finally:
+        await bump_search_version(versions, user_id, settle=marked)
+
+
+async def bump_search_version(versions, user_id, *, settle: bool = False) -> None:
+    """
+    Bump the user's search version after their history changed.
+
+    ``settle`` clears the pending mark of the change. A failed bump is logged
+    and retried in the background; the mark stays until a retry lands.
+    """
+    try:
+        await versions.bump(user_id, int(settle))
+    except Exception as e:
+        logger.error(f"Search version bump failed for {user_id}, retrying: {e}")
+        if user_id in _retrying:
+            _retrying[user_id] += int(settle)
+            return
+        _retrying[user_id] = int(settle)
+        task = asyncio.create_task(_retry_bump(versions, user_id))
+        _retries.add(task)
+        task.add_done_callback(_retries.discard)
+
+
+async def _retry_bump(versions, user_id) -> None:
+    try:
+        for delay in _BUMP_RETRY_DELAYS:
+            await asyncio.sleep(delay)
+            try:
+                await versions.bump(user_id, _retrying[user_id])
+                logger.info(f"Search version bump for {user_id} succeeded on retry")
+                return
+            except Exception as e:
+                logger.warning(f"Search version bump retry failed for {user_id}: {e}")
+        logger.error(
+            f"Giving up on search version bump for {user_id}; its ETags are "
+            "content-derived until the pending mark expires, then may be stale"
+        )
+    finally:
+        del _retrying[user_id]
+
 
 class SearchService:
-    def __init__(self, repo, redis):
+    def __init__(self, repo, versions):
         self.repo = repo
-        self.redis = redis
+        self.versions = versions
+
+    async def etag(self, *, user_id, variant: str) -> str | None:
+        """
+        Strong ETag for a view of the user's search history.
+
+        Derived from the per-user version counter, so it costs one Redis GET and
+        no Mongo query. ``variant`` distinguishes representations (route, query).
+        While the counter is unavailable or a change to the history is pending,
+        the ETag is derived from the history itself instead (one indexed count
+        and lookup). Returns None when neither is available.
+        """
+        version = None
+        try:
+            version = await self.versions.get(user_id)
+        except Exception as e:
+            logger.warning(f"Search version lookup failed, using content ETag: {e}")
+        if version is None:
+            try:
+                count, newest = await self.repo.fingerprint(user_id=user_id)
+            except Exception as e:
+                logger.warning(f"Search history fingerprint failed: {e}")
+                return None
+            # Counter versions are numeric, so the prefix keeps the two apart
+            version = f"c{count}.{newest}"
+        digest = hashlib.blake2b(
+            f"{user_id}:{variant}".encode(), digest_size=8
+        ).hexdigest()
+        return f'"{version}-{digest}"'
 
     def _serialize_search(self, doc):
         """Convert MongoDB document to serializable dict"""
@@ -66,10 +165,12 @@ class SearchService:
         return self._serialize_search(doc)
 
     async def delete_search(self, *, search_id, user_id):
-        return await self.repo.delete(
-            search_id=ObjectId(search_id),
-            user_id=user_id,
-        )
+        async with search_history_change(self.versions, user_id):
+            deleted = await self.repo.delete(
+                search_id=ObjectId(search_id),
+                user_id=user_id,
+            )
+        return deleted
 
     async def get_stats(self, *, user_id):
         stats = await self.repo.stats(user_id=user_id)
@@ -1,57 +1,178 @@
 """Application lifespan management."""
 
+import asyncio
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
+import httpx
+from beanie import init_beanie
 from fastapi import FastAPI
+from redis.asyncio import Redis
 
-from app.config.settings import get_settings
+from app.config.settings import Settings, get_settings
+from app.connections.http import create_http_client
 from app.connections.mongodb import create_mongo_client
 from app.connections.redis import create_redis_client
 from app.features.auth.model import User
+from app.features.auth.revocation import TokenRevocationList
+from app.features.health.sampler import HealthSampler
+from app.features.routes.directions_cache import DirectionsCache
+from app.features.routes.mapbox import MAPBOX_API_URL, MapboxClient
+from app.features.routes.repository import RouteRepository
+from app.features.routes.warmer import CorridorWarmer
 from app.features.search.model import Search
+from app.middleware.server_middleware import mark_worker_dead
+from app.utils.faults import FaultRule, fault_injector
 from app.utils.logger import logger
+from app.utils.loop_monitor import LoopMonitor
+from app.utils.startup import StartupTimer
+from app.utils.tracing import setup_tracing, shutdown_tracing
+
+# Pooled connections opened per dependency before serving (Mongo minPoolSize)
+_WARM_CONNECTIONS = 2
+
+
+async def _connect_mongo(app: FastAPI, settings: Settings, timer: StartupTimer) -> None:
+    """Beanie init, then warm the pool up to minPoolSize. Failure is fatal."""
+    with timer.phase("mongo"):
+        try:
+            mongo_client = getattr(app.state, "mongo_client", None)
+            if mongo_client is None:
+                mongo_client, db = await create_mongo_client(
+                    uri=settings.MONGODB_URI,
+                    db_name=settings.MONGODB_DB_NAME,
+                    document_models=[User, Search],
+                )
+                app.state.mongo_client = mongo_client
+                app.state.db = db
+            else:
+                # Client provided before startup (benchmarks, tests)
+                await init_beanie(database=app.state.db, document_models=[User, Search])
+            # Concurrent pings open pooled connections before the first request
+            pings = (mongo_client.admin.command("ping") for _ in range(_WARM_CONNECTIONS))
+            _, server_info = await asyncio.gather(
+                asyncio.gather(*pings), mongo_client.server_info()
+            )
+            logger.info(
+                "MongoDB connected",
+                database=settings.MONGODB_DB_NAME,
+                version=server_info.get("version", "unknown"),
+            )
+        except Exception as e:
+            logger.error(f"MongoDB connection failed: {e}", exc_info=True)
+            raise
+
+
+async def _connect_redis(redis: Redis, timer: StartupTimer) -> None:
+    with timer.phase("redis"):
+        try:
+            await asyncio.gather(*(redis.ping() for _ in range(_WARM_CONNECTIONS)))
+            logger.info("Redis connected")
+        except Exception as e:
+            logger.error(f"Redis connection failed: {e}", exc_info=True)
+            # Don't raise - Redis is optional for some features
+
+
+async def _warm_mapbox(http_client: httpx.AsyncClient, timer: StartupTimer) -> None:
+    """Open a TLS connection to Mapbox so the first route request skips the handshake."""
+    with timer.phase("mapbox"):
+        try:
+            await http_client.head(MAPBOX_API_URL, timeout=5)
+        except httpx.HTTPError as e:
+            logger.warning(f"Mapbox connection warm-up failed: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Manage application startup and shutdown."""
     settings = get_settings()
+    timer = StartupTimer()
 
     logger.info("Application starting", app_name=app.title, version=app.version)
 
-    # MongoDB: Initialize using Beanie's recommended approach
-    mongo_client, db = await create_mongo_client(
-        uri=settings.MONGODB_URI,
-        db_name=settings.MONGODB_DB_NAME,
-        document_models=[User, Search],
+    # Tracing first, so connection setup below is already instrumented
+    with timer.phase("tracing"):
+        if setup_tracing(settings):
+            logger.info(
+                "Tracing enabled",
+                exporter=settings.OTEL_TRACES_EXPORTER,
+                sampling_ratio=settings.OTEL_SAMPLING_RATIO,
+            )
+
+    # Fault injection (off unless configured): validated before any client exists
+    fault_injector.configure(
+        enabled=settings.FAULT_INJECTION_ENABLED,
+        rules=[FaultRule(**rule) for rule in settings.FAULT_INJECTION_RULES],
     )
-    app.state.mongo_client = mongo_client
-    app.state.db = db
-    # Redis: Connect and store in app.state
-    redis = create_redis_client(settings.REDIS_URL)
+    if fault_injector.enabled:
+        logger.warning("Fault injection enabled", rules=settings.FAULT_INJECTION_RULES)
+
+    # Client objects are created without I/O; connecting happens concurrently below.
+    # Clients already set on app.state (benchmarks, tests) are used as they are.
+    redis = getattr(app.state, "redis", None) or create_redis_client(settings.REDIS_URL)
     app.state.redis = redis
+    # Outbound HTTP (Mapbox): one pooled client for the process lifetime
+    if getattr(app.state, "http_client", None) is None:
+        app.state.http_client = create_http_client()
+
+    # MongoDB (Beanie init, fail fast if unavailable), Redis and Mapbox in parallel
+    await asyncio.gather(
+        _connect_mongo(app, settings, timer),
+        _connect_redis(redis, timer),
+        _warm_mapbox(app.state.http_client, timer),
+    )
+
+    # Access-token revocation: mirror revoked jtis into a local Bloom filter
+    token_revocations = TokenRevocationList(
+        redis,
+        capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+        error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+        rebuild_interval=settings.TOKEN_REVOCATION_REBUILD_INTERVAL,
+    )
+
+    # Health: sample in the background so probes only read a cached snapshot
+    health_sampler = HealthSampler(
+        app.state.mongo_client,
+        redis,
+        interval=settings.HEALTH_SAMPLE_INTERVAL_SECONDS,
+        check_timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+        max_stale_intervals=settings.HEALTH_MAX_STALE_INTERVALS,
+    )
+
+    with timer.phase("background_tasks"):
+        await asyncio.gather(token_revocations.start(), health_sampler.start())
+    app.state.token_revocations = token_revocations
+    app.state.health_sampler = health_sampler
+
+    # Event loop: lag histogram and slow-callback watchdog, toggled via /api/v1/admin
+    loop_monitor = LoopMonitor(
+        interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+        threshold=settings.SLOW_CALLBACK_THRESHOLD_MS / 1000,
+    )
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    app.state.loop_monitor = loop_monitor
 
-    # Force early server selection (fail fast if MongoDB unavailable)
-    try:
-        await mongo_client.admin.command("ping")
-        server_info = await mongo_client.server_info()
-        logger.info(
-            "MongoDB connected",
-            database=settings.MONGODB_DB_NAME,
-            version=server_info.get("version", "unknown"),
+    # Directions cache warming for popular corridors; runs after startup completes
+    if settings.DIRECTIONS_CACHE_ENABLED and settings.CORRIDOR_WARMER_ENABLED:
+        corridor_warmer = CorridorWarmer(
+            RouteRepository(app.state.db),
+            MapboxClient(settings.MAPBOX_TOKEN, app.state.http_client),
+            DirectionsCache(redis, ttl=settings.DIRECTIONS_CACHE_TTL_SECONDS),
+            redis,
+            top_n=settings.CORRIDOR_WARMER_TOP_N,
+            lookback_days=settings.CORRIDOR_WARMER_LOOKBACK_DAYS,
+            interval=settings.CORRIDOR_WARMER_INTERVAL_SECONDS,
+            rate_per_second=settings.CORRIDOR_WARMER_RATE_PER_SECOND,
+            refresh_before=settings.CORRIDOR_WARMER_REFRESH_BEFORE_SECONDS,
         )
-    except Exception as e:
-        logger.error(f"MongoDB connection failed: {e}", exc_info=True)
-        raise
-
-    # Redis: Connect using existing pattern
-    try:
-        await redis.ping()
-        logger.info("Redis connected")
-    except Exception as e:
-        logger.error(f"Redis connection failed: {e}", exc_info=True)
-        # Don't raise - Redis is optional for some features
+        await corridor_warmer.start()
+        app.state.corridor_warmer = corridor_warmer
+
+    startup = timer.report()
+    app.state.startup_timings = startup
+    over_target = startup["process"] > settings.STARTUP_TARGET_SECONDS * 1000
+    (logger.warning if over_target else logger.info)("Startup timings (ms)", **startup)
 
     logger.info("Application ready", status="running")
 
@@ -61,6 +182,18 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
 
     logger.info("Application shutting down", status="stopping")
 
+    if hasattr(app.state, "corridor_warmer"):
+        await app.state.corridor_warmer.stop()
+
+    if hasattr(app.state, "loop_monitor"):
+        await app.state.loop_monitor.stop()
+
+    if hasattr(app.state, "health_sampler"):
+        await app.state.health_sampler.stop()
+
+    if hasattr(app.state, "token_revocations"):
+        await app.state.token_revocations.stop()
+
     if hasattr(app.state, "mongo_client"):
         app.state.mongo_client.close()
         logger.info("MongoDB connection closed")
@@ -68,4 +201,10 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     if hasattr(app.state, "redis"):
         await app.state.redis.close()
         logger.info("Redis connection closed")
+
+    if hasattr(app.state, "http_client"):
+        await app.state.http_client.aclose()
+        logger.info("HTTP client closed")
+    shutdown_tracing()
+    mark_worker_dead()
     logger.info("Application shutdown complete", status="stopped")
@@ -2,19 +2,32 @@
 
 import signal
 import sys
+from collections.abc import Callable
 
 from app.utils.logger import logger
 
 
-def setup_signal_handlers() -> None:
-    """Setup graceful shutdown handlers for SIGTERM and SIGINT."""
+def setup_signal_handlers(on_shutdown: Callable[[], None] | None = None) -> None:
+    """
+    Setup graceful shutdown handlers for SIGTERM and SIGINT.
+
+    Without ``on_shutdown`` the process exits on the first signal. With it, the
+    first signal only calls ``on_shutdown`` (which must return quickly) so the
+    caller can drain in-flight work before exiting; a second signal exits at once.
+    """
+    draining = False
 
     def graceful_shutdown(signum: int, frame) -> None:
         """Handle graceful shutdown."""
+        nonlocal draining
         sig_name = signal.Signals(signum).name
-        logger.warning(f"Received {sig_name}, shutting down gracefully")
-        sys.exit(0)
+        if on_shutdown is None or draining:
+            logger.warning(f"Received {sig_name}, shutting down gracefully")
+            sys.exit(0)
+
+        draining = True
+        logger.warning(f"Received {sig_name}, draining before exit")
+        on_shutdown()
 
     signal.signal(signal.SIGTERM, graceful_shutdown)
     signal.signal(signal.SIGINT, graceful_shutdown)
-
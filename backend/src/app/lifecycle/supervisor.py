@@ -0,0 +1,174 @@
+"""Pre-fork worker supervisor for production."""
+
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+from multiprocessing.process import BaseProcess
+
+import psutil
+import uvicorn
+
+from app.lifecycle.signals import setup_signal_handlers
+from app.middleware.server_middleware import compact_dead_worker
+from app.utils.logger import logger
+
+
+def _run_worker(config: uvicorn.Config, sockets: list[socket.socket], cpu: int | None) -> None:
+    """Worker process entry point: serve on the inherited listening socket."""
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    # uvicorn installs its own SIGTERM/SIGINT handlers: stop accepting, finish
+    # in-flight requests, run the lifespan shutdown, then exit
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+class WorkerSupervisor:
+    """
+    Binds the listening socket once and keeps ``workers`` uvicorn processes on it.
+
+    Workers are started with the ``spawn`` method (no state inherited from this
+    process) and are recycled to contain leaks:
+
+    - after ``max_requests`` requests, plus a random jitter so workers do not all
+      restart together (uvicorn's ``limit_max_requests``; the worker drains and
+      exits, and is replaced);
+    - when their RSS exceeds ``max_rss_mb``: a replacement is started first, then
+      the old worker is sent SIGTERM to drain, so capacity never dips.
+
+    SIGTERM/SIGINT to the supervisor drains every worker for up to
+    ``graceful_timeout`` seconds, then kills any that remain.
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        *,
+        workers: int,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        max_rss_mb: int = 0,
+        check_interval: float = 5.0,
+        graceful_timeout: float = 30.0,
+        cpu_affinity: bool = False,
+    ):
+        self.config = config
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.check_interval = check_interval
+        self.graceful_timeout = graceful_timeout
+        self.cpus = sorted(os.sched_getaffinity(0)) if cpu_affinity else None
+
+        self._context = multiprocessing.get_context("spawn")
+        self._sockets: list[socket.socket] = []
+        self._slots: dict[int, BaseProcess] = {}
+        self._draining: dict[BaseProcess, float] = {}  # process -> kill deadline
+        self._should_exit = threading.Event()
+
+    def run(self) -> None:
+        setup_signal_handlers(self._should_exit.set)
+        self._sockets = [self.config.bind_socket()]
+        logger.info(
+            f"Supervisor {os.getpid()} starting {self.workers} workers",
+            host=self.config.host,
+            port=self.config.port,
+            max_requests=self.max_requests,
+            max_rss_mb=self.max_rss // (1024 * 1024),
+        )
+        try:
+            for slot in range(self.workers):
+                self._spawn(slot)
+            while not self._should_exit.wait(self.check_interval):
+                self._reap()
+                self._recycle_oversized()
+        finally:
+            self._stop_all()
+            for sock in self._sockets:
+                sock.close()
+            logger.info("Supervisor stopped")
+
+    def _spawn(self, slot: int) -> None:
+        if self.max_requests:
+            # The config is pickled when the process starts, so each worker
+            # gets its own jittered limit
+            self.config.limit_max_requests = self.max_requests + random.randint(
+                0, self.max_requests_jitter
+            )
+        cpu = self.cpus[slot % len(self.cpus)] if self.cpus else None
+        process = self._context.Process(
+            target=_run_worker,
+            args=(self.config, self._sockets, cpu),
+            name=f"worker-{slot}",
+        )
+        process.start()
+        self._slots[slot] = process
+        logger.info(f"Started worker {process.pid}", slot=slot, cpu=cpu)
+
+    def _reap(self) -> None:
+        """Replace workers that exited (request limit, crash) and collect drained ones."""
+        for slot, process in list(self._slots.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            self._cleanup(process)
+            log = logger.info if process.exitcode == 0 else logger.error
+            log(f"Worker {process.pid} exited with code {process.exitcode}, replacing", slot=slot)
+            self._spawn(slot)
+
+        now = time.monotonic()
+        for process, deadline in list(self._draining.items()):
+            if not process.is_alive():
+                process.join()
+            elif now >= deadline:
+                logger.warning(f"Worker {process.pid} did not drain in time, killing")
+                process.kill()
+                process.join()
+            else:
+                continue
+            del self._draining[process]
+            self._cleanup(process)
+
+    def _recycle_oversized(self) -> None:
+        if not self.max_rss:
+            return
+        for slot, process in list(self._slots.items()):
+            try:
+                rss = psutil.Process(process.pid).memory_info().rss
+            except psutil.Error:
+                continue
+            if rss <= self.max_rss:
+                continue
+            logger.warning(
+                f"Worker {process.pid} RSS {rss / 1024 / 1024:.0f} MB over limit, recycling",
+                slot=slot,
+            )
+            # Start the replacement before draining the old worker
+            self._spawn(slot)
+            process.terminate()
+            self._draining[process] = time.monotonic() + self.graceful_timeout
+
+    def _stop_all(self) -> None:
+        processes = [*self._slots.values(), *self._draining]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.graceful_timeout
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning(f"Worker {process.pid} did not drain in time, killing")
+                process.kill()
+                process.join()
+            self._cleanup(process)
+        self._slots.clear()
+        self._draining.clear()
+
+    @staticmethod
+    def _cleanup(process: BaseProcess) -> None:
+        # Fold the dead worker's metrics into the shared aggregates
+        compact_dead_worker(process.pid)
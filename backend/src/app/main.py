@@ -1,25 +1,31 @@
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import ORJSONResponse, Response
 
 from app.config.settings import get_settings
+from app.features.admin.router import router as admin_router
 from app.features.auth.router import router as auth_router
 from app.features.health.router import router as health_router
 from app.features.routes.router import router as route_router
 from app.features.search.router import router as search_router
 from app.lifecycle.lifespan import lifespan
+from app.middleware.compression_middleware import CompressionMiddleware
+from app.middleware.concurrency_middleware import AdaptiveConcurrencyMiddleware
 from app.middleware.global_exception_handler import global_exception_handler
+from app.middleware.profiling_middleware import ProfilingMiddleware
+from app.middleware.rate_limit_middleware import RateLimitMiddleware
 from app.middleware.server_middleware import (
+    CorrelationIdMiddleware,
     MetricsMiddleware,
+    SecurityHeadersMiddleware,
     TimeoutMiddleware,
-    correlation_middleware,
-    create_security_headers_middleware,
     get_metrics,
 )
+from app.middleware.tracing_middleware import TracingMiddleware
 from app.utils.logger import logger
+from app.utils.request_cost import TimedORJSONResponse
 
 # Load environment variables
 load_dotenv(".env.development")
@@ -37,7 +43,7 @@ def create_app() -> FastAPI:
         docs_url="/api-docs",
         redoc_url="/api-redoc",
         openapi_url="/swagger.json",
-        default_response_class=ORJSONResponse,
+        default_response_class=TimedORJSONResponse,
     )
 
     # ============================================================================
@@ -51,8 +57,32 @@ def create_app() -> FastAPI:
         allow_origins=settings.CORS_ORIGINS,
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
-        allow_headers=["Content-Type", "Authorization", "X-Correlation-ID"],
-        expose_headers=["X-Total-Count", "X-Correlation-ID", "X-Process-Time"],
+        allow_headers=[
+            "Content-Type",
+            "Authorization",
+            "X-Correlation-ID",
+            "If-None-Match",
+            "traceparent",
+            "tracestate",
+            "X-Server-Timing",
+            "X-Profile",
+            "X-Admin-Key",
+            "Idempotency-Key",
+        ],
+        expose_headers=[
+            "X-Total-Count",
+            "X-Correlation-ID",
+            "X-Process-Time",
+            "X-Trace-ID",
+            "Server-Timing",
+            "ETag",
+            "RateLimit-Limit",
+            "RateLimit-Remaining",
+            "RateLimit-Reset",
+            "Retry-After",
+            "X-Profile-Id",
+            "Idempotent-Replayed",
+        ],
         max_age=3600,
     )
 
@@ -62,28 +92,47 @@ def create_app() -> FastAPI:
     #     allowed_hosts=settings.CORS_ORIGINS, #Note: Don't use settings.CORS_ORIGINS for TrustedHost - use actual hostnames, not full URLs.
     # )
 
-    # 3. Compression (Performance optimization)
-    app.add_middleware(GZipMiddleware, minimum_size=15000, compresslevel=6)
+    # 3. Compression (zstd/brotli/gzip negotiated, large bodies compressed off-loop)
+    app.add_middleware(CompressionMiddleware)  # pyright: ignore[reportArgumentType]
 
     # 4. Timeout (Prevent hanging requests)
-    app.add_middleware(TimeoutMiddleware, timeout_seconds=30) # pyright: ignore[reportArgumentType]
+    app.add_middleware(
+        TimeoutMiddleware,  # pyright: ignore[reportArgumentType]
+        timeout_seconds=settings.REQUEST_TIMEOUT_SECONDS,
+        route_budgets=settings.REQUEST_TIMEOUT_ROUTE_BUDGETS,
+        exempt_prefixes=("/api/v1/admin/profile",),
+    )
 
-    # 5. Metrics collection (Monitor all requests)
-    app.add_middleware(MetricsMiddleware, project_name="langchain-fastapi") # pyright: ignore[reportArgumentType]
+    # 5. Rate limiting (Inside metrics so 429s are still counted)
+    app.add_middleware(RateLimitMiddleware)
 
-    # ============================================================================
-    # CUSTOM MIDDLEWARES (Using decorator style for better performance)
-    # ============================================================================
+    # 6. Adaptive concurrency (Shed load before rate limiting touches Redis)
+    app.add_middleware(AdaptiveConcurrencyMiddleware)  # pyright: ignore[reportArgumentType]
 
-    # 6. Security headers (Execute early)
-    @app.middleware("http")
-    async def add_security_headers(request: Request, call_next):
-        return await create_security_headers_middleware(request, call_next)
+    # 7. Metrics collection (Monitor all requests)
+    app.add_middleware(
+        MetricsMiddleware,  # pyright: ignore[reportArgumentType]
+        project_name="langchain-fastapi",
+        max_endpoints=settings.METRICS_MAX_ENDPOINT_LABELS,
+        server_timing=settings.SERVER_TIMING_ENABLED,
+        server_timing_gated=settings.SERVER_TIMING_REQUIRE_HEADER,
+        timing_allow_origin=", ".join(settings.CORS_ORIGINS),
+    )
 
-    # 7. Correlation ID (For distributed tracing)
-    @app.middleware("http")
-    async def add_correlation_id(request: Request, call_next):
-        return await correlation_middleware(request, call_next)
+    # 8. Security headers (Execute early)
+    app.add_middleware(SecurityHeadersMiddleware)  # pyright: ignore[reportArgumentType]
+
+    # 9. Tracing (Server span per request, inside correlation ID)
+    app.add_middleware(TracingMiddleware)  # pyright: ignore[reportArgumentType]
+
+    # 10. Correlation ID (For distributed tracing)
+    app.add_middleware(CorrelationIdMiddleware)  # pyright: ignore[reportArgumentType]
+
+    # 11. Profiling (Outermost, so a profiled request covers the whole stack)
+    app.add_middleware(
+        ProfilingMiddleware,  # pyright: ignore[reportArgumentType]
+        profile_ttl=settings.PROFILING_PROFILE_TTL_SECONDS,
+    )
 
     # ============================================================================
     # EXCEPTION HANDLERS (Register after middleware, before routes)
@@ -114,6 +163,7 @@ def create_app() -> FastAPI:
     app.include_router(auth_router)
     app.include_router(search_router)
     app.include_router(route_router)
+    app.include_router(admin_router)
 
     # 404 handler (Catch-all route)
     @app.api_route(
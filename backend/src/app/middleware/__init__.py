@@ -1,19 +1,29 @@
 """API middleware for error handling and request processing."""
 
+from .compression_middleware import CompressionMiddleware
+from .concurrency_middleware import AdaptiveConcurrencyMiddleware
 from .global_exception_handler import global_exception_handler
+from .profiling_middleware import ProfilingMiddleware
+from .rate_limit_middleware import RateLimitMiddleware
 from .server_middleware import (
+    CorrelationIdMiddleware,
     MetricsMiddleware,
+    SecurityHeadersMiddleware,
     TimeoutMiddleware,
-    correlation_middleware,
-    create_security_headers_middleware,
     get_metrics,
 )
+from .tracing_middleware import TracingMiddleware
 
 __all__ = [
+    "AdaptiveConcurrencyMiddleware",
+    "CompressionMiddleware",
+    "CorrelationIdMiddleware",
     "MetricsMiddleware",
+    "ProfilingMiddleware",
+    "RateLimitMiddleware",
+    "SecurityHeadersMiddleware",
     "TimeoutMiddleware",
-    "correlation_middleware",
-    "create_security_headers_middleware",
+    "TracingMiddleware",
     "get_metrics",
     "global_exception_handler",
 ]
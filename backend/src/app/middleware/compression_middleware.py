@@ -0,0 +1,318 @@
+"""Negotiated zstd / brotli / gzip response compression."""
+
+import asyncio
+import gzip
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+
+from prometheus_client import Counter, Histogram
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config.settings import get_settings
+from app.middleware.server_middleware import metrics_registry
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional native dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional native dependency
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/geo+json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+compressed_responses_total = Counter(
+    "http_compressed_responses_total",
+    "Responses compressed, by negotiated encoding",
+    ["encoding"],
+    registry=metrics_registry,
+)
+
+compression_ratio = Histogram(
+    "http_response_compression_ratio",
+    "Compressed size divided by original size",
+    ["encoding"],
+    buckets=(0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0),
+    registry=metrics_registry,
+)
+
+compression_bytes_saved_total = Counter(
+    "http_compression_bytes_saved_total",
+    "Response bytes saved by compression",
+    ["encoding"],
+    registry=metrics_registry,
+)
+
+
+class _Encoder(ABC):
+    """
+    One-shot and streaming compression for a single content-coding.
+
+    Shared by all responses and called from worker threads: ``compress`` must
+    be thread-safe and ``stream`` must return state owned by one response.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes: ...
+
+    @abstractmethod
+    def stream(self) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """Return ``(compress_chunk, finish)`` for a chunked response."""
+
+
+class _GzipEncoder(_Encoder):
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def stream(self):
+        obj = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return (lambda chunk: obj.compress(chunk) + obj.flush(zlib.Z_SYNC_FLUSH)), obj.flush
+
+
+class _BrotliEncoder(_Encoder):
+    name = "br"
+
+    def __init__(self, quality: int):
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self):
+        obj = brotli.Compressor(quality=self.quality)
+        return (lambda chunk: obj.process(chunk) + obj.flush()), obj.finish
+
+
+class _ZstdEncoder(_Encoder):
+    name = "zstd"
+
+    def __init__(self, level: int):
+        self.level = level
+        # A ZstdCompressor is not safe to share between threads or streams
+        self._local = threading.local()
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(
+                level=self.level
+            )
+        return compressor.compress(data)
+
+    def stream(self):
+        # Chunks of one stream may run on different threads: one compressor each
+        obj = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return (
+            lambda chunk: obj.compress(chunk) + obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        ), obj.flush
+
+
+def _available_encoders() -> dict[str, _Encoder]:
+    """Encoders in server preference order."""
+    settings = get_settings()
+    encoders: dict[str, _Encoder] = {}
+    if zstandard is not None:
+        encoders["zstd"] = _ZstdEncoder(settings.COMPRESSION_ZSTD_LEVEL)
+    if brotli is not None:
+        encoders["br"] = _BrotliEncoder(settings.COMPRESSION_BROTLI_QUALITY)
+    encoders["gzip"] = _GzipEncoder(settings.COMPRESSION_GZIP_LEVEL)
+    return encoders
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI response compression negotiated from Accept-Encoding.
+
+    Prefers zstd, then brotli, then gzip, limited to what the client accepts and
+    what is installed. Bodies at or above ``offload_size`` are compressed in a
+    worker thread so large GeoJSON payloads do not stall the event loop; streaming
+    responses are compressed and flushed chunk by chunk. Strong ETags are weakened
+    on compressed responses, since the bytes no longer match the identity encoding.
+    """
+
+    def __init__(
+        self,
+        app: Callable[[dict, Callable, Callable], Awaitable],
+        minimum_size: int | None = None,
+        offload_size: int | None = None,
+    ):
+        settings = get_settings()
+        self.app = app
+        self.minimum_size = minimum_size or settings.COMPRESSION_MINIMUM_SIZE
+        self.offload_size = offload_size or settings.COMPRESSION_OFFLOAD_SIZE
+        self.encoders = _available_encoders()
+        self._metrics = {
+            name: (
+                compressed_responses_total.labels(encoding=name),
+                compression_ratio.labels(encoding=name),
+                compression_bytes_saved_total.labels(encoding=name),
+            )
+            for name in self.encoders
+        }
+        self._negotiate = lru_cache(maxsize=256)(self._select_encoding)
+
+    def _select_encoding(self, accept_encoding: str) -> str | None:
+        accepted: dict[str, float] = {}
+        for part in accept_encoding.split(","):
+            coding, _, params = part.strip().partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[coding.strip().lower()] = quality
+
+        wildcard = accepted.get("*", 0.0)
+        best, best_quality = None, 0.0
+        for name in self.encoders:
+            quality = accepted.get(name, wildcard)
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """ASGI interface."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+
+        encoding = self._negotiate(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-response state for CompressionMiddleware."""
+
+    __slots__ = (
+        "middleware",
+        "encoder",
+        "send_downstream",
+        "start_message",
+        "passthrough",
+        "compress_chunk",
+        "finish",
+        "original_size",
+        "compressed_size",
+    )
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Callable):
+        self.middleware = middleware
+        self.encoder = middleware.encoders[encoding]
+        self.send_downstream = send
+        self.start_message: dict | None = None
+        self.passthrough = False
+        self.compress_chunk: Callable[[bytes], bytes] | None = None
+        self.finish: Callable[[], bytes] | None = None
+        self.original_size = 0
+        self.compressed_size = 0
+
+    async def _run(self, fn: Callable, *args):
+        """Run ``fn`` off the loop when the payload is large enough to matter."""
+        size = len(args[0]) if args else 0
+        if size >= self.middleware.offload_size:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _eligible(self, headers: Headers) -> bool:
+        status = self.start_message["status"]
+        if status < 200 or status in (204, 206, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+    async def send(self, message: dict) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the start message until the first body chunk decides the strategy
+            self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send_downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compress_chunk is None:
+            headers = MutableHeaders(scope=self.start_message)
+            if not self._eligible(headers) or (
+                not more_body and len(body) < self.middleware.minimum_size
+            ):
+                self.passthrough = True
+                await self.send_downstream(self.start_message)
+                await self.send_downstream(message)
+                return
+
+            headers["Content-Encoding"] = self.encoder.name
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.startswith('"'):
+                headers["ETag"] = f"W/{etag}"
+
+            if not more_body:
+                compressed = await self._run(self.encoder.compress, body)
+                headers["Content-Length"] = str(len(compressed))
+                self._observe(len(body), len(compressed))
+                await self.send_downstream(self.start_message)
+                await self.send_downstream({"type": "http.response.body", "body": compressed})
+                return
+
+            del headers["Content-Length"]
+            self.compress_chunk, self.finish = self.encoder.stream()
+            await self.send_downstream(self.start_message)
+
+        self.original_size += len(body)
+        chunk = await self._run(self.compress_chunk, body) if body else b""
+        if not more_body:
+            chunk += self.finish()
+        self.compressed_size += len(chunk)
+
+        if chunk or not more_body:
+            await self.send_downstream(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
+        if not more_body:
+            self._observe(self.original_size, self.compressed_size)
+
+    def _observe(self, original: int, compressed: int) -> None:
+        total, ratio, saved = self.middleware._metrics[self.encoder.name]
+        total.inc()
+        if original:
+            ratio.observe(compressed / original)
+            saved.inc(max(0, original - compressed))
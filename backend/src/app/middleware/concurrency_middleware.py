@@ -0,0 +1,221 @@
+"""Adaptive concurrency limiting (AIMD) with early load shedding."""
+
+import time
+from collections.abc import Awaitable, Callable
+
+from fastapi.responses import ORJSONResponse
+from prometheus_client import Counter, Gauge
+
+from app.config.settings import get_settings
+from app.middleware.server_middleware import correlation_id_var, metrics_registry
+from app.utils.logger import logger
+
+# Never shed: probes, scraping and operator endpoints must work under overload
+_EXEMPT_PREFIXES = ("/metrics", "/api/v1/health", "/api/v1/admin")
+# Timeouts (408 from TimeoutMiddleware, 504 deadlines) and shed/unavailable upstreams.
+# Other 5xx are bugs or bad input and say nothing about load.
+_CONGESTION_STATUSES = frozenset({408, 503, 504})
+
+concurrency_limit = Gauge(
+    "http_concurrency_limit",
+    "Current adaptive concurrency limit per route class",
+    ["route_class"],
+    registry=metrics_registry,
+    multiprocess_mode="liveall",
+)
+
+concurrency_in_flight = Gauge(
+    "http_concurrency_in_flight",
+    "Requests in flight per route class",
+    ["route_class"],
+    registry=metrics_registry,
+    multiprocess_mode="livesum",
+)
+
+concurrency_rejected_total = Counter(
+    "http_concurrency_rejected_total",
+    "Requests shed with 503 because the route class was at its concurrency limit",
+    ["route_class"],
+    registry=metrics_registry,
+)
+
+
+class _AIMDLimit:
+    """
+    Additive-increase/multiplicative-decrease concurrency limit.
+
+    Queueing is detected by comparing a short-term latency average against a
+    long-term one (the class's normal latency, which absorbs its mix of fast and
+    slow endpoints). When the short-term average exceeds ``tolerance`` times the
+    long-term one, or a request times out or is shed (408/503/504), the limit is cut by
+    ``backoff``, at most once per typical latency. Otherwise each completed
+    request grows it by ``1 / limit``, i.e. roughly +1 per round trip.
+    """
+
+    __slots__ = (
+        "limit",
+        "min_limit",
+        "max_limit",
+        "tolerance",
+        "backoff",
+        "in_flight",
+        "short_latency",
+        "long_latency",
+        "_last_decrease",
+    )
+
+    SHORT_WEIGHT = 0.1
+    LONG_WEIGHT = 0.01
+
+    def __init__(
+        self, initial: int, min_limit: int, max_limit: int, tolerance: float, backoff: float
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.short_latency: float | None = None
+        self.long_latency: float | None = None
+        self._last_decrease = 0.0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float | None, overloaded: bool = False) -> None:
+        """Finish a request; ``latency=None`` releases without sampling it."""
+        self.in_flight -= 1
+        if latency is None:
+            return
+
+        if self.long_latency is None:
+            self.short_latency = self.long_latency = latency
+        else:
+            self.short_latency += (latency - self.short_latency) * self.SHORT_WEIGHT
+            self.long_latency += (latency - self.long_latency) * self.LONG_WEIGHT
+
+        if overloaded or self.short_latency > self.long_latency * self.tolerance:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.long_latency:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif self.in_flight * 2 >= self.limit:
+            # Only grow while the limit is actually being used
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Pure ASGI middleware that caps concurrent requests per route class.
+
+    Each class (a path prefix from CONCURRENCY_ROUTE_CLASSES, else ``default``)
+    has its own AIMD limit learned from observed latency, so a slow Mapbox does
+    not take search or auth down with it. Requests over the limit are rejected
+    immediately with 503 and ``Retry-After`` instead of queueing until they time
+    out, which keeps goodput stable under overload. Limits are per worker.
+    """
+
+    def __init__(self, app: Callable[[dict, Callable, Callable], Awaitable]):
+        self.app = app
+        settings = get_settings()
+        self.enabled = settings.CONCURRENCY_LIMIT_ENABLED
+        self.retry_after = str(settings.CONCURRENCY_RETRY_AFTER_SECONDS).encode()
+        # Longest prefix first, so the most specific class wins
+        self.route_classes = sorted(
+            settings.CONCURRENCY_ROUTE_CLASSES.items(),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self._limits: dict[str, _AIMDLimit] = {}
+        self._last_shed_log = 0.0
+        for route_class in {"default", *settings.CONCURRENCY_ROUTE_CLASSES.values()}:
+            self._limits[route_class] = _AIMDLimit(
+                initial=settings.CONCURRENCY_INITIAL_LIMIT,
+                min_limit=settings.CONCURRENCY_MIN_LIMIT,
+                max_limit=settings.CONCURRENCY_MAX_LIMIT,
+                tolerance=settings.CONCURRENCY_LATENCY_TOLERANCE,
+                backoff=settings.CONCURRENCY_BACKOFF_RATIO,
+            )
+            concurrency_limit.labels(route_class=route_class).set(
+                settings.CONCURRENCY_INITIAL_LIMIT
+            )
+
+    def _route_class(self, path: str) -> str:
+        return next(
+            (route_class for prefix, route_class in self.route_classes if path.startswith(prefix)),
+            "default",
+        )
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """ASGI interface."""
+        if (
+            scope["type"] != "http"
+            or not self.enabled
+            or scope["path"].startswith(_EXEMPT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self._route_class(scope["path"])
+        limiter = self._limits[route_class]
+        if not limiter.try_acquire():
+            concurrency_rejected_total.labels(route_class=route_class).inc()
+            await self._reject(scope, receive, send, route_class, limiter)
+            return
+
+        in_flight = concurrency_in_flight.labels(route_class=route_class)
+        in_flight.inc()
+        status_code: int | None = None
+        timed_out = False
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            in_flight.dec()
+            if status_code == 429:
+                # Rejected by the rate limiter without doing any work
+                limiter.release(None)
+            else:
+                overloaded = timed_out or status_code in _CONGESTION_STATUSES
+                limiter.release(time.perf_counter() - start, overloaded)
+            concurrency_limit.labels(route_class=route_class).set(int(limiter.limit))
+
+    async def _reject(
+        self, scope: dict, receive: Callable, send: Callable, route_class: str, limiter: _AIMDLimit
+    ) -> None:
+        correlation_id = correlation_id_var.get() or "unknown"
+        now = time.monotonic()
+        # Shedding happens in bursts; one log line per second is enough
+        if now - self._last_shed_log >= 1.0:
+            self._last_shed_log = now
+            logger.warning(
+                f"[{correlation_id}] Load shed: {scope['method']} {scope['path']} "
+                f"({route_class} at {int(limiter.limit)} concurrent requests)",
+                route_class=route_class,
+                limit=int(limiter.limit),
+            )
+        response = ORJSONResponse(
+            status_code=503,
+            content={
+                "error": "Service Unavailable",
+                "message": "Server is at capacity, please retry shortly",
+                "path": scope["path"],
+                "correlationId": correlation_id,
+            },
+        )
+        response.raw_headers.append((b"retry-after", self.retry_after))
+        await response(scope, receive, send)
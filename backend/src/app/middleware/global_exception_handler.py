@@ -3,6 +3,7 @@ import traceback
 from fastapi import Request, status
 from fastapi.exceptions import HTTPException, RequestValidationError
 from fastapi.responses import ORJSONResponse
+from pymongo.errors import PyMongoError
 
 from app.config.settings import get_settings
 from app.utils.exceptions import APIException
@@ -68,6 +69,18 @@ async def global_exception_handler(request: Request, exc: Exception) -> ORJSONRe
         }
         log_level = "warning"
 
+    elif isinstance(exc, PyMongoError) and exc.timeout:
+        # MongoDB operation cut short by the request deadline (pymongo.timeout)
+        error_obj = {
+            "name": "DeadlineExceeded",
+            "success": False,
+            "statusCode": status.HTTP_504_GATEWAY_TIMEOUT,
+            "request": request_info,
+            "message": "Request deadline exceeded during a database operation",
+            "data": None,
+        }
+        log_level = "error"
+
     elif isinstance(exc, HTTPException):
         # FastAPI HTTP exceptions
         error_obj = {
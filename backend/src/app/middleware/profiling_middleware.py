@@ -0,0 +1,96 @@
+"""Header-triggered profiling of individual requests."""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+
+from nanoid import generate
+from redis.exceptions import RedisError
+
+from app.features.admin.dependency import is_admin_key
+from app.utils.logger import logger
+from app.utils.profiler import AllocationTracker, SamplingProfiler, profile_store
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that profiles a request sent with ``X-Profile``.
+
+    Only honoured together with a valid ``X-Admin-Key``; otherwise the header is
+    ignored. The request's task is sampled on the event loop thread through the
+    whole middleware stack and handler, and the profile is stored in Redis under
+    the id returned in ``X-Profile-Id`` for ``GET /api/v1/admin/profiles/{id}``,
+    which any worker can then serve.
+    ``X-Profile: allocations`` also tracks allocations with tracemalloc, which
+    is process-wide and so includes concurrent requests. Must be the outermost
+    middleware.
+    """
+
+    def __init__(
+        self,
+        app: Callable[[dict, Callable, Callable], Awaitable],
+        interval: float = 0.001,
+        profile_ttl: int = 900,
+    ):
+        self.app = app
+        self.interval = interval
+        profile_store.ttl = profile_ttl
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """ASGI interface."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = admin_key = None
+        for key, value in scope["headers"]:
+            if key == b"x-profile":
+                mode = value.decode("latin-1").strip().lower()
+            elif key == b"x-admin-key":
+                admin_key = value.decode("latin-1")
+        if not mode or not is_admin_key(admin_key):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = generate(size=21)
+        header = (b"x-profile-id", profile_id.encode("latin-1"))
+
+        async def send_wrapper(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        profiler = SamplingProfiler(
+            self.interval,
+            thread_id=threading.get_ident(),
+            task=asyncio.current_task(),
+            loop=asyncio.get_running_loop(),
+        )
+        allocations = AllocationTracker() if mode == "allocations" else None
+        if allocations:
+            allocations.start()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            if allocations:
+                allocations.stop()
+            await self._store(scope, profile_id, profiler, allocations)
+
+    @staticmethod
+    async def _store(
+        scope: dict,
+        profile_id: str,
+        profiler: SamplingProfiler,
+        allocations: AllocationTracker | None,
+    ) -> None:
+        redis = getattr(scope["app"].state, "redis", None)
+        if redis is None:
+            logger.warning(f"Profile {profile_id} not stored: Redis is not connected")
+            return
+        name = f"{scope['method']} {scope['path']}"
+        try:
+            await profile_store.add(redis, profile_id, name, profiler, allocations)
+        except RedisError as e:
+            logger.warning(f"Profile {profile_id} not stored: {e}")
@@ -0,0 +1,250 @@
+"""Distributed sliding-window rate limiting with per-worker token reservations."""
+
+import time
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+
+from fastapi.responses import ORJSONResponse
+from jose import JWTError, jwt
+
+from app.config.settings import get_settings
+from app.middleware.server_middleware import _normalize_path, correlation_id_var
+from app.utils.logger import logger
+
+# Sliding-window counter: the previous window is weighted by how much of it still
+# overlaps the sliding window. Grants up to ARGV[2] tokens at once so a worker can
+# serve several requests locally before coming back to Redis.
+# KEYS: current window, previous window
+# ARGV: limit, requested tokens, period (ms), elapsed in current window (ms)
+# Returns: {granted, remaining after grant}
+_SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local requested = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local elapsed = tonumber(ARGV[4])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local used = math.floor(previous * (period - elapsed) / period) + current
+local granted = math.min(requested, limit - used)
+if granted <= 0 then
+    return {0, 0}
+end
+redis.call('INCRBY', KEYS[1], granted)
+redis.call('PEXPIRE', KEYS[1], period * 2)
+return {granted, limit - used - granted}
+"""
+
+_EXEMPT_PREFIXES = ("/metrics", "/api/v1/health", "/api-docs", "/api-redoc", "/swagger.json")
+
+_HEADER_LIMIT = b"ratelimit-limit"
+_HEADER_REMAINING = b"ratelimit-remaining"
+_HEADER_RESET = b"ratelimit-reset"
+_HEADER_POLICY = b"ratelimit-policy"
+_HEADER_RETRY_AFTER = b"retry-after"
+
+# Upper bound on locally tracked buckets before stale entries are dropped
+_MAX_LOCAL_BUCKETS = 10_000
+
+
+@lru_cache(maxsize=4096)
+def _token_subject(token: str) -> str | None:
+    """Verified ``sub`` of a bearer token, cached so each token is verified once."""
+    try:
+        payload = jwt.decode(
+            token,
+            get_settings().JWT_SECRET_KEY,
+            algorithms=[get_settings().JWT_ALGORITHM],
+            options={"verify_exp": False},
+        )
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+
+class _Reservation:
+    """Tokens this worker has already claimed from Redis for one window."""
+
+    __slots__ = ("window", "tokens", "remaining", "blocked_until")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.tokens = 0
+        self.remaining = 0
+        self.blocked_until = 0.0
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI rate limiter driven by the RATE_LIMIT_* settings.
+
+    Requests are keyed by user (verified JWT subject) or by client IP for anonymous
+    traffic, plus an extra per-route bucket for routes listed in
+    RATE_LIMIT_ROUTE_LIMITS. Each worker reserves tokens from Redis in batches, so
+    most requests are decided locally. Redis errors fail open.
+    """
+
+    def __init__(
+        self,
+        app: Callable[[dict, Callable, Callable], Awaitable],
+        limit: int | None = None,
+        period_seconds: int | None = None,
+    ):
+        settings = get_settings()
+        self.app = app
+        self.enabled = settings.RATE_LIMIT_ENABLED
+        self.limit = limit or settings.RATE_LIMIT_REQUESTS
+        self.period = period_seconds or settings.RATE_LIMIT_PERIOD
+        self.period_ms = self.period * 1000
+        self.reservation_size = settings.RATE_LIMIT_RESERVATION_SIZE
+        self.route_limits = settings.RATE_LIMIT_ROUTE_LIMITS
+        self._reservations: dict[str, _Reservation] = {}
+        self._script = None
+        self._last_error_log = 0.0
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """ASGI interface."""
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        redis = getattr(scope["app"].state, "redis", None)
+        if redis is None or path.startswith(_EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        identity = self._identity(scope)
+        buckets = [(identity, self.limit)]
+        route = _normalize_path(path)
+        route_limit = self.route_limits.get(route)
+        if route_limit:
+            buckets.append((f"route:{route}:{identity}", route_limit))
+
+        now = time.time()
+        window, elapsed_ms = divmod(int(now * 1000), self.period_ms)
+        reset = (self.period_ms - elapsed_ms + 999) // 1000
+
+        # Report the most restrictive bucket
+        header_limit, header_remaining = self.limit, self.limit
+        taken = []
+        for key, limit in buckets:
+            allowed, remaining = await self._acquire(redis, key, limit, window, elapsed_ms, now)
+            if not allowed:
+                # A limited route must not also drain the client's overall allowance
+                for taken_key in taken:
+                    self._refund(taken_key, window)
+                await self._reject(scope, receive, send, limit, reset)
+                return
+            if remaining is None:  # failed open, nothing taken
+                continue
+            taken.append(key)
+            if remaining < header_remaining:
+                header_limit, header_remaining = limit, remaining
+
+        rate_headers = [
+            (_HEADER_LIMIT, str(header_limit).encode()),
+            (_HEADER_REMAINING, str(header_remaining).encode()),
+            (_HEADER_RESET, str(reset).encode()),
+            (_HEADER_POLICY, f"{header_limit};w={self.period}".encode()),
+        ]
+
+        async def send_wrapper(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *rate_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _identity(self, scope: dict) -> str:
+        for key, value in scope["headers"]:
+            if key == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    subject = _token_subject(token)
+                    if subject:
+                        return f"user:{subject}"
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def _acquire(
+        self, redis, key: str, limit: int, window: int, elapsed_ms: int, now: float
+    ) -> tuple[bool, int | None]:
+        """
+        Consume one token, reserving a new batch from Redis when needed.
+
+        Returns whether the request is allowed and the tokens left, which is
+        None when Redis failed and the request was let through untracked.
+        """
+        reservation = self._reservations.get(key)
+        if reservation is None or reservation.window != window:
+            if len(self._reservations) >= _MAX_LOCAL_BUCKETS:
+                self._reservations.clear()
+            reservation = self._reservations[key] = _Reservation(window)
+
+        if reservation.tokens > 0:
+            reservation.tokens -= 1
+            return True, reservation.remaining + reservation.tokens
+
+        if reservation.blocked_until > now:
+            return False, 0
+
+        batch = min(self.reservation_size, max(1, limit // 10))
+        try:
+            if self._script is None:
+                self._script = redis.register_script(_SLIDING_WINDOW_SCRIPT)
+            # Hash tag keeps both windows in the same cluster slot
+            granted, remaining = await self._script(
+                keys=[f"ratelimit:{{{key}}}:{window}", f"ratelimit:{{{key}}}:{window - 1}"],
+                args=[limit, batch, self.period_ms, elapsed_ms],
+            )
+        except Exception as e:
+            if now - self._last_error_log > 60:
+                self._last_error_log = now
+                logger.warning(f"Rate limiter unavailable, failing open: {e}")
+            return True, None
+
+        granted, remaining = int(granted), int(remaining)
+        if granted <= 0:
+            # The sliding window frees capacity gradually; re-check after a second
+            reservation.blocked_until = now + 1.0
+            return False, 0
+
+        reservation.tokens = granted - 1
+        reservation.remaining = remaining
+        return True, remaining + reservation.tokens
+
+    def _refund(self, key: str, window: int) -> None:
+        """Return a token taken for a request that another bucket rejected."""
+        reservation = self._reservations.get(key)
+        if reservation is not None and reservation.window == window:
+            reservation.tokens += 1
+
+    async def _reject(
+        self, scope: dict, receive: Callable, send: Callable, limit: int, reset: int
+    ) -> None:
+        correlation_id = correlation_id_var.get() or "unknown"
+
+        logger.warning(
+            f"[{correlation_id}] Rate limit exceeded: {scope['method']} {scope['path']}"
+        )
+
+        response = ORJSONResponse(
+            status_code=429,
+            content={
+                "error": "Too Many Requests",
+                "message": f"Rate limit of {limit} requests per {self.period} seconds exceeded",
+                "path": scope["path"],
+                "correlationId": correlation_id,
+            },
+        )
+        response.raw_headers.extend(
+            [
+                (_HEADER_LIMIT, str(limit).encode()),
+                (_HEADER_REMAINING, b"0"),
+                (_HEADER_RESET, str(reset).encode()),
+                (_HEADER_POLICY, f"{limit};w={self.period}".encode()),
+                (_HEADER_RETRY_AFTER, str(reset).encode()),
+            ]
+        )
+        await response(scope, receive, send)
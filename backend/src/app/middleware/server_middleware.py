@@ -1,9 +1,14 @@
 import asyncio
+import fcntl
+import os
+import re
 import time
 from collections.abc import Awaitable, Callable
+from contextlib import contextmanager
 from contextvars import ContextVar
+from pathlib import Path
 
-from fastapi import Request, Response
+import pymongo
 from fastapi.responses import ORJSONResponse
 from nanoid import generate
 from prometheus_client import (
@@ -13,12 +18,20 @@ from prometheus_client import (
     Gauge,
     Histogram,
     generate_latest,
+    multiprocess,
 )
+from prometheus_client.mmap_dict import MmapedDict
 
+from app.utils.deadline import deadline_var
 from app.utils.logger import logger
+from app.utils.request_cost import RequestCost, request_cost_var
 
 # Context variable for correlation ID (thread-safe)
 correlation_id_var: ContextVar[str] = ContextVar("correlation_id", default="")
+# "METHOD /path" of the request being served, for diagnostics outside handlers
+request_path_var: ContextVar[str] = ContextVar("request_path", default="")
+# ASGI scope of the request being served; carries the matched route once routed
+request_scope_var: ContextVar[dict | None] = ContextVar("request_scope", default=None)
 
 # Prometheus metrics registry
 metrics_registry = CollectorRegistry()
@@ -42,14 +55,51 @@ http_request_duration_seconds = Histogram(
 http_requests_in_progress = Gauge(
     "http_requests_in_progress",
     "HTTP requests in progress",
+    # The route is only known once routing has run, so this is not per endpoint
+    ["method", "project"],
+    registry=metrics_registry,
+    multiprocess_mode="livesum",
+)
+
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+http_request_size_bytes = Histogram(
+    "http_request_size_bytes",
+    "HTTP request body size in bytes",
+    ["method", "endpoint", "project"],
+    buckets=_SIZE_BUCKETS,
+    registry=metrics_registry,
+)
+
+http_response_size_bytes = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size in bytes, as sent",
     ["method", "endpoint", "project"],
+    buckets=_SIZE_BUCKETS,
     registry=metrics_registry,
 )
 
 app_up = Gauge(
-    "app_up", "Application up status", ["project"], registry=metrics_registry
+    "app_up",
+    "Application up status",
+    ["project"],
+    registry=metrics_registry,
+    multiprocess_mode="livemax",
 )
 
+# Label value used once the endpoint label cap is reached
+OTHER_ENDPOINT = "__other__"
+
+
+def _is_object_id(part: str) -> bool:
+    if len(part) != 24:
+        return False
+    try:
+        int(part, 16)
+    except ValueError:
+        return False
+    return True
+
 
 def _normalize_path(path: str) -> str:
     """
@@ -60,11 +110,15 @@ def _normalize_path(path: str) -> str:
     if path in {"/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json"}:
         return path
 
-    # Simple normalization: replace UUIDs and numeric IDs
+    # Simple normalization: replace UUIDs, ObjectIds and numeric IDs
     parts = path.split("/")
     normalized = []
     for part in parts:
-        if part.isdigit() or (len(part) == 36 and part.count("-") == 4):  # UUID
+        if (
+            part.isdigit()
+            or (len(part) == 36 and part.count("-") == 4)  # UUID
+            or _is_object_id(part)
+        ):
             normalized.append("{id}")
         else:
             normalized.append(part)
@@ -72,36 +126,123 @@ def _normalize_path(path: str) -> str:
     return "/".join(normalized)
 
 
-async def correlation_middleware(request: Request, call_next: Callable) -> Response:
-    """Add correlation ID to requests for distributed tracing."""
-    # Check if correlation ID already exists (from upstream service)
-    correlation_id = request.headers.get("X-Correlation-ID") or generate(size=21)
+def route_template(scope: dict) -> str | None:
+    """Path template of the matched route, e.g. ``/api/v1/searches/{search_id}``."""
+    return getattr(scope.get("route"), "path_format", None)
 
-    correlation_id_var.set(correlation_id)
-    request.state.correlation_id = correlation_id
 
-    # Bind correlation_id to logger context for this request
-    with logger.contextualize(
-        correlation_id=correlation_id, path=request.url.path, method=request.method
-    ):
-        response = await call_next(request)
-        response.headers["X-Correlation-ID"] = correlation_id
-        return response
+class CorrelationIdMiddleware:
+    """Pure ASGI middleware that adds a correlation ID for distributed tracing."""
+
+    def __init__(self, app: Callable[[dict, Callable, Callable], Awaitable]):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """ASGI interface."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Check if correlation ID already exists (from upstream service)
+        correlation_id = ""
+        for key, value in scope["headers"]:
+            if key == b"x-correlation-id":
+                correlation_id = value.decode("latin-1")
+                break
+        correlation_id = correlation_id or generate(size=21)
+
+        correlation_id_var.set(correlation_id)
+        request_path_var.set(f"{scope['method']} {scope['path']}")
+        request_scope_var.set(scope)
+        # Exposed to handlers as request.state.correlation_id
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+        header = (b"x-correlation-id", correlation_id.encode("latin-1"))
+
+        async def send_wrapper(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        # Bind correlation_id to logger context for this request
+        with logger.contextualize(
+            correlation_id=correlation_id, path=scope["path"], method=scope["method"]
+        ):
+            await self.app(scope, receive, send_wrapper)
 
 
 class MetricsMiddleware:
-    """Pure ASGI middleware for Prometheus metrics."""
+    """
+    Pure ASGI middleware for Prometheus metrics.
+
+    Requests are labelled with the route template matched by the router (e.g.
+    ``/api/v1/searches/{search_id}``), so ids never reach label values. Distinct
+    endpoint labels are capped at ``max_endpoints``; label children are bound once
+    per (method, endpoint, status) and reused for every later request.
+
+    Also owns the per-request RequestCost accumulator and reports it in a
+    ``Server-Timing`` header. With ``server_timing_gated`` the header is only
+    added when the request sends ``X-Server-Timing``.
+    """
 
     def __init__(
         self,
         app: Callable[[dict, Callable, Callable], Awaitable],
         project_name: str = "langchain-fastapi",
+        max_endpoints: int = 200,
+        server_timing: bool = True,
+        server_timing_gated: bool = False,
+        timing_allow_origin: str | None = None,
     ):
         self.app = app
         self.project_name = project_name
+        self.max_endpoints = max_endpoints
+        self.server_timing = server_timing
+        self.server_timing_gated = server_timing_gated
+        self._timing_allow_origin = (
+            (b"timing-allow-origin", timing_allow_origin.encode("latin-1"))
+            if timing_allow_origin
+            else None
+        )
+        self._endpoints: set[str] = set()
+        self._children: dict[tuple[str, str, int], tuple] = {}
+        self._in_progress: dict[str, Gauge] = {}
         # Set app up status on creation
         app_up.labels(project=project_name).set(1)
 
+    def _endpoint(self, scope: dict) -> str:
+        endpoint = route_template(scope) or _normalize_path(scope["path"])
+        if endpoint not in self._endpoints:
+            if len(self._endpoints) >= self.max_endpoints:
+                return OTHER_ENDPOINT
+            self._endpoints.add(endpoint)
+        return endpoint
+
+    def _bound(self, method: str, endpoint: str, status_code: int) -> tuple:
+        key = (method, endpoint, status_code)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                http_requests_total.labels(
+                    method=method,
+                    endpoint=endpoint,
+                    status_code=status_code,
+                    project=self.project_name,
+                ),
+                http_request_duration_seconds.labels(
+                    method=method,
+                    endpoint=endpoint,
+                    status_code=status_code,
+                    project=self.project_name,
+                ),
+                http_request_size_bytes.labels(
+                    method=method, endpoint=endpoint, project=self.project_name
+                ),
+                http_response_size_bytes.labels(
+                    method=method, endpoint=endpoint, project=self.project_name
+                ),
+            )
+        return children
+
     async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
         """ASGI interface."""
         if scope["type"] != "http":
@@ -109,25 +250,43 @@ class MetricsMiddleware:
             return
 
         # Skip metrics endpoint to avoid infinite loop
-        path = scope["path"]
-        if path == "/metrics":
+        if scope["path"] == "/metrics":
             await self.app(scope, receive, send)
             return
 
         method = scope["method"]
-        endpoint = _normalize_path(path)
 
         # Track in-progress requests
-        http_requests_in_progress.labels(
-            method=method, endpoint=endpoint, project=self.project_name
-        ).inc()
+        in_progress = self._in_progress.get(method)
+        if in_progress is None:
+            in_progress = self._in_progress[method] = http_requests_in_progress.labels(
+                method=method, project=self.project_name
+            )
+        in_progress.inc()
 
         start_time = time.perf_counter()
         status_code = 500  # Default to 500 in case of exception
+        request_size = 0
+        response_size = 0
+
+        cost = None
+        if self.server_timing and (
+            not self.server_timing_gated
+            or any(key == b"x-server-timing" for key, _ in scope["headers"])
+        ):
+            cost = RequestCost()
+        cost_token = request_cost_var.set(cost)
+
+        async def receive_wrapper() -> dict:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
 
         async def send_wrapper(message: dict) -> None:
-            """Wrapper to capture status code and add headers."""
-            nonlocal status_code
+            """Wrapper to capture status code, body size and add headers."""
+            nonlocal status_code, response_size
 
             if message["type"] == "http.response.start":
                 status_code = message["status"]
@@ -136,72 +295,96 @@ class MetricsMiddleware:
                 process_time = time.perf_counter() - start_time
                 headers = list(message.get("headers", []))
                 headers.append((b"x-process-time", f"{process_time:.3f}".encode()))
+                if cost is not None:
+                    headers.append((b"server-timing", cost.server_timing(process_time)))
+                    if self._timing_allow_origin:
+                        headers.append(self._timing_allow_origin)
                 message["headers"] = headers
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
 
             await send(message)
 
         try:
-            await self.app(scope, receive, send_wrapper)
+            await self.app(scope, receive_wrapper, send_wrapper)
         finally:
             duration = time.perf_counter() - start_time
 
-            # Record metrics
-            http_requests_total.labels(
-                method=method,
-                endpoint=endpoint,
-                status_code=status_code,
-                project=self.project_name,
-            ).inc()
-
-            http_request_duration_seconds.labels(
-                method=method,
-                endpoint=endpoint,
-                status_code=status_code,
-                project=self.project_name,
-            ).observe(duration)
+            # Record metrics (routing has filled in scope["route"] by now)
+            requests, durations, request_sizes, response_sizes = self._bound(
+                method, self._endpoint(scope), status_code
+            )
+            requests.inc()
+            durations.observe(duration)
+            request_sizes.observe(request_size)
+            response_sizes.observe(response_size)
 
             # Decrement in-progress
-            http_requests_in_progress.labels(
-                method=method, endpoint=endpoint, project=self.project_name
-            ).dec()
+            in_progress.dec()
+            request_cost_var.reset(cost_token)
 
 
 class TimeoutMiddleware:
-    """Pure ASGI middleware for request timeouts."""
+    """
+    Pure ASGI middleware for request timeouts.
+
+    Each request gets a time budget: the longest matching prefix in
+    ``route_budgets`` or ``timeout_seconds``. The budget is published as a
+    deadline (``app.utils.deadline``) that Redis and Mapbox calls derive their
+    timeouts from, and as a ``pymongo.timeout`` scope so every MongoDB operation
+    gets a matching maxTimeMS. Paths under ``exempt_prefixes`` (e.g. long-running
+    admin profiling) are not timed out.
+    """
 
     def __init__(
         self,
         app: Callable[[dict, Callable, Callable], Awaitable],
         timeout_seconds: int = 30,
+        exempt_prefixes: tuple[str, ...] = (),
+        route_budgets: dict[str, float] | None = None,
     ):
         self.app = app
         self.timeout_seconds = timeout_seconds
+        self.exempt_prefixes = exempt_prefixes
+        # Longest prefix first, so the most specific budget wins
+        self.route_budgets = sorted(
+            (route_budgets or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self._budgets: dict[str, float] = {}
+
+    def _budget(self, path: str) -> float:
+        budget = self._budgets.get(path)
+        if budget is None:
+            budget = next(
+                (seconds for prefix, seconds in self.route_budgets if path.startswith(prefix)),
+                self.timeout_seconds,
+            )
+            # Arbitrary (404) paths must not grow the cache without bound
+            if len(self._budgets) < 1024:
+                self._budgets[path] = budget
+        return budget
 
     async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
         """ASGI interface."""
-        if scope["type"] != "http":
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
             await self.app(scope, receive, send)
             return
 
+        budget = self._budget(scope["path"])
+        token = deadline_var.set(time.monotonic() + budget)
         try:
-            await asyncio.wait_for(
-                self.app(scope, receive, send),
-                timeout=self.timeout_seconds,
-            )
+            with pymongo.timeout(budget):
+                await asyncio.wait_for(self.app(scope, receive, send), timeout=budget)
         except asyncio.TimeoutError:
-            # Get correlation ID from scope if available
-            correlation_id = "unknown"
-            for key, value in scope.get("headers", []):
-                if key == b"x-correlation-id":
-                    correlation_id = value.decode()
-                    break
+            # Set by CorrelationIdMiddleware further out in the stack
+            correlation_id = correlation_id_var.get() or "unknown"
 
             path = scope["path"]
             method = scope["method"]
 
             logger.error(
                 f"[{correlation_id}] Request timeout: {method} {path} "
-                f"exceeded {self.timeout_seconds}s"
+                f"exceeded {budget:g}s"
             )
 
             # Send timeout response
@@ -209,36 +392,175 @@ class TimeoutMiddleware:
                 status_code=408,
                 content={
                     "error": "Request Timeout",
-                    "message": f"Request took longer than {self.timeout_seconds} seconds",
+                    "message": f"Request took longer than {budget:g} seconds",
                     "path": path,
                     "correlationId": correlation_id,
                 },
             )
 
             await response(scope, receive, send)
+        finally:
+            deadline_var.reset(token)
+
+
+class SecurityHeadersMiddleware:
+    """Pure ASGI middleware that adds security headers to all responses."""
+
+    # Security headers (OWASP recommended), encoded once at import
+    HEADERS: tuple[tuple[bytes, bytes], ...] = (
+        (b"x-content-type-options", b"nosniff"),
+        (b"x-frame-options", b"DENY"),
+        (b"x-xss-protection", b"1; mode=block"),
+        (b"strict-transport-security", b"max-age=31536000; includeSubDomains; preload"),
+        (b"referrer-policy", b"strict-origin-when-cross-origin"),
+        (
+            b"permissions-policy",
+            b"geolocation=(), microphone=(), camera=(), payment=(), usb=(), magnetometer=()",
+        ),
+    )
 
+    def __init__(self, app: Callable[[dict, Callable, Callable], Awaitable]):
+        self.app = app
+        self._names = frozenset(name for name, _ in self.HEADERS)
 
-async def create_security_headers_middleware(
-    request: Request, call_next: Callable
-) -> Response:
-    """Add security headers to all responses."""
-    response = await call_next(request)
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """ASGI interface."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    # Security headers (OWASP recommended)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = (
-        "max-age=31536000; includeSubDomains; preload"
-    )
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Permissions-Policy"] = (
-        "geolocation=(), microphone=(), camera=(), payment=(), usb=(), magnetometer=()"
-    )
+        async def send_wrapper(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                # Override any handler-set values, matching header assignment semantics
+                headers = [
+                    h for h in message.get("headers", []) if h[0].lower() not in self._names
+                ]
+                headers.extend(self.HEADERS)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
 
-    return response
+
+# Per-worker metric files: counter_<pid>.db, histogram_<pid>.db, gauge_<mode>_<pid>.db
+_WORKER_FILE = re.compile(r"^(counter|histogram|summary|gauge_[a-z]+)_(\d+)\.db$")
+
+
+def _newest(current: tuple[float, float], new: tuple[float, float]) -> tuple:
+    return new if new[1] >= current[1] else current
+
+
+# How an exited worker's samples fold into the aggregate of their file kind.
+# "all" gauges are per-pid series and live* gauges only describe running
+# workers, so both are dropped with the worker.
+_FOLD = {
+    "counter": lambda a, b: (a[0] + b[0], 0.0),
+    "histogram": lambda a, b: (a[0] + b[0], 0.0),
+    "summary": lambda a, b: (a[0] + b[0], 0.0),
+    "gauge_sum": lambda a, b: (a[0] + b[0], 0.0),
+    "gauge_max": lambda a, b: max(a, b),
+    "gauge_min": lambda a, b: min(a, b),
+    "gauge_mostrecent": _newest,
+}
+
+
+@contextmanager
+def _compaction_lock(directory: Path, *, shared: bool = False):
+    """
+    Exclusive for compaction; shared for scrapes, which must not see a worker's
+    samples both in its own file and in the aggregate (or in neither).
+    """
+    with open(directory / ".compaction.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _fold_into_aggregate(path: Path, kind: str) -> None:
+    aggregate = path.with_name(f"{kind}_aggregate.db")
+    values: dict[str, tuple[float, float]] = {}
+    if aggregate.exists():
+        for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(aggregate):
+            values[key] = (value, timestamp)
+    fold = _FOLD[kind]
+    for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(path):
+        current = values.get(key)
+        values[key] = (value, timestamp) if current is None else fold(current, (value, timestamp))
+
+    # Written aside and swapped in, so the aggregate is never seen half-written
+    staging = aggregate.with_suffix(".staging")
+    staging.unlink(missing_ok=True)
+    merged = MmapedDict(str(staging))
+    try:
+        for key, (value, timestamp) in values.items():
+            merged.write_value(key, value, timestamp)
+    finally:
+        merged.close()
+    os.replace(staging, aggregate)
+
+
+def compact_dead_worker(pid: int, directory: str | None = None) -> None:
+    """
+    Fold an exited worker's metric files into per-kind aggregate files.
+
+    Keeps the directory (and every scrape, which reads all of it) proportional
+    to the number of live workers rather than to every worker ever started,
+    which matters once workers are recycled.
+    """
+    directory = directory or os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return
+    root = Path(directory)
+    with _compaction_lock(root):
+        for path in root.glob(f"*_{pid}.db"):
+            match = _WORKER_FILE.match(path.name)
+            if not match or int(match.group(2)) != pid:
+                continue
+            kind = match.group(1)
+            if kind in _FOLD:
+                _fold_into_aggregate(path, kind)
+            path.unlink(missing_ok=True)
+
+
+def _prune_dead_workers(directory: str) -> None:
+    """Compact files of workers that exited without the supervisor doing it."""
+    pids = set()
+    for path in Path(directory).glob("*.db"):
+        match = _WORKER_FILE.match(path.name)
+        if match:
+            pids.add(int(match.group(2)))
+    for pid in pids - {os.getpid()}:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            compact_dead_worker(pid, directory)
+        except PermissionError:
+            pass
 
 
 def get_metrics() -> tuple[bytes, str]:
-    """Get Prometheus metrics in text format."""
-    return generate_latest(metrics_registry), CONTENT_TYPE_LATEST
+    """
+    Get Prometheus metrics in text format.
+
+    With PROMETHEUS_MULTIPROC_DIR set (multi-worker production), values are read
+    from every worker's mmap files so a scrape reflects the whole fleet rather
+    than whichever worker answered it.
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return generate_latest(metrics_registry), CONTENT_TYPE_LATEST
+
+    _prune_dead_workers(directory)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=directory)
+    with _compaction_lock(Path(directory), shared=True):
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid: int | None = None) -> None:
+    """Release this (or another) worker's live gauges in multiprocess mode."""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        multiprocess.mark_process_dead(pid or os.getpid(), directory)
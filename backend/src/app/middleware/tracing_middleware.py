@@ -0,0 +1,66 @@
+"""Server spans for incoming HTTP requests."""
+
+from collections.abc import Awaitable, Callable
+
+from app.middleware.server_middleware import correlation_id_var
+from app.utils import tracing
+from app.utils.logger import logger
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware that opens a server span per HTTP request.
+
+    Continues W3C trace context from incoming headers, links the span to the
+    request's correlation id (span attribute, ``X-Trace-ID`` response header and
+    ``trace_id`` in log records), and renames the span to the matched route
+    template once routing has run. Must sit inside CorrelationIdMiddleware.
+    """
+
+    def __init__(self, app: Callable[[dict, Callable, Callable], Awaitable]):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """ASGI interface."""
+        tracer = tracing.get_tracer()
+        if tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        carrier = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        parent = tracing.propagate.extract(carrier)
+
+        with tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=parent,
+            kind=tracing.SpanKind.SERVER,
+            attributes={
+                "http.request.method": method,
+                "url.path": scope["path"],
+                "url.scheme": scope.get("scheme", "http"),
+                "correlation_id": correlation_id_var.get(),
+            },
+        ) as span:
+            trace_id = tracing.current_trace_id()
+            trace_header = (b"x-trace-id", trace_id.encode()) if trace_id else None
+
+            async def send_wrapper(message: dict) -> None:
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    span.set_attribute("http.response.status_code", status_code)
+                    if status_code >= 500:
+                        tracing.mark_error(span, description=f"HTTP {status_code}")
+                    if trace_header:
+                        message["headers"] = [*message.get("headers", []), trace_header]
+                await send(message)
+
+            try:
+                with logger.contextualize(trace_id=trace_id):
+                    await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                template = getattr(route, "path_format", None)
+                if template:
+                    span.update_name(f"{method} {template}")
+                    span.set_attribute("http.route", template)
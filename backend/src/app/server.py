@@ -1,31 +1,77 @@
 """Server entry point for running the application."""
 
+import os
+import shutil
+from pathlib import Path
+
 import uvicorn
 
-from app.config.settings import get_settings
+from app.config.settings import Settings, get_settings
 from app.lifecycle.signals import setup_signal_handlers
-from app.main import app
+from app.lifecycle.supervisor import WorkerSupervisor
 from app.utils.logger import logger
 
 
-def main() -> None:
-    """Run the FastAPI application with uvicorn."""
-    setup_signal_handlers()
-    settings = get_settings()
+def prepare_multiprocess_metrics(directory: Path) -> None:
+    """
+    Point every worker at a fresh shared Prometheus metrics directory.
+
+    Must run before workers start: prometheus_client picks its value storage when
+    first imported, and workers inherit the environment from this process.
+    """
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(directory)
 
-    logger.info(f"Starting server in {settings.ENVIRONMENT} mode...")
 
-    uvicorn.run(
-        "app.main:app",  # Import string for hot reload
+def production_config(settings: Settings) -> uvicorn.Config:
+    """uvicorn settings for production: uvloop, httptools and tuned sockets."""
+    return uvicorn.Config(
+        "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.ENVIRONMENT != "production",
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
         log_config=None,  # Use custom logging
         access_log=False,  # Custom access logging via middleware
-        workers=settings.WORKERS if settings.ENVIRONMENT == "production" else 1,
     )
 
 
+def main() -> None:
+    """Run the FastAPI application with uvicorn."""
+    settings = get_settings()
+
+    logger.info(f"Starting server in {settings.ENVIRONMENT} mode...")
+
+    if settings.ENVIRONMENT != "production":
+        setup_signal_handlers()
+        uvicorn.run(
+            "app.main:app",  # Import string for hot reload
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=True,
+            log_config=None,  # Use custom logging
+            access_log=False,  # Custom access logging via middleware
+        )
+        return
+
+    # Workers are recycled, so metrics always go through the shared directory
+    # to survive worker restarts and aggregate across workers
+    prepare_multiprocess_metrics(settings.PROMETHEUS_MULTIPROC_DIR)
+    WorkerSupervisor(
+        production_config(settings),
+        workers=settings.WORKERS,
+        max_requests=settings.WORKER_MAX_REQUESTS,
+        max_requests_jitter=settings.WORKER_MAX_REQUESTS_JITTER,
+        max_rss_mb=settings.WORKER_MAX_RSS_MB,
+        check_interval=settings.WORKER_RSS_CHECK_INTERVAL_SECONDS,
+        graceful_timeout=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        cpu_affinity=settings.WORKER_CPU_AFFINITY,
+    ).run()
+
+
 if __name__ == "__main__":
     main()
-
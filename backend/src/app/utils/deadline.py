@@ -0,0 +1,55 @@
+"""Per-request deadlines propagated to downstream calls."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.utils.exceptions import APIException
+
+# Absolute time.monotonic() deadline of the current request, set by TimeoutMiddleware
+deadline_var: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(APIException):
+    """The request's time budget ran out before a downstream call could be made."""
+
+    def __init__(self, operation: str = "request"):
+        super().__init__(
+            status_code=504,
+            message=f"Request deadline exceeded before {operation}",
+            name="DeadlineExceeded",
+        )
+
+
+def remaining() -> float | None:
+    """Seconds left until the current deadline, or None outside a request."""
+    deadline = deadline_var.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def timeout_for(default: float, operation: str = "request") -> float:
+    """
+    Timeout for a downstream call: ``default`` capped by the remaining budget.
+
+    Raises DeadlineExceeded when the budget is already spent, so no work is
+    started that the client will never see.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded(operation)
+    return min(default, left)
+
+
+@contextmanager
+def detached():
+    """
+    Lift the deadline for short bookkeeping that must finish even when the
+    request's budget is spent (releasing locks, storing a computed result).
+    """
+    token = deadline_var.set(None)
+    try:
+        yield
+    finally:
+        deadline_var.reset(token)
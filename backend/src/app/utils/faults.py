@@ -0,0 +1,124 @@
+"""Fault and latency injection for downstream dependencies (off by default)."""
+
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Literal
+
+from prometheus_client import Counter
+from pydantic import BaseModel, Field, model_validator
+
+from app.middleware.server_middleware import metrics_registry, request_path_var
+
+FaultTarget = Literal["mapbox", "mongo", "redis"]
+FaultOutcome = Literal["latency", "error", "timeout"]
+
+faults_injected_total = Counter(
+    "dependency_faults_injected_total",
+    "Downstream calls affected by fault injection",
+    ["target", "outcome"],
+    registry=metrics_registry,
+)
+
+
+class FaultRule(BaseModel):
+    """
+    What to do to a share of the calls to one dependency.
+
+    ``percentage`` of the calls to ``target`` (made while serving a path that
+    starts with ``route``, or any call when unset) get extra latency drawn from
+    ``distribution``: ``fixed`` adds ``latency_ms``, ``uniform`` adds
+    ``latency_ms`` plus up to ``jitter_ms``, ``exponential`` adds ``latency_ms``
+    plus an exponential tail with mean ``jitter_ms``. Of those calls,
+    ``error_percentage`` then fail and ``timeout_percentage`` hang until the
+    call's own timeout and fail as a timeout.
+    """
+
+    target: FaultTarget
+    route: str | None = None
+    percentage: float = Field(default=100.0, ge=0, le=100)
+    latency_ms: float = Field(default=0.0, ge=0)
+    jitter_ms: float = Field(default=0.0, ge=0)
+    distribution: Literal["fixed", "uniform", "exponential"] = "fixed"
+    error_percentage: float = Field(default=0.0, ge=0, le=100)
+    timeout_percentage: float = Field(default=0.0, ge=0, le=100)
+
+    @model_validator(mode="after")
+    def _check(self) -> "FaultRule":
+        if self.error_percentage + self.timeout_percentage > 100:
+            raise ValueError("error_percentage + timeout_percentage must not exceed 100")
+        if self.target == "mongo" and self.error_percentage:
+            # Injected through pymongo's command listener, which cannot fail a command
+            raise ValueError("mongo rules support latency and timeouts, not errors")
+        return self
+
+    def latency(self, rng: random.Random) -> float:
+        """Injected latency in seconds."""
+        extra = 0.0
+        if self.distribution == "uniform":
+            extra = rng.uniform(0, self.jitter_ms)
+        elif self.distribution == "exponential" and self.jitter_ms:
+            extra = rng.expovariate(1 / self.jitter_ms)
+        return (self.latency_ms + extra) / 1000
+
+
+@dataclass(frozen=True, slots=True)
+class Fault:
+    """The fault chosen for one call; applied by the dependency's client."""
+
+    target: str
+    delay: float
+    outcome: FaultOutcome
+
+    def hang_for(self, timeout: float | None) -> float:
+        """Seconds to wait: the latency, or for a timeout the call's full timeout."""
+        if self.outcome == "timeout" and timeout is not None:
+            return max(self.delay, timeout)
+        return self.delay
+
+    async def wait(self, timeout: float | None = None) -> None:
+        delay = self.hang_for(timeout)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class FaultInjector:
+    """
+    Decides per downstream call whether to inject a fault.
+
+    Rules are checked in order; the first whose target and route match decides
+    the call. State is per worker process. When disabled, ``pick`` is a single
+    attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.rules: list[FaultRule] = []
+        self._rng = random.Random()
+
+    def configure(self, *, enabled: bool, rules: list[FaultRule]) -> None:
+        self.rules = list(rules)
+        self.enabled = enabled
+
+    def pick(self, target: str) -> Fault | None:
+        if not self.enabled:
+            return None
+        path = request_path_var.get() or ""
+        for rule in self.rules:
+            if rule.target != target or (rule.route and not path.startswith(rule.route)):
+                continue
+            if self._rng.random() * 100 >= rule.percentage:
+                return None
+            roll = self._rng.random() * 100
+            if roll < rule.timeout_percentage:
+                outcome = "timeout"
+            elif roll < rule.timeout_percentage + rule.error_percentage:
+                outcome = "error"
+            else:
+                outcome = "latency"
+            faults_injected_total.labels(target=target, outcome=outcome).inc()
+            return Fault(target, rule.latency(self._rng), outcome)
+        return None
+
+
+fault_injector = FaultInjector()
@@ -12,7 +12,6 @@ def console_format(record: dict[str, Any]) -> str:
     level = record["level"].name
     time_utc = record["time"].astimezone(timezone.utc)
     time = time_utc.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
-    message = record["message"]
 
     # Color mapping
     colors = {
@@ -25,8 +24,8 @@ def console_format(record: dict[str, Any]) -> str:
     color = colors.get(level, "<white>")
     end_color = "</>"
 
-    # Base format
-    fmt = f"{color}{level}{end_color} <dim>[{time}]</dim> {message}"
+    # Base format; the message is a field so braces and tags in it stay literal
+    fmt = f"{color}{level}{end_color} <dim>[{time}]</dim> {{message}}"
 
     # Add extra data (filter out internal loguru keys)
     extra_data = {k: v for k, v in record["extra"].items() if not k.startswith("_")}
@@ -65,8 +64,11 @@ def setup_logging() -> None:
         diagnose=settings.LOG_DIAGNOSE,
     )
 
-    # File handler with JSON serialization
-    settings.LOG_DIR.mkdir(parents=True, exist_ok=True)
+    if not settings.LOG_FILE_ENABLED:
+        return
+
+    # File handler with JSON serialization. Opened (and its directory created)
+    # on the first record rather than at import, keeping it off the cold start.
     loguru_logger.add(
         settings.LOG_DIR / "app_{time:YYYY-MM-DD}.log",
         format="{message}",
@@ -77,6 +79,7 @@ def setup_logging() -> None:
         serialize=True,
         backtrace=settings.LOG_BACKTRACE,
         diagnose=settings.LOG_DIAGNOSE,
+        delay=True,
     )
 
 
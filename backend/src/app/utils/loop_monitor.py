@@ -0,0 +1,182 @@
+"""Event-loop lag sampling and slow-callback detection."""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+from fastapi import Request
+from prometheus_client import Counter, Histogram
+
+from app.middleware.server_middleware import (
+    OTHER_ENDPOINT,
+    correlation_id_var,
+    metrics_registry,
+    request_path_var,
+    request_scope_var,
+    route_template,
+)
+from app.utils.logger import logger
+
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between a scheduled event-loop wakeup and when it actually ran",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=metrics_registry,
+)
+
+event_loop_slow_callbacks_total = Counter(
+    "event_loop_slow_callbacks_total",
+    "Callbacks that held the event loop longer than SLOW_CALLBACK_THRESHOLD_MS",
+    ["route"],
+    registry=metrics_registry,
+)
+
+# Stack frames kept per report; the innermost frames are the interesting ones
+_STACK_LIMIT = 30
+# A loop blocked this long is reported immediately instead of when it recovers
+_HANG_REPORT_SECONDS = 5.0
+# Distinct route labels on event_loop_slow_callbacks_total; the rest go to __other__
+_MAX_ROUTE_LABELS = 200
+
+
+class LoopMonitor:
+    """
+    Measures event-loop responsiveness for the running worker.
+
+    Two probes run while enabled:
+
+    - a lag sampler task that sleeps ``interval`` and observes how late it woke
+      up into ``event_loop_lag_seconds``;
+    - a watchdog thread that posts a heartbeat onto the loop and, when it is not
+      processed within ``threshold`` seconds, samples the loop thread's stack and
+      the current task's correlation id and route, then logs the stall with its
+      total duration once the loop recovers.
+
+    Both can be switched on and off (and the threshold changed) at runtime.
+    """
+
+    def __init__(self, *, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._lag_task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._route_labels: set[str] = set()
+        self.stalls = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._lag_task is not None
+
+    def start(self) -> None:
+        """Start both probes; must be called from the event loop thread."""
+        if self.enabled:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._lag_task = asyncio.create_task(self._sample_lag(), name="loop-lag-sampler")
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if not self.enabled:
+            return
+        self._stop.set()
+        self._lag_task.cancel()
+        await asyncio.gather(self._lag_task, return_exceptions=True)
+        self._lag_task = None
+        await asyncio.to_thread(self._watchdog.join, self.threshold + self.interval)
+        self._watchdog = None
+
+    async def _sample_lag(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            event_loop_lag_seconds.observe(max(time.perf_counter() - expected, 0.0))
+
+    def _watch(self) -> None:
+        """Watchdog thread body."""
+        while not self._stop.wait(self.interval):
+            beat = threading.Event()
+            sent = time.perf_counter()
+            try:
+                self._loop.call_soon_threadsafe(beat.set)
+            except RuntimeError:  # loop closed
+                return
+            if beat.wait(self.threshold):
+                continue
+
+            # The loop is stuck: sample what it is running right now
+            sample = self._sample_loop()
+            hung = not beat.wait(max(_HANG_REPORT_SECONDS - self.threshold, 0.0))
+            if hung:
+                self._report(time.perf_counter() - sent, *sample, hung)
+            while not beat.wait(self.interval):
+                if self._stop.is_set():
+                    return
+            if not hung:
+                self._report(time.perf_counter() - sent, *sample, hung)
+
+    def _route_label(self, scope: dict | None) -> str:
+        """
+        "METHOD /template" of the matched route, like the HTTP metrics: raw paths
+        (404s, scanners) and routes past the cap share the ``__other__`` label.
+        """
+        template = route_template(scope) if scope else None
+        if template is None:
+            return OTHER_ENDPOINT
+        label = f"{scope['method']} {template}"
+        if label not in self._route_labels:
+            if len(self._route_labels) >= _MAX_ROUTE_LABELS:
+                return OTHER_ENDPOINT
+            self._route_labels.add(label)
+        return label
+
+    def _sample_loop(self) -> tuple[str, str, str, str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame, limit=_STACK_LIMIT)) if frame else ""
+
+        # Reading another thread's current task is a plain dict lookup
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            return stack, "unknown", "unknown", OTHER_ENDPOINT
+        context = task.get_context()
+        return (
+            stack,
+            context.get(correlation_id_var) or "unknown",
+            context.get(request_path_var) or "unknown",
+            self._route_label(context.get(request_scope_var)),
+        )
+
+    def _report(
+        self,
+        duration: float,
+        stack: str,
+        correlation_id: str,
+        route: str,
+        label: str,
+        hung: bool,
+    ) -> None:
+        self.stalls += 1
+        event_loop_slow_callbacks_total.labels(route=label).inc()
+        state = "is blocked" if hung else "was blocked"
+        # loguru formats the message with the kwargs; source lines and paths carry braces
+        message = f"[{correlation_id}] Event loop {state} for {duration * 1000:.0f}ms ({route})\n{stack}"
+        logger.warning(
+            message.replace("{", "{{").replace("}", "}}"),
+            correlation_id=correlation_id,
+            route=route,
+            duration_ms=round(duration * 1000, 1),
+            hung=hung,
+        )
+
+
+def get_loop_monitor(request: Request) -> LoopMonitor:
+    return request.app.state.loop_monitor
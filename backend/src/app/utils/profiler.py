@@ -0,0 +1,240 @@
+"""Statistical sampling profiler with speedscope and collapsed-stack output."""
+
+import asyncio
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any
+
+import orjson
+from redis.asyncio import Redis
+
+# Innermost frames in these modules mean the thread is idle (waiting on a lock,
+# queue or selector); such samples are dropped so profiles show real work.
+_IDLE_MODULES = ("threading.py", "queue.py", "selectors.py", "concurrent/futures/thread.py")
+
+_Frame = tuple[str, str, int]  # (qualified name, file, first line)
+
+
+def _frame_key(frame) -> _Frame:
+    code = frame.f_code
+    return (code.co_qualname, code.co_filename, code.co_firstlineno)
+
+
+def _stack(frame) -> tuple[_Frame, ...]:
+    """Stack of ``frame``, outermost first."""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_key(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class SamplingProfiler:
+    """
+    Samples thread stacks from a background thread every ``interval`` seconds.
+
+    By default every thread of the worker is sampled, each under a synthetic
+    root frame named after the thread. Passing ``thread_id`` restricts sampling
+    to one thread; adding ``task`` (with its ``loop``) keeps only samples taken
+    while that task is running, which profiles a single request on the event
+    loop without the requests interleaved with it.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        *,
+        thread_id: int | None = None,
+        task: asyncio.Task | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.task = task
+        self.loop = loop
+        self.samples: Counter[tuple[_Frame, ...]] = Counter()
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            if self.task is not None and asyncio.current_task(self.loop) is not self.task:
+                continue
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_id and thread_id != self.thread_id):
+                    continue
+                if frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                root = (f"thread: {names.get(thread_id, thread_id)}", "", 0)
+                self.samples[(root, *_stack(frame))] += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format, as consumed by flamegraph.pl."""
+        return "".join(
+            ";".join(name for name, _, _ in stack) + f" {count}\n"
+            for stack, count in self.samples.most_common()
+        )
+
+    def speedscope(self, name: str, allocations: "AllocationTracker | None" = None) -> dict:
+        """A speedscope file; allocation tracking adds a second, byte-weighted profile."""
+        frames: list[dict[str, Any]] = []
+        index: dict[_Frame, int] = {}
+
+        def frame_ids(stack) -> list[int]:
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    func, file, line = frame
+                    frames.append({"name": func, "file": file, "line": line} if file else {"name": func})
+                ids.append(index[frame])
+            return ids
+
+        interval_ms = self.interval * 1000
+        samples = [frame_ids(stack) for stack in self.samples]
+        weights = [count * interval_ms for count in self.samples.values()]
+        profiles = [
+            {
+                "type": "sampled",
+                "name": f"{name} (cpu)",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ]
+        if allocations is not None:
+            stacks = allocations.stacks()
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": f"{name} (allocated bytes)",
+                    "unit": "bytes",
+                    "startValue": 0,
+                    "endValue": sum(stacks.values()),
+                    "samples": [frame_ids(stack) for stack in stacks],
+                    "weights": list(stacks.values()),
+                }
+            )
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "shipthis",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+class AllocationTracker:
+    """
+    Net allocations made while active, via tracemalloc.
+
+    tracemalloc slows allocation-heavy code noticeably, so it only runs for the
+    duration of a profile and is left alone if something else already started it.
+    """
+
+    def __init__(self, nframes: int = 25):
+        self.nframes = nframes
+        self._owns_tracing = False
+        self._before: tracemalloc.Snapshot | None = None
+        self._after: tracemalloc.Snapshot | None = None
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self._owns_tracing = True
+        self._before = tracemalloc.take_snapshot()
+
+    def stop(self) -> None:
+        self._after = tracemalloc.take_snapshot()
+        if self._owns_tracing:
+            tracemalloc.stop()
+
+    def stacks(self, limit: int = 500) -> dict[tuple[_Frame, ...], int]:
+        """Largest net-allocating tracebacks, outermost frame first."""
+        stats = self._after.compare_to(self._before, "traceback")
+        stacks: dict[tuple[_Frame, ...], int] = {}
+        for stat in sorted(stats, key=lambda s: s.size_diff, reverse=True)[:limit]:
+            if stat.size_diff <= 0:
+                break
+            stack = tuple(
+                (f"{frame.filename}:{frame.lineno}", frame.filename, frame.lineno)
+                for frame in stat.traceback  # oldest frame first
+            )
+            stacks[stack] = stacks.get(stack, 0) + stat.size_diff
+        return stacks
+
+
+class ProfileStore:
+    """
+    Per-request profiles, rendered once and kept in Redis for ``ttl`` seconds.
+
+    Under the pre-fork supervisor the admin request fetching a profile rarely
+    reaches the worker that recorded it, so profiles are shared through Redis
+    instead of worker memory. Both formats are rendered when stored, since the
+    sampler and tracemalloc snapshots cannot be shipped between workers.
+    """
+
+    def __init__(self, ttl: int = 900):
+        self.ttl = ttl
+
+    @staticmethod
+    def key(profile_id: str) -> str:
+        return f"profile:{profile_id}"
+
+    @staticmethod
+    def render(
+        name: str, profiler: SamplingProfiler, allocations: AllocationTracker | None = None
+    ) -> dict[str, str]:
+        return {
+            "name": name,
+            "speedscope": orjson.dumps(profiler.speedscope(name, allocations)).decode(),
+            "collapsed": profiler.collapsed(),
+        }
+
+    async def add(
+        self,
+        redis: Redis,
+        profile_id: str,
+        name: str,
+        profiler: SamplingProfiler,
+        allocations: AllocationTracker | None = None,
+    ) -> None:
+        # Walking the samples and comparing tracemalloc snapshots can take a while
+        rendered = await asyncio.to_thread(self.render, name, profiler, allocations)
+        key = self.key(profile_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=rendered)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def get(self, redis: Redis, profile_id: str, fmt: str) -> tuple[str, str] | None:
+        """``(name, body)`` of the profile in format ``fmt``, or None once expired."""
+        name, body = await redis.hmget(self.key(profile_id), ["name", fmt])
+        return None if body is None else (name, body)
+
+
+profile_store = ProfileStore()
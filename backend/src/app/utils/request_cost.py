@@ -0,0 +1,80 @@
+"""Per-request cost accounting, reported through the Server-Timing header."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.responses import ORJSONResponse
+
+# Set by MetricsMiddleware for the lifetime of each request. The accumulator is a
+# mutable object, so copies of the context (tasks, executor threads) share it.
+request_cost_var: ContextVar["RequestCost | None"] = ContextVar("request_cost", default=None)
+
+
+class RequestCost:
+    """Time, call count and bytes spent per category (auth, mongo, redis, ...)."""
+
+    __slots__ = ("durations", "calls", "sizes")
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self.sizes: dict[str, int] = {}
+
+    def record(self, category: str, seconds: float, nbytes: int = 0) -> None:
+        self.durations[category] = self.durations.get(category, 0.0) + seconds
+        self.calls[category] = self.calls.get(category, 0) + 1
+        if nbytes:
+            self.sizes[category] = self.sizes.get(category, 0) + nbytes
+
+    def server_timing(self, total_seconds: float) -> bytes:
+        """Render as a Server-Timing header value, e.g. ``mongo;dur=3.1;desc="2 calls"``."""
+        metrics = []
+        for category, seconds in self.durations.items():
+            calls = self.calls[category]
+            desc = f"{calls} call" if calls == 1 else f"{calls} calls"
+            nbytes = self.sizes.get(category)
+            if nbytes:
+                desc += f", {nbytes} B"
+            metrics.append(f'{category};dur={seconds * 1000:.1f};desc="{desc}"')
+        metrics.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(metrics).encode("latin-1")
+
+
+def record_cost(category: str, seconds: float, nbytes: int = 0) -> None:
+    """Add to the current request's cost; a no-op outside a request."""
+    cost = request_cost_var.get()
+    if cost is not None:
+        cost.record(category, seconds, nbytes)
+
+
+@contextmanager
+def track_cost(category: str):
+    """
+    Time the enclosed block into the current request's cost.
+
+    Time recorded under other categories inside the block (a Redis or Mongo
+    call) is left out, so categories never overlap in the breakdown.
+    """
+    cost = request_cost_var.get()
+    if cost is None:
+        yield
+        return
+    nested = sum(cost.durations.values())
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = sum(cost.durations.values()) - nested
+        cost.record(category, max(elapsed - nested, 0.0))
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that accounts its rendering time as ``serialize``."""
+
+    def render(self, content) -> bytes:
+        start = time.perf_counter()
+        body = super().render(content)
+        record_cost("serialize", time.perf_counter() - start, len(body))
+        return body
@@ -0,0 +1,58 @@
+"""Startup phase timing for cold-start measurement."""
+
+import time
+from contextlib import contextmanager
+
+import psutil
+from prometheus_client import Gauge
+
+from app.middleware.server_middleware import metrics_registry
+
+app_startup_phase_seconds = Gauge(
+    "app_startup_phase_seconds",
+    "Duration of each application startup phase in seconds",
+    ["phase"],
+    registry=metrics_registry,
+    multiprocess_mode="liveall",
+)
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase took.
+
+    Phases may overlap (concurrent connection setup), so their sum can exceed
+    the wall-clock total. ``since_process_start`` includes interpreter start-up
+    and imports, i.e. the full cold start as seen by the platform.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.phases[name] = duration
+            app_startup_phase_seconds.labels(phase=name).set(duration)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the lifespan started."""
+        return time.perf_counter() - self.started
+
+    @staticmethod
+    def since_process_start() -> float:
+        return time.time() - psutil.Process().create_time()
+
+    def report(self) -> dict[str, float]:
+        """Phase durations in milliseconds, plus lifespan and process totals."""
+        report = {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()}
+        report["lifespan"] = round(self.elapsed * 1000, 1)
+        report["process"] = round(self.since_process_start() * 1000, 1)
+        app_startup_phase_seconds.labels(phase="lifespan").set(self.elapsed)
+        return report
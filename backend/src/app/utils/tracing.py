@@ -0,0 +1,142 @@
+"""OpenTelemetry tracing setup and span helpers.
+
+Tracing is optional: without the ``tracing`` extra installed, or with
+OTEL_ENABLED off, every helper here is a no-op.
+"""
+
+import functools
+from collections.abc import Callable
+from contextlib import nullcontext
+from typing import Any
+
+from app.config.settings import Settings
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # pragma: no cover - optional dependency
+    propagate = trace = SpanKind = Status = StatusCode = None
+
+_provider = None
+_tracer = None
+
+
+def setup_tracing(settings: Settings, exporter: Any = None, sampling_ratio: float | None = None):
+    """
+    Configure the process tracer from the OTEL_* settings.
+
+    Spans are exported by a BatchSpanProcessor, which queues them and exports on
+    a background thread, dropping spans when the queue is full rather than ever
+    blocking the event loop. Passing ``exporter`` (e.g. an InMemorySpanExporter
+    in tests) exports synchronously instead and enables tracing regardless of
+    OTEL_ENABLED. Returns the TracerProvider, or None when tracing is disabled.
+    """
+    global _provider, _tracer
+
+    if trace is None or (exporter is None and not settings.OTEL_ENABLED):
+        return None
+
+    # SDK imports are deferred so a disabled tracer costs nothing at startup
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    ratio = settings.OTEL_SAMPLING_RATIO if sampling_ratio is None else sampling_ratio
+    provider = TracerProvider(
+        resource=Resource.create(
+            {
+                "service.name": settings.OTEL_SERVICE_NAME,
+                "service.version": settings.APP_VERSION,
+                "deployment.environment": settings.ENVIRONMENT,
+            }
+        ),
+        # Honour upstream sampling decisions; sample new traces by ratio
+        sampler=ParentBased(TraceIdRatioBased(ratio)),
+    )
+
+    if exporter is not None:
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+    elif settings.OTEL_TRACES_EXPORTER == "console":
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+    elif settings.OTEL_TRACES_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        provider.add_span_processor(
+            BatchSpanProcessor(
+                OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT),
+                max_queue_size=4096,
+                max_export_batch_size=512,
+                schedule_delay_millis=2000,
+            )
+        )
+    else:
+        return None
+
+    _provider = provider
+    _tracer = provider.get_tracer("app")
+    return provider
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and disable tracing."""
+    global _provider, _tracer
+    if _provider is not None:
+        _provider.shutdown()
+    _provider = None
+    _tracer = None
+
+
+def get_tracer():
+    """The configured tracer, or None when tracing is disabled."""
+    return _tracer
+
+
+def start_span(name: str, *, kind: Any = None, attributes: dict | None = None):
+    """Context manager for a span that is current in its block; no-op if disabled."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(
+        name, kind=kind or SpanKind.INTERNAL, attributes=attributes
+    )
+
+
+def mark_error(span, exc: BaseException | None = None, description: str | None = None) -> None:
+    if exc is not None:
+        span.record_exception(exc)
+    span.set_status(Status(StatusCode.ERROR, description or (type(exc).__name__ if exc else None)))
+
+
+def current_trace_id() -> str | None:
+    """Hex trace id of the active span, if it is being recorded."""
+    if trace is None:
+        return None
+    span_context = trace.get_current_span().get_span_context()
+    return format(span_context.trace_id, "032x") if span_context.is_valid else None
+
+
+def traced(name: str) -> Callable:
+    """
+    Wrap an async function (e.g. a FastAPI dependency) in a span.
+
+    ``functools.wraps`` keeps the signature visible to FastAPI's dependency
+    resolution.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return await fn(*args, **kwargs)
+            with _tracer.start_as_current_span(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,345 @@
+"""
+End-to-end throughput benchmark for the main API endpoints.
+
+Runs the full application in process (every middleware, real Mongo and Redis
+clients) with Mapbox replaced by a deterministic emulator, then drives each
+scenario at each concurrency level for a fixed duration. Reports RPS and
+p50/p95/p99 latency per scenario and concurrency, plus Python allocations per
+request (measured separately under tracemalloc), and stores the run as JSON.
+``--faults`` injects dependency latency, errors and timeouts during the run, to
+check timeouts and load shedding offline.
+``compare`` diffs two stored runs and fails on regressions.
+
+The load generator shares the event loop with the app, so absolute numbers
+include client overhead; compare runs made on the same machine.
+
+Usage:
+    PYTHONPATH=src python tests/performance/e2e_benchmark.py run --label baseline
+    PYTHONPATH=src python tests/performance/e2e_benchmark.py run --in-memory \\
+        --concurrency 1,16,64 --duration 5 --mapbox-latency-ms 80
+    PYTHONPATH=src python tests/performance/e2e_benchmark.py compare \\
+        tests/performance/results/e2e-baseline-*.json tests/performance/results/e2e-new-*.json
+    PYTHONPATH=src python tests/performance/e2e_benchmark.py run --label slow-mapbox \\
+        --scenarios calculate --load-shedding --faults faults.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import httpx
+from harness import (
+    configure_environment,
+    measure_allocations,
+    route_payload,
+    running_app,
+    sign_in,
+)
+from mapbox_emulator import MapboxEmulator
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SCENARIOS = (
+    "calculate",
+    "compare",
+    "searches",
+    "searches_not_modified",
+    "search_detail",
+    "search_stats",
+    "me",
+    "readyz",
+)
+
+Request = Callable[[], Awaitable[httpx.Response]]
+
+
+async def build_scenarios(
+    client: httpx.AsyncClient, headers: dict[str, str], seed: int, seed_searches: int
+) -> dict[str, Request]:
+    """One request factory per scenario; seeds searches so list/detail have data."""
+    rng = random.Random(seed)
+    for _ in range(seed_searches):
+        response = await client.post(
+            "/api/v1/routes/calculate", json=route_payload(rng), headers=headers
+        )
+        response.raise_for_status()
+
+    listing = await client.get("/api/v1/searches", headers=headers)
+    listing.raise_for_status()
+    etag = listing.headers.get("etag", "")
+    # Detail picks from every seeded search in creation order: which searches make
+    # the first page, and their order, depends on created_at ties between them
+    everything = await client.get("/api/v1/searches", params={"limit": 100}, headers=headers)
+    everything.raise_for_status()
+    search_ids = sorted(item["id"] for item in everything.json()["data"])
+
+    def calculate() -> Awaitable[httpx.Response]:
+        return client.post(
+            "/api/v1/routes/calculate", json=route_payload(rng), headers=headers
+        )
+
+    def compare() -> Awaitable[httpx.Response]:
+        payload = route_payload(rng)
+        del payload["transport_mode"]
+        return client.post("/api/v1/routes/compare", json=payload, headers=headers)
+
+    def search_detail() -> Awaitable[httpx.Response]:
+        return client.get(f"/api/v1/searches/{rng.choice(search_ids)}", headers=headers)
+
+    return {
+        "calculate": calculate,
+        "compare": compare,
+        "searches": lambda: client.get("/api/v1/searches", headers=headers),
+        # Revalidation with a current ETag (bumped by calculate, so run it last)
+        "searches_not_modified": lambda: client.get(
+            "/api/v1/searches", headers={**headers, "If-None-Match": etag}
+        ),
+        "search_detail": search_detail,
+        "search_stats": lambda: client.get("/api/v1/searches/stats", headers=headers),
+        "me": lambda: client.get("/api/v1/auth/me", headers=headers),
+        "readyz": lambda: client.get("/api/v1/health/readyz"),
+    }
+
+
+async def drive(request: Request, concurrency: int, duration: float) -> dict:
+    """Keep ``concurrency`` requests in flight for ``duration`` seconds."""
+    latencies: list[float] = []
+    errors = 0
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await request()
+                failed = response.status_code >= 400
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                failed = True
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round((len(latencies) - errors) / elapsed, 1),
+        "statuses": {str(status): count for status, count in statuses.items()},
+    }
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        result |= {
+            "p50_ms": round(cuts[49] * 1000, 2),
+            "p95_ms": round(cuts[94] * 1000, 2),
+            "p99_ms": round(cuts[98] * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+        }
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from app.utils.faults import FaultRule, fault_injector
+
+    faults = [FaultRule(**rule) for rule in json.loads(args.faults.read_text())] if args.faults else []
+    emulator = MapboxEmulator(
+        latency_ms=args.mapbox_latency_ms,
+        jitter_ms=args.mapbox_jitter_ms,
+        points_per_km=args.points_per_km,
+        seed=args.seed,
+    )
+    results = []
+    async with running_app(emulator, in_memory=args.in_memory) as client:
+        headers = await sign_in(client)
+        scenarios = await build_scenarios(client, headers, args.seed, args.seed_searches)
+        if faults:
+            # After seeding, so only the measured traffic is affected
+            fault_injector.configure(enabled=True, rules=faults)
+        # Mutating scenarios last, so read scenarios see the same data set
+        names = sorted(args.scenarios, key=lambda name: name == "calculate")
+        for name in names:
+            request = scenarios[name]
+            for _ in range(args.warmup):
+                await request()
+            allocations = await measure_allocations(request, args.alloc_requests)
+            for concurrency in args.concurrency:
+                result = {"scenario": name, **await drive(request, concurrency, args.duration)}
+                result["allocations"] = allocations
+                results.append(result)
+                _print_row(result)
+
+    return {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": "in-memory" if args.in_memory else "local",
+        "mapbox": {
+            "latency_ms": args.mapbox_latency_ms,
+            "jitter_ms": args.mapbox_jitter_ms,
+            "points_per_km": args.points_per_km,
+            "requests": emulator.requests,
+        },
+        "faults": [rule.model_dump() for rule in faults],
+        "duration_seconds": args.duration,
+        "results": results,
+    }
+
+
+_HEADER = (
+    f"{'scenario':<24}{'conc':>6}{'requests':>10}{'errors':>8}{'rps':>10}"
+    f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KiB':>10}{'kept KiB':>10}"
+)
+
+
+def _print_row(result: dict) -> None:
+    allocations = result["allocations"]
+    print(
+        f"{result['scenario']:<24}{result['concurrency']:>6}{result['requests']:>10}"
+        f"{result['errors']:>8}{result['rps']:>10.1f}{result.get('p50_ms', 0):>10.2f}"
+        f"{result.get('p95_ms', 0):>10.2f}{result.get('p99_ms', 0):>10.2f}"
+        f"{allocations['peak_kib']:>10.1f}{allocations['retained_kib']:>10.2f}",
+        flush=True,
+    )
+
+
+def compare(base_path: Path, new_path: Path, max_regression: float) -> int:
+    """Print per-scenario deltas; 1 if RPS drops or p95 grows beyond the threshold."""
+    base, new = (json.loads(path.read_text()) for path in (base_path, new_path))
+    baseline = {(r["scenario"], r["concurrency"]): r for r in base["results"]}
+    print(f"{base['label']} ({base['commit']}) -> {new['label']} ({new['commit']})\n")
+    print(
+        f"{'scenario':<24}{'conc':>6}{'rps':>12}{'Δ rps':>10}{'p95 ms':>12}"
+        f"{'Δ p95':>10}{'Δ peak KiB':>12}"
+    )
+
+    regressions = []
+    for result in new["results"]:
+        key = (result["scenario"], result["concurrency"])
+        old = baseline.get(key)
+        if old is None or "p95_ms" not in old or "p95_ms" not in result:
+            continue
+        rps_delta = (result["rps"] - old["rps"]) / old["rps"] * 100 if old["rps"] else 0.0
+        p95_delta = (result["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        peak_delta = result["allocations"]["peak_kib"] - old["allocations"]["peak_kib"]
+        flag = ""
+        if rps_delta < -max_regression or p95_delta > max_regression:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(
+            f"{key[0]:<24}{key[1]:>6}{result['rps']:>12.1f}{rps_delta:>+9.1f}%"
+            f"{result['p95_ms']:>12.2f}{p95_delta:>+9.1f}%{peak_delta:>+12.1f}{flag}"
+        )
+
+    if regressions:
+        print(
+            f"\nFAIL: {len(regressions)} scenario(s) regressed by more than {max_regression:.0f}%",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmark and store the results")
+    run_parser.add_argument("--label", default="run", help="Name stored with the results")
+    run_parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(DEFAULT_SCENARIOS),
+        help=f"Comma-separated subset of: {','.join(DEFAULT_SCENARIOS)}",
+    )
+    run_parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32])
+    run_parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    run_parser.add_argument("--warmup", type=int, default=20, help="Requests before measuring")
+    run_parser.add_argument("--alloc-requests", type=int, default=50)
+    run_parser.add_argument("--seed-searches", type=int, default=25)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--mapbox-latency-ms", type=float, default=50.0)
+    run_parser.add_argument("--mapbox-jitter-ms", type=float, default=20.0)
+    run_parser.add_argument("--points-per-km", type=float, default=1.0)
+    run_parser.add_argument("--in-memory", action="store_true", help="Use in-memory Mongo/Redis")
+    run_parser.add_argument("--mongo-uri")
+    run_parser.add_argument("--redis-url")
+    run_parser.add_argument("--rate-limits", action="store_true", help="Keep rate limiting on")
+    run_parser.add_argument("--load-shedding", action="store_true", help="Keep load shedding on")
+    run_parser.add_argument(
+        "--directions-cache", action="store_true", help="Serve repeated corridors from Redis"
+    )
+    run_parser.add_argument(
+        "--route-reuse", action="store_true", help="Reuse recent searches between nearby points"
+    )
+    run_parser.add_argument(
+        "--faults", type=Path, help="JSON list of fault-injection rules (app.utils.faults.FaultRule)"
+    )
+    run_parser.add_argument("--output", type=Path, help="Result file (default: results/)")
+
+    compare_parser = commands.add_parser("compare", help="Compare two stored runs")
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("new", type=Path)
+    compare_parser.add_argument(
+        "--max-regression", type=float, default=10.0, help="Allowed regression in percent"
+    )
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        return compare(args.base, args.new, args.max_regression)
+
+    unknown = set(args.scenarios) - set(DEFAULT_SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    configure_environment(
+        mongo_uri=args.mongo_uri,
+        redis_url=args.redis_url,
+        rate_limits=args.rate_limits,
+        load_shedding=args.load_shedding,
+        directions_cache=args.directions_cache,
+        route_reuse=args.route_reuse,
+    )
+    print(_HEADER)
+    report = asyncio.run(run(args))
+
+    output = args.output or RESULTS_DIR / f"e2e-{args.label}-{time.strftime('%Y%m%dT%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
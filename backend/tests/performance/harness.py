@@ -0,0 +1,212 @@
+"""
+Shared setup for the end-to-end benchmarks: the real app, in process.
+
+``running_app()`` builds the app with ``create_app()``, points its outbound HTTP
+client at the Mapbox emulator, runs the lifespan and yields an httpx client
+bound to the app through ``ASGITransport``. MongoDB and Redis are the local
+servers from the settings, or in-memory stand-ins (``mongomock-motor`` and
+``fakeredis[lua]``, installed separately) with ``in_memory=True``.
+
+Settings are read once per process, so ``configure_environment()`` must run
+before anything imports ``app``.
+"""
+
+import os
+import random
+import sys
+import tracemalloc
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+import httpx
+from mapbox_emulator import MapboxEmulator
+
+BASE_URL = "http://benchmark.local"
+BENCHMARK_EMAIL = "benchmark@shipthis.dev"
+BENCHMARK_PASSWORD = "benchmark-password"
+
+# (name, lng, lat): land-connected cities, so every pair is drivable
+CITIES = [
+    ("Berlin", 13.405, 52.52),
+    ("Paris", 2.3522, 48.8566),
+    ("Madrid", -3.7038, 40.4168),
+    ("Rome", 12.4964, 41.9028),
+    ("Vienna", 16.3738, 48.2082),
+    ("Warsaw", 21.0122, 52.2297),
+    ("Amsterdam", 4.9041, 52.3676),
+    ("Prague", 14.4378, 50.0755),
+    ("Milan", 9.19, 45.4642),
+    ("Hamburg", 9.9937, 53.5511),
+    ("Lyon", 4.8357, 45.764),
+    ("Munich", 11.582, 48.1351),
+]
+
+
+def configure_environment(
+    *,
+    mongo_uri: str | None = None,
+    redis_url: str | None = None,
+    database: str = "shipthis_benchmark",
+    rate_limits: bool = False,
+    load_shedding: bool = False,
+    directions_cache: bool = False,
+    route_reuse: bool = False,
+    diagnostics: bool = True,
+) -> None:
+    """
+    Settings for a benchmark process.
+
+    Rate limiting and load shedding are off by default: the point is to
+    measure how fast requests are served, not how fast they are rejected.
+    The directions cache (and its background warmer) and nearby-route reuse
+    are off too, so route calculation keeps exercising the upstream path.
+    ``diagnostics=False`` also turns off the event loop monitor, periodic
+    health sampling and the Server-Timing header, whose work would otherwise
+    land in whichever request is being measured.
+    """
+    if mongo_uri:
+        os.environ["MONGODB_URI"] = mongo_uri
+    if redis_url:
+        os.environ["REDIS_URL"] = redis_url
+    os.environ["MONGODB_DB_NAME"] = database
+    os.environ["RATE_LIMIT_ENABLED"] = str(rate_limits).lower()
+    os.environ["CONCURRENCY_LIMIT_ENABLED"] = str(load_shedding).lower()
+    os.environ["DIRECTIONS_CACHE_ENABLED"] = str(directions_cache).lower()
+    os.environ["ROUTE_REUSE_ENABLED"] = str(route_reuse).lower()
+    if not diagnostics:
+        os.environ["LOOP_MONITOR_ENABLED"] = "false"
+        os.environ["SERVER_TIMING_ENABLED"] = "false"
+        os.environ["HEALTH_SAMPLE_INTERVAL_SECONDS"] = "3600"
+    os.environ.setdefault("MAPBOX_TOKEN", "benchmark")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("LOG_FILE_ENABLED", "false")
+    os.environ.setdefault("OTEL_ENABLED", "false")
+
+
+def _accept_driver_options() -> None:
+    """
+    Let mongomock ignore the listing options Beanie passes (authorizedCollections,
+    nameOnly), which it does not implement.
+    """
+    import mongomock
+
+    original = mongomock.database.Database.list_collection_names
+    if getattr(original, "accepts_driver_options", False):
+        return
+
+    def list_collection_names(self, filter=None, session=None, **_options):
+        return original(self, filter=filter, session=session)
+
+    list_collection_names.accepts_driver_options = True
+    mongomock.database.Database.list_collection_names = list_collection_names
+
+
+def _in_memory_backends(database: str) -> tuple:
+    try:
+        import fakeredis
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError as e:
+        raise SystemExit(
+            f"In-memory mode needs mongomock-motor and fakeredis[lua] ({e.name} missing)"
+        ) from e
+    _accept_driver_options()
+    mongo_client = AsyncMongoMockClient(tz_aware=True)
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return mongo_client, mongo_client[database], redis
+
+
+@asynccontextmanager
+async def running_app(
+    emulator: MapboxEmulator,
+    *,
+    in_memory: bool = False,
+    asgi_wrapper: Callable | None = None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    The started application and a client that calls it in process.
+
+    ``asgi_wrapper`` wraps the app as seen by the client (outside every
+    middleware), e.g. to observe each request.
+    """
+    from app.config.settings import get_settings
+    from app.connections.http import create_http_client
+    from app.main import create_app
+
+    app = create_app()
+    if in_memory:
+        app.state.mongo_client, app.state.db, app.state.redis = _in_memory_backends(
+            get_settings().MONGODB_DB_NAME
+        )
+    app.state.http_client = create_http_client(transport=emulator.transport())
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=asgi_wrapper(app) if asgi_wrapper else app),
+            base_url=BASE_URL,
+            timeout=60,
+        ) as client:
+            yield client
+
+
+async def sign_in(client: httpx.AsyncClient) -> dict[str, str]:
+    """Register the benchmark user if needed and return its auth header."""
+    await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": BENCHMARK_EMAIL,
+            "password": BENCHMARK_PASSWORD,
+            "full_name": "Benchmark User",
+        },
+    )  # 400 when the user already exists from an earlier run
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={"email": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD},
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def route_payload(rng: random.Random) -> dict:
+    """A land route between two distinct cities, with a random cargo weight."""
+    (origin, olng, olat), (destination, dlng, dlat) = rng.sample(CITIES, 2)
+    return {
+        "origin": {"name": origin, "lat": olat, "lng": olng},
+        "destination": {"name": destination, "lat": dlat, "lng": dlng},
+        "cargo_weight_kg": round(rng.uniform(100, 20_000), 1),
+        "transport_mode": "land",
+    }
+
+
+async def measure_allocations(
+    call: Callable[[], Awaitable[httpx.Response]], requests: int
+) -> dict[str, float]:
+    """
+    Python heap allocations per request, measured with tracemalloc.
+
+    ``peak_kib`` is the transient high-water mark above the starting heap;
+    ``retained_kib`` and ``retained_blocks`` are what is still allocated after
+    the request returns (caches, leaks). Requests run one at a time so their
+    allocations do not overlap. Tracing slows execution, so this is kept out of
+    the throughput measurement.
+    """
+    await call()  # the first call fills lazy caches
+    peak = retained = blocks = 0
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            before_blocks = sys.getallocatedblocks()
+            await call()
+            after_blocks = sys.getallocatedblocks()
+            after, high = tracemalloc.get_traced_memory()
+            peak += high - before
+            retained += after - before
+            blocks += after_blocks - before_blocks
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kib": round(peak / requests / 1024, 1),
+        "retained_kib": round(retained / requests / 1024, 2),
+        "retained_blocks": round(blocks / requests, 1),
+    }
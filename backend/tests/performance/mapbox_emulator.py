@@ -0,0 +1,227 @@
+"""
+Deterministic Mapbox Directions emulator for offline benchmarks.
+
+Serves ``/directions/v5/mapbox/{profile}/{coordinates}`` through an
+``httpx.MockTransport``, so the application's real ``MapboxClient``, HTTP
+client pool and instrumentation hooks are exercised without network access.
+Routes are synthesised from the requested coordinates: the same request always
+yields the same routes, with a geometry size proportional to the distance and
+the annotations Mapbox returns for ``overview=full``.
+
+Usage:
+    emulator = MapboxEmulator(latency_ms=80, jitter_ms=20)
+    app.state.http_client = create_http_client(transport=emulator.transport())
+"""
+
+import asyncio
+import math
+import random
+import zlib
+
+import httpx
+
+_EARTH_RADIUS_M = 6_371_000.0
+_PATH_PREFIX = "/directions/v5/mapbox/"
+_CONGESTION = ("low", "low", "low", "moderate", "heavy", "unknown")
+
+
+def haversine_m(a: tuple[float, float], b: tuple[float, float]) -> float:
+    """Great-circle distance in metres between two (lng, lat) points."""
+    lng1, lat1, lng2, lat2 = map(math.radians, (*a, *b))
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS_M * math.asin(math.sqrt(h))
+
+
+class MapboxEmulator:
+    """
+    Synthetic directions with configurable latency.
+
+    Latency is ``latency_ms`` plus a uniform ``jitter_ms`` drawn from a seeded
+    generator, so a run is reproducible for a given request order. Route shape
+    is seeded from the request path only and does not depend on order.
+    ``points_per_km`` controls geometry (and therefore payload) size, capped at
+    ``max_points`` per route.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        alternatives: int = 2,
+        points_per_km: float = 1.0,
+        max_points: int = 5000,
+        seed: int = 0,
+    ):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.alternatives = alternatives
+        self.points_per_km = points_per_km
+        self.max_points = max_points
+        self.seed = seed
+        self.requests = 0
+        self._latency_rng = random.Random(seed)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        delay = self.latency + self._latency_rng.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        path = request.url.path
+        if request.method == "HEAD" or not path.startswith(_PATH_PREFIX):
+            # Connection warm-up and anything else: an empty 200
+            return httpx.Response(200)
+
+        _, _, raw_coordinates = path.removeprefix(_PATH_PREFIX).partition("/")
+        try:
+            waypoints = [
+                tuple(float(value) for value in pair.split(","))
+                for pair in raw_coordinates.split(";")
+            ]
+        except ValueError:
+            waypoints = []
+        if len(waypoints) < 2 or any(len(point) != 2 for point in waypoints):
+            return httpx.Response(
+                422, json={"code": "InvalidInput", "message": "Invalid coordinates"}
+            )
+
+        alternatives = request.url.params.get("alternatives") == "true"
+        annotations = request.url.params.get("annotations", "")
+        return httpx.Response(
+            200, json=self.directions(path, waypoints, alternatives, annotations)
+        )
+
+    def directions(
+        self,
+        path: str,
+        waypoints: list[tuple[float, float]],
+        alternatives: bool = False,
+        annotations: str = "",
+    ) -> dict:
+        rng = random.Random(zlib.crc32(path.encode()) ^ self.seed)
+        count = 1 + (self.alternatives if alternatives else 0)
+        routes = [self._route(rng, waypoints, annotations) for _ in range(count)]
+        routes.sort(key=lambda route: route["duration"])
+        return {
+            "code": "Ok",
+            "routes": routes,
+            "waypoints": [
+                {"name": "", "location": list(point), "distance": 0.0}
+                for point in waypoints
+            ],
+            "uuid": f"emulated-{zlib.crc32(path.encode()):08x}",
+        }
+
+    def _route(
+        self, rng: random.Random, waypoints: list[tuple[float, float]], annotations: str
+    ) -> dict:
+        # Roads are longer than the great circle; alternatives differ in detour and speed
+        detour = rng.uniform(1.15, 1.45)
+        speed_ms = rng.uniform(55, 95) / 3.6
+        legs = []
+        coordinates: list[list[float]] = [list(waypoints[0])]
+        for start, end in zip(waypoints, waypoints[1:]):
+            leg_points = self._polyline(rng, start, end)
+            coordinates.extend(leg_points[1:])
+            legs.append(self._leg(rng, leg_points, detour, speed_ms, annotations))
+
+        distance = sum(leg["distance"] for leg in legs)
+        duration = sum(leg["duration"] for leg in legs)
+        return {
+            "distance": round(distance, 1),
+            "duration": round(duration, 1),
+            "weight": round(duration * rng.uniform(1.0, 1.2), 1),
+            "weight_name": "auto",
+            "geometry": {"type": "LineString", "coordinates": coordinates},
+            "legs": legs,
+        }
+
+    def _polyline(
+        self, rng: random.Random, start: tuple[float, float], end: tuple[float, float]
+    ) -> list[list[float]]:
+        """Points from start to end with a smooth sideways bend and small noise."""
+        km = haversine_m(start, end) / 1000
+        points = max(2, min(self.max_points, int(km * self.points_per_km)))
+        bend = rng.uniform(-0.15, 0.15)
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        line = []
+        for i in range(points):
+            t = i / (points - 1)
+            offset = bend * math.sin(math.pi * t)
+            noise = rng.gauss(0, 0.002) if 0 < i < points - 1 else 0.0
+            line.append(
+                [
+                    round(start[0] + dx * t - dy * offset + noise, 6),
+                    round(start[1] + dy * t + dx * offset + noise, 6),
+                ]
+            )
+        return line
+
+    @staticmethod
+    def _leg(
+        rng: random.Random,
+        points: list[list[float]],
+        detour: float,
+        speed_ms: float,
+        annotations: str,
+    ) -> dict:
+        segments = [
+            haversine_m(tuple(a), tuple(b)) * detour for a, b in zip(points, points[1:])
+        ]
+        speeds = [speed_ms * rng.uniform(0.7, 1.2) for _ in segments]
+        durations = [distance / speed for distance, speed in zip(segments, speeds)]
+        distance, duration = sum(segments), sum(durations)
+
+        # A handful of manoeuvres, as with steps=true
+        step_count = min(len(segments), rng.randint(3, 12))
+        bounds = sorted(rng.sample(range(1, len(segments)), step_count - 1))
+        steps = []
+        for first, last in zip([0, *bounds], [*bounds, len(segments)]):
+            steps.append(
+                {
+                    "distance": round(sum(segments[first:last]), 1),
+                    "duration": round(sum(durations[first:last]), 1),
+                    "maneuver": {
+                        "type": "depart" if first == 0 else "turn",
+                        "location": points[first],
+                    },
+                    "name": f"Road {rng.randint(1, 999)}",
+                    "mode": "driving",
+                }
+            )
+        steps.append(
+            {
+                "distance": 0.0,
+                "duration": 0.0,
+                "maneuver": {"type": "arrive", "location": points[-1]},
+                "name": "",
+                "mode": "driving",
+            }
+        )
+
+        leg = {
+            "distance": round(distance, 1),
+            "duration": round(duration, 1),
+            "summary": "Emulated route",
+            "steps": steps,
+        }
+        requested = set(annotations.split(",")) if annotations else set()
+        annotation = {}
+        if "distance" in requested:
+            annotation["distance"] = [round(d, 1) for d in segments]
+        if "duration" in requested:
+            annotation["duration"] = [round(d, 1) for d in durations]
+        if "speed" in requested:
+            annotation["speed"] = [round(s, 1) for s in speeds]
+        if "congestion" in requested:
+            annotation["congestion"] = [rng.choice(_CONGESTION) for _ in segments]
+        if annotation:
+            leg["annotation"] = annotation
+        return leg
@@ -0,0 +1,119 @@
+"""
+Per-layer overhead benchmark for the application middleware stack.
+
+Builds the stack registered by ``create_app()`` one layer at a time around a
+trivial ASGI endpoint and reports the cumulative and incremental cost of each
+layer in microseconds per request.
+
+Usage:
+    PYTHONPATH=src python tests/performance/middleware_benchmark.py
+    PYTHONPATH=src python tests/performance/middleware_benchmark.py --max-total-us 150
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+from app.main import create_app
+
+_BODY = b'{"status":"ok"}'
+
+
+async def _endpoint(scope: dict, receive, send) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(_BODY)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": _BODY})
+
+
+def _scope() -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/benchmark",
+        "raw_path": b"/api/v1/benchmark",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"accept-encoding", b"gzip, br")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+        # Dependencies are not connected: middlewares that need them pass through
+        "app": SimpleNamespace(state=SimpleNamespace()),
+    }
+
+
+async def _receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message: dict) -> None:
+    return None
+
+
+async def _measure(app, iterations: int) -> float:
+    """Mean microseconds per request through ``app``."""
+    for _ in range(min(1000, iterations)):
+        await app(_scope(), _receive, _send)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await app(_scope(), _receive, _send)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run(iterations: int) -> list[tuple[str, float, float]]:
+    fastapi_app = create_app()
+
+    # user_middleware is ordered outermost first; wrap from the innermost out
+    layers = list(reversed(fastapi_app.user_middleware))
+    results = [("endpoint", await _measure(_endpoint, iterations), 0.0)]
+
+    app = _endpoint
+    for cls, args, kwargs in layers:
+        app = cls(app, *args, **kwargs)
+        cumulative = await _measure(app, iterations)
+        results.append((cls.__name__, cumulative, cumulative - results[-1][1]))
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument(
+        "--max-total-us",
+        type=float,
+        default=None,
+        help="Fail if the full stack adds more than this many microseconds per request",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.iterations))
+
+    print(f"{'layer':<28}{'cumulative us':>16}{'layer us':>12}")
+    for name, cumulative, delta in results:
+        print(f"{name:<28}{cumulative:>16.2f}{delta:>12.2f}")
+
+    overhead = results[-1][1] - results[0][1]
+    print(f"\nTotal middleware overhead: {overhead:.2f} us/request")
+
+    if args.max_total_us is not None and overhead > args.max_total_us:
+        print(f"FAIL: overhead exceeds budget of {args.max_total_us:.2f} us", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Synthetic search-history generator for scale testing.
+
+Bulk-loads ``searches`` documents shaped like ``RouteRepository.save`` writes
+them into a local MongoDB with ``insert_many`` in parallel batches, then builds
+the indexes declared on the ``Search`` model (after the load, which is much
+faster than maintaining them during it). Distributions are configurable:
+
+- users: Zipf-like skew, so the first user owns the largest share of searches
+  (``--skew 0`` spreads documents evenly);
+- transport modes: weighted, e.g. ``land=0.7,sea=0.2,air=0.1``;
+- geometry size: log-normal points per route around ``--geometry-points``;
+- timestamps: exponentially biased towards the present over ``--days``.
+
+A summary (heaviest users and their counts) is written to the
+``dataset_info`` collection for ``search_scale_benchmark.py``.
+
+Usage:
+    PYTHONPATH=src python tests/performance/search_dataset.py --documents 5000000 --drop
+    PYTHONPATH=src python tests/performance/search_dataset.py --documents 200000 \\
+        --users 1000 --skew 1.2 --modes land=0.5,sea=0.3,air=0.2 --geometry-points 50
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import math
+import random
+import sys
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+
+from beanie import init_beanie
+from bson import ObjectId
+from mapbox_emulator import haversine_m
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from app.features.routes.emissions import EmissionCalculator
+from app.features.search.model import Search
+
+DEFAULT_DATABASE = "shipthis_scale"
+INFO_COLLECTION = "dataset_info"
+
+_emissions = EmissionCalculator()
+
+
+class SearchGenerator:
+    """Deterministic (per seed) source of search documents."""
+
+    def __init__(
+        self,
+        *,
+        users: int,
+        skew: float,
+        modes: dict[str, float],
+        geometry_points: int,
+        days: int,
+        seed: int,
+    ):
+        self.rng = random.Random(seed)
+        # ObjectIds derived from the seed, so re-runs target the same users
+        self.user_ids = [ObjectId(f"{seed:08x}{i:016x}") for i in range(users)]
+        self.user_weights = list(
+            itertools.accumulate(1 / (rank + 1) ** skew for rank in range(users))
+        )
+        self.modes = list(modes)
+        self.mode_weights = list(itertools.accumulate(modes.values()))
+        self.geometry_sigma = 0.8
+        self.geometry_mu = math.log(max(geometry_points, 2))
+        self.days = days
+        self.now = datetime.now(UTC)
+
+    def _pick(self, values: list, cumulative: list[float]):
+        return values[bisect.bisect(cumulative, self.rng.random() * cumulative[-1])]
+
+    def _point(self) -> list[float]:
+        return [round(self.rng.uniform(-170, 170), 6), round(self.rng.uniform(-60, 70), 6)]
+
+    def _geometry(self, origin: list[float], destination: list[float]) -> dict:
+        points = max(2, min(20_000, int(self.rng.lognormvariate(self.geometry_mu, self.geometry_sigma))))
+        coordinates = [
+            [
+                round(origin[0] + (destination[0] - origin[0]) * i / (points - 1), 6),
+                round(origin[1] + (destination[1] - origin[1]) * i / (points - 1), 6),
+            ]
+            for i in range(points)
+        ]
+        return {"type": "LineString", "coordinates": coordinates}
+
+    def _route(self, mode: str, distance_km: float, cargo_kg: float, geometry: dict) -> dict:
+        if mode == "sea":
+            co2 = _emissions.calculate_sea(distance_km=distance_km, cargo_kg=cargo_kg)
+            speed = 30
+        elif mode == "air":
+            co2 = _emissions.calculate_air(distance_km=distance_km, cargo_kg=cargo_kg)
+            speed = 800
+        else:
+            co2 = _emissions.calculate_land(distance_km=distance_km, segments={}, cargo_kg=cargo_kg)
+            speed = 70
+        return {
+            "distance_km": round(distance_km, 3),
+            "duration_hours": round(distance_km / speed, 3),
+            "co2_emissions_kg": co2,
+            "geometry": geometry,
+        }
+
+    def document(self) -> dict:
+        mode = self._pick(self.modes, self.mode_weights)
+        origin, destination = self._point(), self._point()
+        distance_km = haversine_m(tuple(origin), tuple(destination)) / 1000 * 1.2 + 1
+        cargo_kg = round(self.rng.uniform(100, 20_000), 1)
+        shortest = self._route(mode, distance_km, cargo_kg, self._geometry(origin, destination))
+        efficient = self._route(
+            mode,
+            distance_km * self.rng.uniform(1.0, 1.15),
+            cargo_kg * self.rng.uniform(0.9, 1.0),
+            self._geometry(origin, destination),
+        )
+        age_days = min(self.rng.expovariate(3 / self.days), self.days)
+        return {
+            "user_id": self._pick(self.user_ids, self.user_weights),
+            "origin": {"name": f"Origin {origin[0]:.2f},{origin[1]:.2f}", "coordinates": origin},
+            "destination": {
+                "name": f"Destination {destination[0]:.2f},{destination[1]:.2f}",
+                "coordinates": destination,
+            },
+            "cargo_weight_kg": cargo_kg,
+            "transport_mode": mode,
+            "shortest_route": shortest,
+            "efficient_route": efficient,
+            "created_at": self.now - timedelta(days=age_days),
+        }
+
+
+async def load(
+    db: AsyncIOMotorDatabase,
+    generator: SearchGenerator,
+    *,
+    documents: int,
+    batch_size: int,
+    parallel: int,
+) -> Counter:
+    """Insert ``documents`` in batches with up to ``parallel`` inserts in flight."""
+    per_user: Counter = Counter()
+    batches = iter(range(0, documents, batch_size))
+    inserted = 0
+    started = time.perf_counter()
+
+    async def worker() -> None:
+        nonlocal inserted
+        # Generation runs on the loop while other workers' inserts are in flight
+        for offset in batches:
+            batch = [generator.document() for _ in range(min(batch_size, documents - offset))]
+            per_user.update(doc["user_id"] for doc in batch)
+            await db.searches.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            if inserted % (batch_size * 50) < len(batch):
+                rate = inserted / (time.perf_counter() - started)
+                print(f"  {inserted:>12,} documents  ({rate:,.0f}/s)", flush=True)
+
+    await asyncio.gather(*(worker() for _ in range(parallel)))
+    return per_user
+
+
+def _weights(value: str) -> dict[str, float]:
+    weights = {}
+    for item in value.split(","):
+        mode, _, weight = item.partition("=")
+        weights[mode.strip()] = float(weight)
+    unknown = set(weights) - {"land", "sea", "air"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown transport modes: {', '.join(unknown)}")
+    return weights
+
+
+async def run(args: argparse.Namespace) -> None:
+    client = AsyncIOMotorClient(args.mongo_uri, serverSelectionTimeoutMS=5_000, tz_aware=True)
+    db = client[args.database]
+    try:
+        await client.admin.command("ping")
+        if args.drop:
+            await db.searches.drop()
+            await db[INFO_COLLECTION].drop()
+
+        generator = SearchGenerator(
+            users=args.users,
+            skew=args.skew,
+            modes=args.modes,
+            geometry_points=args.geometry_points,
+            days=args.days,
+            seed=args.seed,
+        )
+        print(f"Loading {args.documents:,} searches into {args.database}.searches")
+        started = time.perf_counter()
+        per_user = await load(
+            db,
+            generator,
+            documents=args.documents,
+            batch_size=args.batch_size,
+            parallel=args.parallel,
+        )
+        loaded = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await init_beanie(database=db, document_models=[Search])
+        indexed = time.perf_counter() - started
+
+        heaviest = [{"user_id": user_id, "searches": count} for user_id, count in per_user.most_common(10)]
+        await db[INFO_COLLECTION].insert_one(
+            {
+                "created_at": datetime.now(UTC),
+                "documents": args.documents,
+                "users": args.users,
+                "skew": args.skew,
+                "modes": args.modes,
+                "geometry_points": args.geometry_points,
+                "days": args.days,
+                "seed": args.seed,
+                "heaviest_users": heaviest,
+            }
+        )
+        print(
+            f"Loaded in {loaded:.1f} s ({args.documents / loaded:,.0f} docs/s), "
+            f"indexes built in {indexed:.1f} s"
+        )
+        for entry in heaviest[:3]:
+            print(f"  user {entry['user_id']}: {entry['searches']:,} searches")
+    finally:
+        client.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default=DEFAULT_DATABASE)
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for users")
+    parser.add_argument("--modes", type=_weights, default=_weights("land=0.7,sea=0.2,air=0.1"))
+    parser.add_argument("--geometry-points", type=int, default=200, help="Median points per route")
+    parser.add_argument("--days", type=int, default=365, help="Age of the oldest search")
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--parallel", type=int, default=8, help="Concurrent insert_many calls")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="Drop existing searches first")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
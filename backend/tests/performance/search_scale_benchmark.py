@@ -0,0 +1,369 @@
+"""
+Query latency and explain plans for the search repositories at scale.
+
+Runs every MongoDB method of ``SearchRepository`` (and of ``RouteRepository``:
+``save``, which writes the history, and ``find_recent_nearby``) against a
+dataset loaded by ``search_dataset.py``, for the heaviest user and a randomly
+sampled one. Pagination is measured at the first, middle and last page. For
+each case it records latency (p50/p95/max over ``--repeat`` runs) and a
+summary of the explain plan: stages, indexes, keys and documents examined per
+document returned.
+
+``--strict`` fails on collection scans and on in-memory sorts for queries that
+should be served by an index; ``--baseline`` fails when a case's p95 regressed
+by more than ``--max-regression`` percent against an earlier result file.
+Exits with 2 when MongoDB is not reachable.
+
+Usage:
+    PYTHONPATH=src python tests/performance/search_scale_benchmark.py
+    PYTHONPATH=src python tests/performance/search_scale_benchmark.py --strict \\
+        --baseline tests/performance/results/search-scale-<run>.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from math import ceil
+from pathlib import Path
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+from search_dataset import DEFAULT_DATABASE, INFO_COLLECTION
+
+from app.connections.mongodb import create_mongo_client
+from app.features.auth.model import User
+from app.features.routes.dto import RouteCalculateRequest
+from app.features.routes.repository import RouteRepository
+from app.features.search.model import Search
+from app.features.search.repository import SearchRepository
+
+RESULTS_DIR = Path(__file__).parent / "results"
+PAGE_SIZE = 20
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], Awaitable]
+    explain: dict | None
+    # Cases that legitimately sort in memory (sorting on an unindexed field)
+    allow_sort: bool = False
+    result: dict = field(default_factory=dict)
+
+
+def _walk(plan: dict, stages: list[str], indexes: set[str]) -> None:
+    stages.append(plan.get("stage", "?"))
+    if "indexName" in plan:
+        indexes.add(plan["indexName"])
+    children = plan.get("inputStages", [])
+    for key in ("queryPlan", "inputStage"):
+        if key in plan:
+            children = [plan[key], *children]
+    for child in children:
+        _walk(child, stages, indexes)
+
+
+def _find_key(document, key: str):
+    """First value for ``key`` in a nested explain document."""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        values = document.values()
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+    for value in values:
+        found = _find_key(value, key)
+        if found is not None:
+            return found
+    return None
+
+
+def summarize_explain(explain: dict) -> dict:
+    """Stages, indexes and examined/returned counts from an explain result."""
+    stages: list[str] = []
+    indexes: set[str] = set()
+    winning = _find_key(explain, "winningPlan")
+    if winning:
+        _walk(winning, stages, indexes)
+    stats = _find_key(explain, "executionStats") or {}
+    returned = stats.get("nReturned", 0)
+    docs = stats.get("totalDocsExamined", 0)
+    return {
+        "stages": stages,
+        "indexes": sorted(indexes),
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "docs_examined": docs,
+        "returned": returned,
+        "docs_per_returned": round(docs / returned, 1) if returned else None,
+        "execution_ms": stats.get("executionTimeMillis"),
+        "collscan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+    }
+
+
+async def _measure(case: Case, repeat: int) -> dict:
+    await case.run()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await case.run()
+        latencies.append(time.perf_counter() - start)
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+def _find_explain(filter_q: dict, sort: tuple[str, int], skip: int, limit: int) -> dict:
+    return {
+        "find": "searches",
+        "filter": filter_q,
+        "sort": {sort[0]: sort[1]},
+        "skip": skip,
+        "limit": limit,
+    }
+
+
+def _count_explain(filter_q: dict) -> dict:
+    # count_documents runs this aggregation
+    return {
+        "aggregate": "searches",
+        "pipeline": [{"$match": filter_q}, {"$group": {"_id": 1, "n": {"$sum": 1}}}],
+        "cursor": {},
+    }
+
+
+async def build_cases(db: AsyncIOMotorDatabase, user_id: ObjectId, label: str) -> list[Case]:
+    searches = SearchRepository(db)
+    routes = RouteRepository(db)
+    total = await searches.collection.count_documents({"user_id": user_id})
+    last_page = max(1, ceil(total / PAGE_SIZE))
+    newest = await searches.collection.find_one({"user_id": user_id}, {"_id": 1}, sort=[("created_at", -1)])
+    search_id = newest["_id"] if newest else ObjectId()
+    default_sort = SearchRepository.list_sort("-created_at")
+
+    cases = [
+        Case(
+            f"{label}.count",
+            lambda: searches.collection.count_documents(SearchRepository.list_filter(user_id, None)),
+            _count_explain(SearchRepository.list_filter(user_id, None)),
+        )
+    ]
+    for page_name, page in (("first", 1), ("middle", max(1, last_page // 2)), ("last", last_page)):
+        cases.append(
+            Case(
+                f"{label}.list.{page_name}_page",
+                lambda page=page: searches.list(
+                    user_id=user_id, page=page, limit=PAGE_SIZE, sort="-created_at", mode=None
+                ),
+                _find_explain(
+                    SearchRepository.list_filter(user_id, None),
+                    default_sort,
+                    (page - 1) * PAGE_SIZE,
+                    PAGE_SIZE,
+                ),
+            )
+        )
+    cases += [
+        Case(
+            f"{label}.list.mode_filter",
+            lambda: searches.list(user_id=user_id, page=1, limit=PAGE_SIZE, sort="-created_at", mode="sea"),
+            _find_explain(SearchRepository.list_filter(user_id, "sea"), default_sort, 0, PAGE_SIZE),
+        ),
+        Case(
+            f"{label}.list.sort_cargo_weight",
+            lambda: searches.list(user_id=user_id, page=1, limit=PAGE_SIZE, sort="-cargo_weight_kg", mode=None),
+            _find_explain(
+                SearchRepository.list_filter(user_id, None),
+                SearchRepository.list_sort("-cargo_weight_kg"),
+                0,
+                PAGE_SIZE,
+            ),
+            allow_sort=True,
+        ),
+        Case(
+            f"{label}.get",
+            lambda: searches.get(search_id=search_id, user_id=user_id),
+            {"find": "searches", "filter": {"_id": search_id, "user_id": user_id}, "limit": 1},
+        ),
+        Case(
+            f"{label}.stats",
+            lambda: searches.stats(user_id=user_id),
+            {"aggregate": "searches", "pipeline": SearchRepository.stats_pipeline(user_id), "cursor": {}},
+        ),
+    ]
+
+    payload = RouteCalculateRequest(
+        origin={"name": "Scale origin", "lat": 52.52, "lng": 13.405},
+        destination={"name": "Scale destination", "lat": 48.8566, "lng": 2.3522},
+        cargo_weight_kg=1000,
+        transport_mode="land",
+    )
+    route = {"distance_km": 1050.0, "duration_hours": 14.0, "co2_emissions_kg": 120.0, "geometry": {}}
+
+    nearby = {
+        "origin": payload.origin.to_coordinates(),
+        "destination": payload.destination.to_coordinates(),
+        "transport_mode": "land",
+        "since": datetime.now(UTC) - timedelta(days=1),
+        "radius_m": 500.0,
+    }
+    cases.append(
+        Case(
+            f"{label}.nearby_recent",
+            lambda: routes.find_recent_nearby(**nearby),
+            {
+                "find": "searches",
+                "filter": RouteRepository.nearby_filter(**nearby),
+                "sort": {"created_at": -1},
+                "limit": 1,
+            },
+        )
+    )
+
+    async def save_and_delete():
+        inserted_id = await routes.save(
+            user_id=user_id, payload=payload, shortest=route, efficient=route
+        )
+        await searches.delete(search_id=inserted_id, user_id=user_id)
+
+    cases.append(
+        Case(
+            f"{label}.save_and_delete",
+            save_and_delete,
+            {
+                "delete": "searches",
+                "deletes": [{"q": {"_id": search_id, "user_id": user_id}, "limit": 1}],
+            },
+        )
+    )
+    return cases
+
+
+async def _users(db: AsyncIOMotorDatabase, user_ids: list[str]) -> list[tuple[str, ObjectId]]:
+    if user_ids:
+        return [(f"user{i}", ObjectId(user_id)) for i, user_id in enumerate(user_ids)]
+    info = await db[INFO_COLLECTION].find_one(sort=[("created_at", -1)])
+    users = []
+    if info:
+        users.append(("heaviest", info["heaviest_users"][0]["user_id"]))
+    sample = await db.searches.aggregate([{"$sample": {"size": 1}}, {"$project": {"user_id": 1}}]).to_list(1)
+    if sample:
+        users.append(("sampled", sample[0]["user_id"]))
+    return users
+
+
+async def run(args: argparse.Namespace) -> dict:
+    client, db = await create_mongo_client(
+        uri=args.mongo_uri, db_name=args.database, document_models=[User, Search]
+    )
+    try:
+        await client.admin.command("ping")
+        documents = await db.searches.estimated_document_count()
+        users = await _users(db, args.user_id)
+        if not users:
+            raise SystemExit(f"No searches in {args.database}; run search_dataset.py first")
+
+        print(f"{documents:,} searches in {args.database}\n")
+        print(
+            f"{'case':<36}{'p50 ms':>10}{'p95 ms':>10}{'keys':>12}{'docs':>12}"
+            f"{'returned':>10}  plan"
+        )
+        results = []
+        for label, user_id in users:
+            for case in await build_cases(db, user_id, label):
+                case.result = {"case": case.name, "user_id": str(user_id), **await _measure(case, args.repeat)}
+                if case.explain is not None:
+                    explain = await db.command("explain", case.explain, verbosity="executionStats")
+                    case.result["plan"] = summarize_explain(explain)
+                    case.result["allow_sort"] = case.allow_sort
+                _print_case(case.result)
+                results.append(case.result)
+    finally:
+        client.close()
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "database": args.database,
+        "documents": documents,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+
+def _print_case(result: dict) -> None:
+    plan = result.get("plan", {})
+    print(
+        f"{result['case']:<36}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+        f"{plan.get('keys_examined', 0):>12,}{plan.get('docs_examined', 0):>12,}"
+        f"{plan.get('returned', 0):>10,}  {' < '.join(plan.get('stages', []))}",
+        flush=True,
+    )
+
+
+def check(report: dict, baseline: dict | None, max_regression: float) -> tuple[list[str], list[str]]:
+    """Bad plans, and latency regressions against ``baseline``."""
+    plans, regressions = [], []
+    for result in report["results"]:
+        plan = result.get("plan")
+        if plan and plan["collscan"]:
+            plans.append(f"{result['case']}: collection scan")
+        if plan and plan["in_memory_sort"] and not result["allow_sort"]:
+            plans.append(f"{result['case']}: in-memory sort")
+
+    if baseline:
+        # Users differ between datasets; compare by case name only
+        previous = {r["case"]: r for r in baseline["results"]}
+        for result in report["results"]:
+            old = previous.get(result["case"])
+            if old and old["p95_ms"] and result["p95_ms"] > old["p95_ms"] * (1 + max_regression / 100):
+                regressions.append(
+                    f"{result['case']}: p95 {old['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms"
+                )
+    return plans, regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default=DEFAULT_DATABASE)
+    parser.add_argument("--user-id", action="append", default=[], help="Users to test (repeatable)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--strict", action="store_true", help="Fail on scans and in-memory sorts")
+    parser.add_argument("--baseline", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--max-regression", type=float, default=25.0)
+    parser.add_argument("--output", type=Path, help="Result file (default: results/)")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run(args))
+    except PyMongoError as e:
+        print(f"MongoDB not available at {args.mongo_uri}: {e}", file=sys.stderr)
+        return 2
+
+    output = args.output or RESULTS_DIR / f"search-scale-{time.strftime('%Y%m%dT%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    plans, regressions = check(report, baseline, args.max_regression)
+    problems = [*plans, *regressions] if args.strict else regressions
+    for problem in problems:
+        print(f"FAIL: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Cold-start benchmark: interpreter + import time, and optionally lifespan startup.
+
+Imports ``app.main`` in a fresh interpreter under ``-X importtime`` and reports
+the slowest top-level imports. With ``--lifespan`` it then runs the application
+lifespan (needs MongoDB and Redis reachable) and reports its phase timings. The
+total is compared against ``--target`` (default: STARTUP_TARGET_SECONDS).
+
+Usage:
+    PYTHONPATH=src python tests/performance/startup_benchmark.py
+    PYTHONPATH=src python tests/performance/startup_benchmark.py --lifespan --target 4
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+def measure_imports(module: str) -> tuple[float, dict[str, float]]:
+    """Wall seconds to import ``module`` in a new interpreter, and per-package cumulative ms."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        check=True,
+    )
+    wall = time.perf_counter() - start
+
+    # "import time: self [us] | cumulative | imported package"; top-level
+    # imports are the unindented names
+    packages: dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if name.startswith("  "):
+            continue
+        packages[name.strip().split(".")[0]] += int(cumulative) / 1000
+    return wall, packages
+
+
+async def measure_lifespan() -> tuple[float, dict[str, float]]:
+    from app.main import app
+
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        elapsed = time.perf_counter() - start
+        timings = dict(app.state.startup_timings)
+    return elapsed, timings
+
+
+def main() -> int:
+    from app.config.settings import get_settings
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to show")
+    parser.add_argument("--lifespan", action="store_true", help="Also run the app lifespan")
+    parser.add_argument(
+        "--target",
+        type=float,
+        default=get_settings().STARTUP_TARGET_SECONDS,
+        help="Fail if the measured cold start exceeds this many seconds",
+    )
+    args = parser.parse_args()
+
+    import_wall, packages = measure_imports(args.module)
+    print(f"{'package':<32}{'cumulative ms':>16}")
+    for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"{name:<32}{ms:>16.1f}")
+    print(f"\nInterpreter + import of {args.module}: {import_wall * 1000:.1f} ms")
+
+    total = import_wall
+    if args.lifespan:
+        lifespan_wall, timings = asyncio.run(measure_lifespan())
+        print(f"\n{'startup phase':<32}{'ms':>16}")
+        for name, ms in timings.items():
+            if name not in ("lifespan", "process"):
+                print(f"{name:<32}{ms:>16.1f}")
+        print(f"\nLifespan startup: {lifespan_wall * 1000:.1f} ms")
+        total += lifespan_wall
+
+    print(f"Cold start total: {total * 1000:.1f} ms (target {args.target * 1000:.0f} ms)")
+    if total > args.target:
+        print(f"FAIL: cold start exceeds target of {args.target:.2f} s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
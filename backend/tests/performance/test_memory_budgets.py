@@ -0,0 +1,222 @@
+"""
+Allocation budgets for the hot request paths.
+
+Each endpoint is called ``MEMORY_BUDGET_REQUESTS`` times (default 20) under
+tracemalloc against the in-process app and the Mapbox emulator, and measured
+per request:
+
+- ``peak_kib``: high-water mark of Python heap allocated while serving it;
+- ``live_kib`` / ``live_blocks``: memory and objects allocated by the request
+  that are still alive when the response starts, i.e. request-scoped garbage
+  (decoded documents, GeoJSON copies, response dicts) the GC has to deal with.
+
+A test fails when a value exceeds the budget stored in ``memory_budgets.json``
+and reports the top allocation sites, or when the endpoint has no budget. To
+record or refresh budgets (measured values plus 20% headroom), run with
+``UPDATE_MEMORY_BUDGETS=1`` and commit the file. Budgets hold for the request
+count they were recorded with; other counts only print the measurements.
+
+The measurement is deterministic: diagnostics that run beside requests are
+off, and the scenarios fetch the same searches on every run.
+
+Needs MongoDB and Redis (skipped when unreachable), or in-memory stand-ins
+with ``BENCHMARK_IN_MEMORY=1``. The committed budgets were recorded with the
+in-memory stand-ins, so compare in that mode; the drivers allocate differently.
+
+Usage:
+    PYTHONPATH=src pytest tests/performance/test_memory_budgets.py -s --no-cov
+    BENCHMARK_IN_MEMORY=1 PYTHONPATH=src pytest tests/performance/test_memory_budgets.py -s --no-cov
+    UPDATE_MEMORY_BUDGETS=1 BENCHMARK_IN_MEMORY=1 PYTHONPATH=src pytest tests/performance/test_memory_budgets.py --no-cov
+"""
+
+import asyncio
+import gc
+import json
+import linecache
+import math
+import os
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from harness import configure_environment, running_app, sign_in
+from pymongo.errors import PyMongoError
+from redis.exceptions import RedisError
+
+configure_environment(diagnostics=False)
+
+from e2e_benchmark import build_scenarios  # noqa: E402
+from mapbox_emulator import MapboxEmulator  # noqa: E402
+
+ENDPOINTS = ("calculate", "searches", "search_detail", "search_stats", "me")
+BUDGETS_FILE = Path(__file__).with_name("memory_budgets.json")
+REQUESTS = int(os.environ.get("MEMORY_BUDGET_REQUESTS", "20"))
+UPDATE = os.environ.get("UPDATE_MEMORY_BUDGETS") == "1"
+HEADROOM = 1.2
+TOP_SITES = 10
+TRACEBACK_FRAMES = 10
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+)
+
+
+class _ResponseSnapshots:
+    """Outermost ASGI wrapper: a tracemalloc snapshot as each response starts."""
+
+    def __init__(self):
+        self.app = None
+        self.snapshot: tracemalloc.Snapshot | None = None
+
+    def wrap(self, app):
+        self.app = app
+        return self
+
+    async def __call__(self, scope, receive, send):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and tracemalloc.is_tracing():
+                self.snapshot = tracemalloc.take_snapshot()
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _short(filename: str) -> str:
+    return filename.rsplit("site-packages/", 1)[-1].rsplit("/src/", 1)[-1]
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    """Allocating line, plus the innermost application frame that led to it."""
+    frame = traceback[-1]
+    site = f"{_short(frame.filename)}:{frame.lineno}"
+    caller = next((f for f in reversed(traceback) if "/app/" in f.filename), None)
+    if caller is not None and caller is not frame:
+        site += f" (from {_short(caller.filename)}:{caller.lineno})"
+    return site
+
+
+async def _profile(request, recorder: _ResponseSnapshots) -> dict:
+    response = await request()  # the first call fills lazy caches
+    response.raise_for_status()
+
+    tracemalloc.start(TRACEBACK_FRAMES)
+    try:
+        # Peak first, in a pass of its own: snapshots would inflate it
+        peak = 0
+        for _ in range(REQUESTS):
+            gc.collect()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await request()
+            peak += tracemalloc.get_traced_memory()[1] - before
+
+        live_size = live_count = 0
+        sizes: Counter = Counter()
+        counts: Counter = Counter()
+        for _ in range(REQUESTS):
+            gc.collect()
+            baseline = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+            recorder.snapshot = None
+            await request()
+            at_response = recorder.snapshot.filter_traces(_IGNORED)
+            for diff in at_response.compare_to(baseline, "traceback"):
+                if diff.size_diff <= 0:
+                    continue
+                site = _site(diff.traceback)
+                sizes[site] += diff.size_diff
+                counts[site] += diff.count_diff
+                live_size += diff.size_diff
+                live_count += diff.count_diff
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "peak_kib": round(peak / REQUESTS / 1024, 1),
+        "live_kib": round(live_size / REQUESTS / 1024, 1),
+        "live_blocks": round(live_count / REQUESTS),
+        "sites": [
+            (site, round(size / REQUESTS / 1024, 2), round(counts[site] / REQUESTS, 1))
+            for site, size in sizes.most_common(TOP_SITES)
+        ],
+    }
+
+
+async def _measure_all() -> dict[str, dict]:
+    recorder = _ResponseSnapshots()
+    emulator = MapboxEmulator(seed=0)
+    in_memory = os.environ.get("BENCHMARK_IN_MEMORY") == "1"
+    async with running_app(emulator, in_memory=in_memory, asgi_wrapper=recorder.wrap) as client:
+        headers = await sign_in(client)
+        scenarios = await build_scenarios(client, headers, seed=0, seed_searches=25)
+        return {name: await _profile(scenarios[name], recorder) for name in ENDPOINTS}
+
+
+def _format_sites(sites: list) -> str:
+    lines = [f"{'KiB/req':>10}{'blocks/req':>12}  site"]
+    lines += [f"{kib:>10.2f}{blocks:>12.1f}  {site}" for site, kib, blocks in sites]
+    return "\n".join(lines)
+
+
+@pytest.fixture(scope="module")
+def measurements() -> dict[str, dict]:
+    try:
+        results = asyncio.run(_measure_all())
+    except (PyMongoError, RedisError, OSError) as e:
+        pytest.skip(f"MongoDB/Redis not available: {e}")
+    except SystemExit as e:  # in-memory stand-ins not installed
+        pytest.skip(str(e))
+
+    if UPDATE:
+        budgets = {
+            name: {
+                metric: math.ceil(result[metric] * HEADROOM)
+                for metric in ("peak_kib", "live_kib", "live_blocks")
+            }
+            for name, result in results.items()
+        }
+        recorded = {"requests": REQUESTS, "endpoints": budgets}
+        BUDGETS_FILE.write_text(json.dumps(recorded, indent=2) + "\n")
+    return results
+
+
+@pytest.fixture(scope="module")
+def budgets(measurements) -> dict[str, dict]:
+    recorded = json.loads(BUDGETS_FILE.read_text())
+    if recorded["requests"] != REQUESTS:
+        # Fewer requests is a different workload (other routes, other searches)
+        pytest.skip(
+            f"Budgets were recorded with MEMORY_BUDGET_REQUESTS={recorded['requests']}; "
+            f"measured {REQUESTS} per endpoint, so only reporting"
+        )
+    return recorded["endpoints"]
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_allocation_budget(endpoint, measurements, request):
+    measured = measurements[endpoint]
+    print(
+        f"\n{endpoint}: peak {measured['peak_kib']} KiB, live {measured['live_kib']} KiB "
+        f"in {measured['live_blocks']} blocks per request\n{_format_sites(measured['sites'])}"
+    )
+
+    # Requested only now, so the measurements are printed even when it skips
+    budget = request.getfixturevalue("budgets").get(endpoint)
+    if not budget:
+        pytest.fail(
+            f"No budget recorded for {endpoint}; run with UPDATE_MEMORY_BUDGETS=1 "
+            "and commit memory_budgets.json"
+        )
+
+    over = [
+        f"{metric} {measured[metric]} > {limit}"
+        for metric, limit in budget.items()
+        if measured[metric] > limit
+    ]
+    assert not over, (
+        f"{endpoint} exceeds its allocation budget: {', '.join(over)}\n"
+        f"Top allocation sites:\n{_format_sites(measured['sites'])}"
+    )
@@ -0,0 +1,157 @@
+"""CompressionMiddleware: Accept-Encoding negotiation and concurrent encoding."""
+
+import asyncio
+import gzip
+import zlib
+
+import brotli
+import pytest
+import zstandard
+
+from app.middleware.compression_middleware import CompressionMiddleware
+
+CHUNK = b'{"type": "Feature", "coordinates": [13.405, 52.52]}' * 200
+
+
+def _streaming_app(chunks: int):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        for i in range(chunks):
+            # Different content per response, so mixed-up streams can't decode
+            body = CHUNK + str((id(scope), i)).encode()
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+            await asyncio.sleep(0)
+        await send({"type": "http.response.body", "body": b""})
+
+    return app
+
+
+async def _call(app, accept_encoding: str) -> tuple[dict, bytes]:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    headers = {k.decode(): v.decode() for k, v in messages[0]["headers"]}
+    return headers, b"".join(m.get("body", b"") for m in messages[1:])
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("gzip, deflate, br, zstd", "zstd"),
+        ("gzip, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("zstd;q=0, *", "br"),
+        ("identity", None),
+        ("br;q=abc, gzip", "gzip"),
+    ],
+)
+def test_negotiates_preferred_accepted_encoding(accept_encoding, expected):
+    middleware = CompressionMiddleware(_streaming_app(1))
+    assert middleware._select_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize(
+    ("encoding", "decompress"),
+    [
+        (
+            "zstd",
+            lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+        ),
+        ("br", brotli.decompress),
+        ("gzip", gzip.decompress),
+    ],
+)
+async def test_streaming_response_round_trips(encoding, decompress):
+    middleware = CompressionMiddleware(_streaming_app(3), minimum_size=1)
+    headers, body = await _call(middleware, encoding)
+    assert headers["content-encoding"] == encoding
+    assert "content-length" not in headers
+    assert decompress(body).startswith(CHUNK)
+
+
+async def test_small_bodies_are_not_compressed():
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    headers, body = await _call(CompressionMiddleware(app, minimum_size=1024), "gzip")
+    assert "content-encoding" not in headers
+    assert body == b"{}"
+
+
+async def test_concurrent_zstd_streams_do_not_share_compressor_state():
+    # Every chunk goes through a worker thread, interleaved across responses
+    middleware = CompressionMiddleware(
+        _streaming_app(20), minimum_size=1, offload_size=1
+    )
+    results = await asyncio.gather(*(_call(middleware, "zstd") for _ in range(8)))
+
+    for headers, body in results:
+        assert headers["content-encoding"] == "zstd"
+        decompressed = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+        assert decompressed.count(CHUNK) == 20
+
+
+async def test_concurrent_one_shot_zstd_bodies_decompress():
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": CHUNK * scope["copies"]})
+
+    middleware = CompressionMiddleware(app, minimum_size=1, offload_size=1)
+
+    async def call(copies: int) -> bytes:
+        scope = {
+            "type": "http",
+            "copies": copies,
+            "headers": [(b"accept-encoding", b"zstd")],
+        }
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware(scope, None, send)
+        return messages[1]["body"]
+
+    bodies = await asyncio.gather(*(call(copies) for copies in range(1, 9)))
+    for copies, body in enumerate(bodies, start=1):
+        assert zstandard.ZstdDecompressor().decompress(body) == CHUNK * copies
+
+
+def test_gzip_stream_is_deterministic():
+    # mtime=0: identical bodies give identical bytes (stable weak ETags, caches)
+    middleware = CompressionMiddleware(_streaming_app(1))
+    encoder = middleware.encoders["gzip"]
+    assert encoder.compress(CHUNK) == encoder.compress(CHUNK)
+    assert zlib.decompress(encoder.compress(CHUNK), 31) == CHUNK
@@ -0,0 +1,62 @@
+"""AdaptiveConcurrencyMiddleware: which outcomes cut the concurrency limit."""
+
+import asyncio
+
+import pytest
+
+from app.middleware.concurrency_middleware import AdaptiveConcurrencyMiddleware
+
+REQUESTS = 30
+
+
+def _app_returning(status: int):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    return app
+
+
+async def _timing_out(scope, receive, send):
+    raise TimeoutError
+
+
+async def _call(middleware: AdaptiveConcurrencyMiddleware) -> None:
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/searches"}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await middleware(scope, receive, send)
+
+
+async def _limit_after(app) -> float:
+    middleware = AdaptiveConcurrencyMiddleware(app)
+    middleware.enabled = True
+    limiter = middleware._limits[middleware._route_class("/api/v1/searches")]
+    initial = limiter.limit
+    for _ in range(REQUESTS):
+        try:
+            await _call(middleware)
+        except TimeoutError:
+            pass
+        # Decreases are spaced by the typical latency
+        await asyncio.sleep(0.001)
+    return limiter.limit / initial
+
+
+@pytest.mark.parametrize("status", [200, 400, 404, 500, 502])
+async def test_ordinary_responses_do_not_cut_the_limit(status):
+    assert await _limit_after(_app_returning(status)) >= 1
+
+
+@pytest.mark.parametrize("status", [408, 503, 504])
+async def test_timeouts_and_unavailable_cut_the_limit(status):
+    assert await _limit_after(_app_returning(status)) < 1
+
+
+async def test_raised_timeout_cuts_the_limit():
+    assert await _limit_after(_timing_out) < 1
@@ -0,0 +1,130 @@
+"""Request deadlines: TimeoutMiddleware budgets and their propagation downstream."""
+
+import asyncio
+import time
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.connections.instrumentation import InstrumentedRedis
+from app.features.routes.mapbox import MAPBOX_TIMEOUT_SECONDS, MapboxClient
+from app.middleware.server_middleware import TimeoutMiddleware
+from app.utils import deadline
+
+
+@pytest.fixture
+def within():
+    """Give the rest of the test ``seconds`` of budget, as TimeoutMiddleware would."""
+
+    def set_budget(seconds: float) -> None:
+        deadline.deadline_var.set(time.monotonic() + seconds)
+
+    yield set_budget
+    # Async tests run in their own context; only a sync test's value can leak
+    deadline.deadline_var.set(None)
+
+
+def test_timeout_for_is_capped_by_the_deadline(within):
+    assert deadline.remaining() is None
+    assert deadline.timeout_for(5.0) == 5.0
+
+    within(1.0)
+    assert 0.9 < deadline.timeout_for(5.0) <= 1.0
+    assert deadline.timeout_for(0.5) == 0.5
+    with deadline.detached():
+        assert deadline.remaining() is None
+
+    within(-0.1)
+    with pytest.raises(deadline.DeadlineExceeded) as excinfo:
+        deadline.timeout_for(5.0, "mapbox directions")
+    assert excinfo.value.status_code == 504
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/api/v1/routes/slow")
+    async def slow(seconds: float = 1.0):
+        await asyncio.sleep(seconds)
+        return {"left": deadline.remaining()}
+
+    @app.get("/api/v1/admin/profile")
+    async def profile():
+        await asyncio.sleep(0.1)
+        return {"left": deadline.remaining()}
+
+    app.add_middleware(
+        TimeoutMiddleware,
+        timeout_seconds=5,
+        exempt_prefixes=("/api/v1/admin",),
+        route_budgets={"/api/v1": 2.0, "/api/v1/routes": 0.05},
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+async def test_middleware_applies_the_most_specific_budget():
+    async with _app() as client:
+        fast = await client.get("/api/v1/routes/slow", params={"seconds": 0})
+        slow = await client.get("/api/v1/routes/slow")
+        exempt = await client.get("/api/v1/admin/profile")
+
+    assert 0 < fast.json()["left"] <= 0.05
+    assert slow.status_code == 408
+    assert slow.json()["message"] == "Request took longer than 0.05 seconds"
+    assert exempt.status_code == 200
+    assert exempt.json()["left"] is None
+
+
+class _Upstream(httpx.AsyncBaseTransport):
+    """Answers after ``delay``, honouring the request's read timeout like a socket."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.read_timeout = None
+
+    async def handle_async_request(self, request):
+        self.read_timeout = request.extensions["timeout"]["read"]
+        try:
+            async with asyncio.timeout(self.read_timeout):
+                await asyncio.sleep(self.delay)
+        except TimeoutError as e:
+            raise httpx.ReadTimeout("timed out", request=request) from e
+        return httpx.Response(200, json={"routes": []})
+
+
+def _mapbox(delay: float = 0.0):
+    upstream = _Upstream(delay)
+    return MapboxClient("token", httpx.AsyncClient(transport=upstream)), upstream
+
+
+async def test_mapbox_timeout_follows_the_deadline(within):
+    mapbox, upstream = _mapbox()
+    await mapbox.get_directions(profile="driving", coordinates=[[0, 0], [1, 1]])
+    assert upstream.read_timeout == MAPBOX_TIMEOUT_SECONDS
+
+    within(0.5)
+    await mapbox.get_directions(profile="driving", coordinates=[[0, 0], [1, 1]])
+    assert upstream.read_timeout <= 0.5
+
+
+async def test_mapbox_cut_short_by_the_deadline_raises_deadline_exceeded(within):
+    mapbox, _ = _mapbox(delay=1.0)
+    within(0.05)
+    with pytest.raises(deadline.DeadlineExceeded):
+        await mapbox.get_directions(profile="driving", coordinates=[[0, 0], [1, 1]])
+
+
+async def test_redis_calls_are_bounded_by_the_deadline(within):
+    redis = InstrumentedRedis(
+        connection_pool=fakeredis.FakeAsyncRedis().connection_pool
+    )
+    within(1.0)
+    assert await redis.set("key", "value")
+
+    within(-0.1)
+    with pytest.raises(deadline.DeadlineExceeded):
+        await redis.get("key")
@@ -0,0 +1,184 @@
+"""MongoDB command listener and outbound HTTP hooks: latency, cost, spans."""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import StatusCode
+
+from app.config.settings import get_settings
+from app.connections import instrumentation
+from app.connections.http import create_http_client
+from app.connections.instrumentation import (
+    MongoCommandListener,
+    http_client_request_duration_seconds,
+    mongo_command_duration_seconds,
+    observe_http_error,
+)
+from app.features.routes.mapbox import MapboxClient
+from app.middleware.server_middleware import metrics_registry
+from app.utils import tracing
+from app.utils.request_cost import RequestCost, request_cost_var
+
+DIRECTIONS = "https://api.mapbox.com/directions/v5/mapbox/driving/0,0;1,1"
+
+
+def _count(histogram, **labels) -> float:
+    return next(
+        sample.value
+        for sample in histogram.labels(**labels).collect()[0].samples
+        if sample.name.endswith("_count")
+    )
+
+
+def _slow(dependency: str) -> float:
+    labels = {"dependency": dependency}
+    return metrics_registry.get_sample_value("slow_operations_total", labels) or 0
+
+
+@pytest.fixture
+def cost():
+    cost = RequestCost()
+    token = request_cost_var.set(cost)
+    yield cost
+    request_cost_var.reset(token)
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracing.setup_tracing(get_settings(), exporter=exporter, sampling_ratio=1.0)
+    yield exporter
+    tracing.shutdown_tracing()
+
+
+def _event(name, command, *, request_id=1, micros=1500):
+    return SimpleNamespace(
+        command_name=name,
+        command=command,
+        database_name="shipthis",
+        request_id=request_id,
+        connection_id=("localhost", 27017),
+        operation_id=request_id,
+        duration_micros=micros,
+        failure=None,
+    )
+
+
+def _with_failure(event):
+    return SimpleNamespace(**{**vars(event), "failure": {"errmsg": "cursor killed"}})
+
+
+def test_mongo_commands_are_timed_per_collection(cost, exporter):
+    listener = MongoCommandListener()
+    before = _count(
+        mongo_command_duration_seconds,
+        collection="searches",
+        command="find",
+        status="ok",
+    )
+
+    find = _event("find", {"find": "searches"})
+    listener.started(find)
+    listener.succeeded(find)
+    get_more = _event(
+        "getMore", {"getMore": 123, "collection": "searches"}, request_id=2
+    )
+    listener.started(get_more)
+    listener.failed(_with_failure(get_more))
+
+    assert (
+        _count(
+            mongo_command_duration_seconds,
+            collection="searches",
+            command="find",
+            status="ok",
+        )
+        == before + 1
+    )
+    assert cost.calls["mongo"] == 2
+    assert cost.durations["mongo"] == pytest.approx(0.003)
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert (
+        spans["mongo find searches"].attributes["db.mongodb.collection"] == "searches"
+    )
+    assert spans["mongo getMore searches"].status.status_code == StatusCode.ERROR
+
+
+def test_handshakes_are_ignored(cost):
+    listener = MongoCommandListener()
+    hello = _event("hello", {"hello": 1})
+    listener.started(hello)
+    listener.succeeded(hello)
+    assert cost.calls == {}
+
+
+async def test_http_calls_are_timed_traced_and_propagated(cost, exporter):
+    seen = {}
+
+    def upstream(request):
+        seen["traceparent"] = request.headers.get("traceparent")
+        return httpx.Response(200, json={"routes": []})
+
+    async with create_http_client(transport=httpx.MockTransport(upstream)) as client:
+        before = _count(
+            http_client_request_duration_seconds,
+            service="mapbox",
+            operation="directions/driving",
+            status="200",
+        )
+        await client.get(DIRECTIONS)
+
+    assert (
+        _count(
+            http_client_request_duration_seconds,
+            service="mapbox",
+            operation="directions/driving",
+            status="200",
+        )
+        == before + 1
+    )
+    assert cost.calls["mapbox"] == 1
+    (span,) = exporter.get_finished_spans()
+    assert span.name == "mapbox directions/driving"
+    assert span.attributes["http.response.status_code"] == 200
+    assert seen["traceparent"].split("-")[1] == format(span.context.trace_id, "032x")
+
+
+async def test_transport_errors_are_recorded(cost, exporter):
+    def refused(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = create_http_client(transport=httpx.MockTransport(refused))
+    async with client:
+        with pytest.raises(httpx.ConnectError):
+            await MapboxClient("token", client).get_directions(
+                profile="driving", coordinates=[[0, 0], [1, 1]]
+            )
+
+    assert (
+        _count(
+            http_client_request_duration_seconds,
+            service="mapbox",
+            operation="directions/driving",
+            status="ConnectError",
+        )
+        >= 1
+    )
+    (span,) = exporter.get_finished_spans()
+    assert span.status.status_code == StatusCode.ERROR
+    # Errors raised before a request exists are ignored
+    observe_http_error(httpx.HTTPError("no request"))
+
+
+def test_slow_operations_are_counted(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_slow_threshold", 0.001)
+    before = _slow("mongo")
+    listener = MongoCommandListener()
+    slow = _event("aggregate", {"aggregate": "searches"}, micros=250_000)
+    listener.started(slow)
+    listener.succeeded(slow)
+    assert _slow("mongo") == before + 1
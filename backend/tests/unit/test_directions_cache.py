@@ -0,0 +1,220 @@
+"""Directions cache, the corridor warmer that fills it, and route calculation through it."""
+
+from datetime import datetime
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.features.routes.directions_cache import DirectionsCache
+from app.features.routes.dto import RouteCalculateRequest
+from app.features.routes.mapbox import DRIVING_PROFILE
+from app.features.routes.service import RouteService
+from app.features.routes.warmer import CorridorWarmer
+
+BERLIN_PARIS = [[13.404954, 52.520008], [2.352222, 48.856613]]
+
+
+class _Mapbox:
+    """Directions with two alternatives; counts calls and can fail."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def get_directions(self, *, profile, coordinates, alternatives):
+        self.calls.append(coordinates)
+        if self.fail:
+            raise RuntimeError("mapbox down")
+        line = {"type": "LineString", "coordinates": coordinates}
+        return {
+            "code": "Ok",
+            "routes": [
+                {
+                    "distance": 1_050_000,
+                    "duration": 36_000,
+                    "geometry": line,
+                    "legs": [{}],
+                },
+                {
+                    "distance": 1_100_000,
+                    "duration": 34_000,
+                    "geometry": line,
+                    "legs": [{}],
+                },
+            ],
+            "waypoints": [],
+        }
+
+
+class _Corridors:
+    def __init__(self, rows):
+        self.rows = rows
+        self.saved = []
+
+    async def top_corridors(self, *, since, limit):
+        assert isinstance(since, datetime)
+        return self.rows[:limit]
+
+    async def save(self, **search):
+        self.saved.append(search)
+
+
+class _Versions:
+    async def begin_change(self, user_id):
+        pass
+
+    async def bump(self, user_id, settle=0):
+        return 1
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture
+def cache(redis):
+    return DirectionsCache(redis, ttl=3600)
+
+
+def test_key_rounds_coordinates():
+    near = [[13.40496, 52.52003], [2.35219, 48.85658]]
+    assert DirectionsCache.key(DRIVING_PROFILE, BERLIN_PARIS) == DirectionsCache.key(
+        DRIVING_PROFILE, near
+    )
+    assert DirectionsCache.key(DRIVING_PROFILE, BERLIN_PARIS).startswith("directions:")
+    far = [[13.41, 52.52], [2.35, 48.85]]
+    assert DirectionsCache.key(DRIVING_PROFILE, BERLIN_PARIS) != DirectionsCache.key(
+        DRIVING_PROFILE, far
+    )
+
+
+async def test_get_or_fetch_stores_a_compact_response(cache, redis):
+    mapbox = _Mapbox()
+    first = await cache.get_or_fetch(mapbox, DRIVING_PROFILE, BERLIN_PARIS)
+    second = await cache.get_or_fetch(mapbox, DRIVING_PROFILE, BERLIN_PARIS)
+
+    assert len(mapbox.calls) == 1
+    assert first == second
+    assert set(first) == {"routes"}
+    assert set(first["routes"][0]) == {"distance", "duration", "geometry"}
+    (key,) = await redis.keys("directions:*")
+    assert 0 < await redis.ttl(key) <= 3600
+
+
+async def test_redis_errors_fall_back_to_mapbox(monkeypatch, cache):
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(cache.redis, "get", unavailable)
+    monkeypatch.setattr(cache.redis, "set", unavailable)
+    mapbox = _Mapbox()
+    response = await cache.get_or_fetch(mapbox, DRIVING_PROFILE, BERLIN_PARIS)
+    assert response["routes"]
+    assert len(mapbox.calls) == 1
+
+
+async def test_ttls_of_missing_and_cached_keys(cache):
+    await cache.fetch(_Mapbox(), DRIVING_PROFILE, BERLIN_PARIS)
+    cached = cache.key(DRIVING_PROFILE, BERLIN_PARIS)
+    missing = cache.key(DRIVING_PROFILE, [[0.0, 0.0], [1.0, 1.0]])
+    ttl_cached, ttl_missing = await cache.ttls([cached, missing])
+    assert 0 < ttl_cached <= 3600
+    assert ttl_missing == -2
+
+
+def _corridor(origin, destination):
+    return {"_id": {"origin": origin, "destination": destination}, "searches": 3}
+
+
+def _warmer(repo, mapbox, cache, redis, **options):
+    return CorridorWarmer(
+        repo,
+        mapbox,
+        cache,
+        redis,
+        **{
+            "top_n": 10,
+            "lookback_days": 30,
+            "interval": 60,
+            "rate_per_second": 1000,
+            "refresh_before": 600,
+            **options,
+        },
+    )
+
+
+async def test_warm_once_fetches_only_cold_corridors(cache, redis):
+    cold = [[9.99, 53.55], [11.58, 48.14]]
+    repo = _Corridors(
+        [
+            _corridor(*BERLIN_PARIS),
+            _corridor(*cold),
+            _corridor([4.83, 45.76], None),  # malformed: skipped
+        ]
+    )
+    await cache.fetch(_Mapbox(), DRIVING_PROFILE, BERLIN_PARIS)
+    mapbox = _Mapbox()
+
+    summary = await _warmer(repo, mapbox, cache, redis).warm_once()
+
+    assert mapbox.calls == [cold]
+    assert summary == {
+        "corridors": 2,
+        "refreshed": 1,
+        "failed": 0,
+        "coverage_before": 0.5,
+        "coverage_after": 1.0,
+    }
+
+
+async def test_warm_once_refreshes_entries_about_to_expire(redis):
+    cache = DirectionsCache(redis, ttl=300)
+    await cache.fetch(_Mapbox(), DRIVING_PROFILE, BERLIN_PARIS)
+    mapbox = _Mapbox()
+    summary = await _warmer(
+        _Corridors([_corridor(*BERLIN_PARIS)]), mapbox, cache, redis
+    ).warm_once()
+    assert len(mapbox.calls) == 1
+    assert summary["coverage_before"] == summary["coverage_after"] == 1.0
+
+
+async def test_warm_once_stops_after_consecutive_failures(cache, redis):
+    repo = _Corridors([_corridor([float(i), 10.0], [float(i), 11.0]) for i in range(8)])
+    mapbox = _Mapbox(fail=True)
+    summary = await _warmer(repo, mapbox, cache, redis).warm_once()
+    assert len(mapbox.calls) == 5
+    assert summary["failed"] == 5
+    assert summary["coverage_after"] == 0.0
+
+
+async def test_one_worker_claims_each_cycle(cache, redis):
+    repo = _Corridors([])
+    first = _warmer(repo, _Mapbox(), cache, redis)
+    second = _warmer(repo, _Mapbox(), cache, redis)
+    assert await first._claim_cycle()
+    assert not await second._claim_cycle()
+
+
+async def test_calculate_uses_the_cache(cache):
+    mapbox = _Mapbox()
+    repo = _Corridors([])
+    service = RouteService(mapbox, repo, _Versions(), directions_cache=cache)
+    payload = RouteCalculateRequest(
+        origin={"name": "Berlin", "lng": 13.404954, "lat": 52.520008},
+        destination={"name": "Paris", "lng": 2.352222, "lat": 48.856613},
+        cargo_weight_kg=2000,
+        transport_mode="land",
+    )
+
+    first = await service.calculate(user_id="u1", payload=payload)
+    second = await service.calculate(user_id="u1", payload=payload)
+
+    assert len(mapbox.calls) == 1
+    assert first == second
+    assert first["shortest_route"]["distance_km"] == 1050
+    assert first["efficient_route"]["co2_emissions_kg"] == pytest.approx(
+        1050 * 2 * 0.062
+    )
+    assert len(repo.saved) == 2
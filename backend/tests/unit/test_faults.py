@@ -0,0 +1,161 @@
+"""Fault and latency injection: rules, the injector, and the clients applying it."""
+
+import random
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI
+from pydantic import ValidationError
+from redis.exceptions import ConnectionError, TimeoutError
+
+from app.config.settings import get_settings
+from app.connections.http import create_http_client
+from app.connections.instrumentation import InstrumentedRedis
+from app.features.admin.router import router as admin_router
+from app.middleware.server_middleware import request_path_var
+from app.utils.faults import Fault, FaultRule, fault_injector
+
+ADMIN_KEY = "admin-secret"
+
+
+@pytest.fixture(autouse=True)
+def _reset_injector():
+    yield
+    fault_injector.configure(enabled=False, rules=[])
+
+
+def _inject(*rules, seed=0):
+    fault_injector.configure(enabled=True, rules=[FaultRule(**r) for r in rules])
+    fault_injector._rng = random.Random(seed)
+
+
+def test_rule_validation():
+    with pytest.raises(ValidationError):
+        FaultRule(target="redis", error_percentage=60, timeout_percentage=50)
+    with pytest.raises(ValidationError):
+        FaultRule(target="mongo", error_percentage=10)
+    assert FaultRule(target="mongo", timeout_percentage=10).percentage == 100
+
+
+def test_latency_distributions():
+    rng = random.Random(1)
+    assert FaultRule(target="redis", latency_ms=50).latency(rng) == 0.05
+    uniform = FaultRule(
+        target="redis", latency_ms=50, jitter_ms=20, distribution="uniform"
+    )
+    assert all(0.05 <= uniform.latency(rng) <= 0.07 for _ in range(100))
+    tail = FaultRule(
+        target="redis", latency_ms=50, jitter_ms=20, distribution="exponential"
+    )
+    assert all(tail.latency(rng) >= 0.05 for _ in range(100))
+
+
+def test_timeout_hangs_for_the_call_timeout():
+    assert Fault("redis", 0.01, "timeout").hang_for(2.0) == 2.0
+    assert Fault("redis", 0.01, "timeout").hang_for(None) == 0.01
+    assert Fault("redis", 0.01, "latency").hang_for(2.0) == 0.01
+
+
+def test_pick_matches_target_route_and_share():
+    assert fault_injector.pick("redis") is None  # disabled
+
+    _inject(
+        {"target": "mapbox", "route": "/api/v1/routes", "error_percentage": 100},
+        {"target": "mapbox", "latency_ms": 5},
+    )
+    token = request_path_var.set("/api/v1/routes/calculate")
+    try:
+        assert fault_injector.pick("mapbox").outcome == "error"
+    finally:
+        request_path_var.reset(token)
+    # Other paths fall through to the next rule
+    assert fault_injector.pick("mapbox") == Fault("mapbox", 0.005, "latency")
+    assert fault_injector.pick("redis") is None
+
+    _inject({"target": "redis", "percentage": 25, "timeout_percentage": 100})
+    picks = [fault_injector.pick("redis") for _ in range(2000)]
+    hit = [p for p in picks if p is not None]
+    assert 400 < len(hit) < 600
+    assert {p.outcome for p in hit} == {"timeout"}
+
+
+async def _mapbox_call():
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+    async with create_http_client(transport=upstream) as client:
+        return await client.get(
+            "https://api.mapbox.com/directions/v5/mapbox/driving/0,0;1,1",
+            timeout=httpx.Timeout(0.01),
+        )
+
+
+async def test_http_faults():
+    assert (await _mapbox_call()).status_code == 200
+
+    _inject({"target": "mapbox", "error_percentage": 100})
+    response = await _mapbox_call()
+    assert response.status_code == 503
+    assert response.json() == {"message": "Injected fault"}
+
+    _inject({"target": "mapbox", "timeout_percentage": 100})
+    with pytest.raises(httpx.ReadTimeout):
+        await _mapbox_call()
+
+
+async def test_redis_faults():
+    fake = fakeredis.FakeAsyncRedis()
+    redis = InstrumentedRedis(connection_pool=fake.connection_pool)
+
+    _inject({"target": "redis", "error_percentage": 100})
+    with pytest.raises(ConnectionError):
+        await redis.get("key")
+
+    _inject({"target": "redis", "timeout_percentage": 100})
+    with pytest.raises(TimeoutError):
+        await redis.get("key")
+
+    _inject({"target": "redis", "latency_ms": 1})
+    assert await redis.set("key", "value")
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(get_settings(), "ADMIN_API_KEY", ADMIN_KEY)
+    app = FastAPI()
+    app.include_router(admin_router)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+        headers={"X-Admin-Key": ADMIN_KEY},
+    )
+
+
+async def test_admin_endpoints_replace_and_clear_rules(admin, monkeypatch):
+    rules = [{"target": "redis", "latency_ms": 20}]
+    async with admin:
+        response = await admin.put(
+            "/api/v1/admin/faults", json={"enabled": True, "rules": rules}
+        )
+        assert response.status_code == 200
+        assert fault_injector.enabled
+        assert (await admin.get("/api/v1/admin/faults")).json()["rules"][0][
+            "latency_ms"
+        ] == 20
+
+        assert (await admin.delete("/api/v1/admin/faults")).json() == {
+            "enabled": False,
+            "rules": [],
+        }
+        assert not fault_injector.enabled
+
+        monkeypatch.setattr(get_settings(), "ENVIRONMENT", "production")
+        refused = await admin.put(
+            "/api/v1/admin/faults", json={"enabled": True, "rules": rules}
+        )
+        assert refused.status_code == 403
+        assert not fault_injector.enabled
+
+        forbidden = await admin.get(
+            "/api/v1/admin/faults", headers={"X-Admin-Key": "wrong"}
+        )
+        assert forbidden.status_code == 403
@@ -0,0 +1,132 @@
+"""Background health sampling and the probes served from its snapshot."""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+
+from app.features.health import sampler as sampler_module
+from app.features.health.router import router as health_router
+from app.features.health.sampler import HealthSampler, _overall_status
+
+
+class _Redis:
+    def __init__(self, hang: bool = False):
+        self.hang = hang
+
+    async def ping(self):
+        if self.hang:
+            await asyncio.sleep(10)
+        return True
+
+    async def info(self):
+        return {"redis_version": "7.2.4", "connected_clients": 3}
+
+
+async def _refused(name):
+    raise ConnectionError("connection refused")
+
+
+_DOWN_MONGO = SimpleNamespace(admin=SimpleNamespace(command=_refused))
+
+
+@pytest.fixture(autouse=True)
+def _healthy_host(monkeypatch):
+    monkeypatch.setattr(sampler_module, "check_memory", lambda: {"status": "healthy"})
+    monkeypatch.setattr(sampler_module, "check_disk", lambda: {"status": "healthy"})
+
+
+def _sampler(mongo=None, redis=None, interval=60.0):
+    return HealthSampler(mongo, redis, interval=interval, check_timeout=0.05)
+
+
+def _client(sampler):
+    app = FastAPI()
+    app.include_router(health_router)
+    if sampler is not None:
+        app.state.health_sampler = sampler
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+def test_overall_status():
+    assert _overall_status({"a": {"status": "healthy"}}) == "healthy"
+    assert (
+        _overall_status({"a": {"status": "healthy"}, "b": {"status": "warning"}})
+        == "degraded"
+    )
+    assert (
+        _overall_status({"a": {"status": "warning"}, "b": {"status": "unhealthy"}})
+        == "unhealthy"
+    )
+
+
+async def test_healthy_dependencies_make_the_worker_ready():
+    sampler = _sampler(AsyncMongoMockClient(), _Redis())
+    await sampler.start()
+    try:
+        assert sampler.snapshot["status"] == "healthy"
+        assert sampler.snapshot["checks"]["redis"]["version"] == "7.2.4"
+        assert sampler.ready
+        assert sampler.age < 1
+    finally:
+        await sampler.stop()
+
+
+async def test_failing_checks_are_reported_not_raised():
+    sampler = _sampler(_DOWN_MONGO, _Redis(hang=True))
+    await sampler.refresh()
+    checks = sampler.snapshot["checks"]
+    assert checks["database"]["state"] == "disconnected"
+    assert checks["redis"]["state"] == "timeout"
+    assert sampler.snapshot["status"] == "unhealthy"
+    assert not sampler.ready
+
+    unconfigured = _sampler()
+    await unconfigured.refresh()
+    assert unconfigured.snapshot["checks"]["redis"]["state"] == "not_configured"
+
+
+async def test_stale_snapshot_is_not_ready():
+    sampler = _sampler(AsyncMongoMockClient(), interval=1.0)
+    await sampler.refresh()
+    assert sampler.ready
+    sampler.snapshot["timestamp"] -= 10
+    assert not sampler.ready
+
+
+async def test_sampler_keeps_refreshing():
+    sampler = _sampler(AsyncMongoMockClient(), interval=0.01)
+    await sampler.start()
+    first = sampler.snapshot["timestamp"]
+    await asyncio.sleep(0.1)
+    await sampler.stop()
+    assert sampler.snapshot["timestamp"] > first
+
+
+async def test_probes():
+    sampler = _sampler(AsyncMongoMockClient())
+    await sampler.refresh()
+    async with _client(sampler) as client:
+        live = await client.get("/api/v1/health/livez")
+        ready = await client.get("/api/v1/health/readyz")
+        health = await client.get("/api/v1/health/")
+        info = await client.get("/api/v1/health/self")
+    assert live.json() == {"status": "alive"}
+    assert ready.json() == {"status": "ready"}
+    assert health.status_code == 200
+    assert "sampleAge" in health.json()["data"]
+    assert info.status_code == 200
+
+
+async def test_probes_before_the_first_sample():
+    async with _client(None) as client:
+        ready = await client.get("/api/v1/health/readyz")
+        health = await client.get("/api/v1/health/")
+    assert ready.status_code == 503
+    assert health.status_code == 503
+    assert health.json()["data"]["status"] == "starting"
@@ -0,0 +1,103 @@
+"""HTTP metrics labelled by route template, with a cap on distinct endpoints."""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.middleware.server_middleware import (
+    OTHER_ENDPOINT,
+    MetricsMiddleware,
+    _normalize_path,
+    metrics_registry,
+)
+
+OBJECT_ID = "65f1c2a9e4b0a1b2c3d4e5f6"
+
+
+def _count(project, endpoint, status_code="200", method="GET"):
+    value = metrics_registry.get_sample_value(
+        "http_requests_total",
+        {
+            "method": method,
+            "endpoint": endpoint,
+            "status_code": status_code,
+            "project": project,
+        },
+    )
+    return value or 0
+
+
+def _client(project, max_endpoints=200):
+    app = FastAPI()
+
+    @app.get("/api/v1/searches/{search_id}")
+    async def search(search_id: str):
+        return {"id": search_id}
+
+    @app.post("/api/v1/echo")
+    async def echo(body: dict):
+        return body
+
+    app.add_middleware(
+        MetricsMiddleware, project_name=project, max_endpoints=max_endpoints
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    [
+        ("/metrics", "/metrics"),
+        ("/api/v1/users/42", "/api/v1/users/{id}"),
+        (f"/api/v1/searches/{OBJECT_ID}", "/api/v1/searches/{id}"),
+        (
+            "/api/v1/jobs/123e4567-e89b-12d3-a456-426614174000/logs",
+            "/api/v1/jobs/{id}/logs",
+        ),
+        ("/api/v1/searches/recent", "/api/v1/searches/recent"),
+    ],
+)
+def test_unmatched_paths_are_normalized(path, expected):
+    assert _normalize_path(path) == expected
+
+
+async def test_requests_are_labelled_with_the_route_template():
+    async with _client("metrics-template") as client:
+        for search_id in ("a", "b", OBJECT_ID):
+            await client.get(f"/api/v1/searches/{search_id}")
+        await client.get("/api/v1/missing/42")
+
+    assert _count("metrics-template", "/api/v1/searches/{search_id}") == 3
+    assert _count("metrics-template", "/api/v1/missing/{id}", "404") == 1
+
+
+async def test_endpoint_labels_are_capped():
+    async with _client("metrics-capped", max_endpoints=2) as client:
+        await client.get("/api/v1/searches/a")
+        for i in range(3):
+            await client.get(f"/unknown-{i}")
+
+    assert _count("metrics-capped", "/api/v1/searches/{search_id}") == 1
+    assert _count("metrics-capped", "/unknown-0", "404") == 1
+    assert _count("metrics-capped", OTHER_ENDPOINT, "404") == 2
+
+
+async def test_request_and_response_sizes():
+    async with _client("metrics-sizes") as client:
+        response = await client.post("/api/v1/echo", json={"a": "x" * 100})
+
+    labels = {"method": "POST", "endpoint": "/api/v1/echo", "project": "metrics-sizes"}
+    request_size = metrics_registry.get_sample_value(
+        "http_request_size_bytes_sum", labels
+    )
+    response_size = metrics_registry.get_sample_value(
+        "http_response_size_bytes_sum", labels
+    )
+    assert request_size == len(response.request.content)
+    assert response_size == len(response.content)
+    in_progress = metrics_registry.get_sample_value(
+        "http_requests_in_progress", {"method": "POST", "project": "metrics-sizes"}
+    )
+    assert in_progress == 0
@@ -0,0 +1,140 @@
+"""IdempotencyStore: replay, conflicts, concurrent duplicates and failures."""
+
+import asyncio
+
+import fakeredis
+import orjson
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.features.routes.idempotency import (
+    REPLAYED_HEADER,
+    IdempotencyKeyInProgress,
+    IdempotencyKeyMismatch,
+    IdempotencyStore,
+)
+
+BODY = b'{"origin": "Berlin", "destination": "Paris"}'
+
+
+class _Calculation:
+    """Counts executions; optionally holds each one until released."""
+
+    def __init__(self, hold: bool = False):
+        self.calls = 0
+        self.release = asyncio.Event()
+        if not hold:
+            self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return {"route": self.calls}
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture
+def store(redis):
+    return IdempotencyStore(redis, ttl=60, lock_ttl=10, wait=1.0)
+
+
+async def _run(store, execute, *, key="key-1", body=BODY, scope="user-1"):
+    return await store.run(scope=scope, key=key, body=body, execute=execute)
+
+
+async def test_replays_the_stored_response(store):
+    calculation = _Calculation()
+    first = await _run(store, calculation)
+    again = await _run(store, calculation)
+
+    assert calculation.calls == 1
+    assert again.body == first.body
+    assert orjson.loads(again.body) == {"route": 1}
+    assert again.status_code == first.status_code == 200
+    assert again.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+
+
+async def test_reused_key_with_another_body_is_rejected(store):
+    calculation = _Calculation()
+    await _run(store, calculation)
+    with pytest.raises(IdempotencyKeyMismatch) as excinfo:
+        await _run(store, calculation, body=b'{"origin": "Rome"}')
+    assert excinfo.value.status_code == 422
+    assert calculation.calls == 1
+
+
+async def test_keys_are_scoped_per_user(store):
+    calculation = _Calculation()
+    await _run(store, calculation, scope="user-1")
+    other = await _run(store, calculation, scope="user-2")
+    assert calculation.calls == 2
+    assert REPLAYED_HEADER not in other.headers
+
+
+async def test_concurrent_duplicate_waits_for_the_first(store):
+    calculation = _Calculation(hold=True)
+    first = asyncio.create_task(_run(store, calculation))
+    await asyncio.sleep(0.01)
+    duplicate = asyncio.create_task(_run(store, calculation))
+    await asyncio.sleep(0.05)
+    calculation.release.set()
+
+    first, duplicate = await asyncio.gather(first, duplicate)
+    assert calculation.calls == 1
+    assert duplicate.body == first.body
+    assert duplicate.headers[REPLAYED_HEADER] == "true"
+
+
+async def test_duplicate_gets_409_while_the_first_is_still_running(redis):
+    store = IdempotencyStore(redis, ttl=60, lock_ttl=10, wait=0.1)
+    calculation = _Calculation(hold=True)
+    first = asyncio.create_task(_run(store, calculation))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(IdempotencyKeyInProgress) as excinfo:
+        await _run(store, calculation)
+    assert excinfo.value.status_code == 409
+
+    # Another body under the same in-flight key is a mismatch, not a wait
+    with pytest.raises(IdempotencyKeyMismatch):
+        await _run(store, calculation, body=b"{}")
+
+    calculation.release.set()
+    await first
+    assert calculation.calls == 1
+
+
+async def test_failed_execution_can_be_retried(store, redis):
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await _run(store, failing)
+    assert await redis.keys("idempotency:*") == []  # lock released, nothing stored
+
+    calculation = _Calculation()
+    retried = await _run(store, calculation)
+    assert calculation.calls == 1
+    assert REPLAYED_HEADER not in retried.headers
+
+
+async def test_executes_without_deduplication_when_redis_is_down(store, monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(store.redis, "hgetall", unavailable)
+    calculation = _Calculation()
+    await _run(store, calculation)
+    await _run(store, calculation)
+    assert calculation.calls == 2
+
+
+async def test_stored_response_expires(store, redis):
+    await _run(store, _Calculation())
+    (response_key,) = await redis.keys("idempotency:*:response")
+    assert 0 < await redis.ttl(response_key) <= 60
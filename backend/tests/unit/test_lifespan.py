@@ -0,0 +1,104 @@
+"""Application startup and shutdown with clients provided on app.state."""
+
+import importlib
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+from redis.exceptions import ConnectionError
+
+from app.config.settings import get_settings
+from app.connections.http import create_http_client
+from app.utils.startup import StartupTimer
+
+# app.lifecycle re-exports the lifespan function under the module's name
+lifespan_module = importlib.import_module("app.lifecycle.lifespan")
+
+
+class _Upstream:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if self.fail:
+            raise httpx.ConnectError("no route to host", request=request)
+        return httpx.Response(200)
+
+
+@pytest.fixture
+def beanie(monkeypatch):
+    calls = []
+
+    async def init_beanie(*, database, document_models):
+        calls.append([model.__name__ for model in document_models])
+
+    monkeypatch.setattr(lifespan_module, "init_beanie", init_beanie)
+    monkeypatch.setattr(get_settings(), "CORRIDOR_WARMER_ENABLED", False)
+    return calls
+
+
+def _app(redis=None, upstream=None):
+    app = FastAPI()
+    mongo = AsyncMongoMockClient()
+    app.state.mongo_client, app.state.db = mongo, mongo["shipthis"]
+    app.state.redis = redis or fakeredis.FakeAsyncRedis(decode_responses=True)
+    app.state.http_client = create_http_client(
+        transport=httpx.MockTransport(upstream or _Upstream())
+    )
+    return app
+
+
+async def test_startup_connects_and_times_each_phase(beanie):
+    upstream = _Upstream()
+    app = _app(upstream=upstream)
+
+    async with lifespan_module.lifespan(app):
+        assert beanie == [["User", "Search"]]
+        assert app.state.health_sampler.ready
+        assert app.state.loop_monitor.enabled == get_settings().LOOP_MONITOR_ENABLED
+        timings = app.state.startup_timings
+        assert {"tracing", "mongo", "redis", "mapbox", "background_tasks"} <= set(
+            timings
+        )
+        assert timings["process"] >= timings["lifespan"] > 0
+
+    (warm_up,) = upstream.requests
+    assert warm_up.method == "HEAD"
+    assert warm_up.url.host == "api.mapbox.com"
+    assert app.state.http_client.is_closed
+    assert not app.state.loop_monitor.enabled
+
+
+async def test_redis_and_mapbox_failures_do_not_stop_startup(beanie):
+    class _DownRedis(fakeredis.FakeAsyncRedis):
+        async def ping(self, **kwargs):
+            raise ConnectionError("connection refused")
+
+    app = _app(redis=_DownRedis(), upstream=_Upstream(fail=True))
+    async with lifespan_module.lifespan(app):
+        checks = app.state.health_sampler.snapshot["checks"]
+        assert checks["redis"]["status"] == "unhealthy"
+        assert app.state.health_sampler.ready  # Redis does not gate readiness
+
+
+async def test_mongo_failure_is_fatal(monkeypatch):
+    async def init_beanie(**kwargs):
+        raise RuntimeError("authentication failed")
+
+    monkeypatch.setattr(lifespan_module, "init_beanie", init_beanie)
+    with pytest.raises(RuntimeError, match="authentication failed"):
+        async with lifespan_module.lifespan(_app()):
+            pass
+
+
+def test_startup_timer_reports_milliseconds():
+    timer = StartupTimer()
+    with timer.phase("mongo"):
+        pass
+    report = timer.report()
+    assert list(report) == ["mongo", "lifespan", "process"]
+    assert report["mongo"] <= report["lifespan"] <= report["process"]
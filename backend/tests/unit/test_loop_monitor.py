@@ -0,0 +1,72 @@
+"""LoopMonitor: slow-callback reports are labelled by route template, with a cap."""
+
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.middleware.server_middleware import OTHER_ENDPOINT, CorrelationIdMiddleware
+from app.utils import loop_monitor
+from app.utils.loop_monitor import LoopMonitor, event_loop_slow_callbacks_total
+
+
+def _slow_callbacks(route: str) -> float:
+    return event_loop_slow_callbacks_total.labels(route=route)._value.get()
+
+
+async def test_blocking_handler_is_reported_under_its_route_template():
+    app = FastAPI()
+    app.add_middleware(CorrelationIdMiddleware)
+
+    @app.get("/api/v1/searches/{search_id}")
+    def _blocking(search_id: str):
+        return {"id": search_id}
+
+    @app.get("/api/v1/block/{item_id}")
+    async def _block(item_id: str):
+        time.sleep(0.3)  # holds the event loop
+        return {"id": item_id}
+
+    label = "GET /api/v1/block/{item_id}"
+    before = _slow_callbacks(label)
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+    monitor.start()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            for item_id in ("65f0c0ffee", "abc", "xyz"):
+                assert (await client.get(f"/api/v1/block/{item_id}")).status_code == 200
+                # Let the watchdog see the loop idle, so each block is its own stall
+                await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    assert _slow_callbacks(label) - before == 3
+    assert monitor.stalls == 3
+
+
+def test_unmatched_paths_share_the_other_label():
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+    scanner = {"method": "GET", "path": "/wp-admin/setup-config.php"}
+    assert monitor._route_label(scanner) == OTHER_ENDPOINT
+    assert monitor._route_label(None) == OTHER_ENDPOINT
+
+
+def test_route_labels_are_capped(monkeypatch):
+    monkeypatch.setattr(loop_monitor, "_MAX_ROUTE_LABELS", 2)
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+
+    class Route:
+        def __init__(self, path_format):
+            self.path_format = path_format
+
+    labels = [
+        monitor._route_label({"method": "GET", "route": Route(f"/r{i}")})
+        for i in range(4)
+    ]
+    assert labels == ["GET /r0", "GET /r1", OTHER_ENDPOINT, OTHER_ENDPOINT]
+    # Already seen templates keep their label
+    assert monitor._route_label({"method": "GET", "route": Route("/r0")}) == "GET /r0"
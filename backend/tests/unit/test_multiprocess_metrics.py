@@ -0,0 +1,99 @@
+"""Multiprocess Prometheus metrics survive worker recycling without piling up files."""
+
+import os
+import re
+import time
+from pathlib import Path
+
+import pytest
+import uvicorn
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+
+from app.lifecycle import supervisor
+from app.middleware.server_middleware import get_metrics
+
+REQUESTS_PER_WORKER = 5
+RECYCLES = 4
+
+
+def _short_lived_worker(config, sockets, cpu) -> None:
+    """Stands in for a uvicorn worker: record a few requests, then exit."""
+    requests = Counter("recycle_requests_total", "Requests", ["route"], registry=None)
+    latency = Histogram("recycle_latency_seconds", "Latency", registry=None)
+    peak = Gauge("recycle_peak", "Peak", registry=None, multiprocess_mode="max")
+    live = Gauge("recycle_live", "Live", registry=None, multiprocess_mode="livesum")
+    live.set(1)
+    peak.set(os.getpid() % 1000)
+    for _ in range(REQUESTS_PER_WORKER):
+        requests.labels(route="/api/v1/routes/calculate").inc()
+        latency.observe(0.02)
+
+
+def _wait_for_exit(process, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while process.is_alive() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not process.is_alive(), "worker did not exit"
+
+
+def _values(directory: Path) -> dict[str, float]:
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(directory))
+    return {
+        sample.name: sample.value
+        for metric in registry.collect()
+        for sample in metric.samples
+        if not sample.labels.get("le") or sample.labels["le"] == "+Inf"
+    }
+
+
+@pytest.mark.slow
+def test_recycled_workers_are_folded_into_aggregates(tmp_path, monkeypatch):
+    # Spawned workers inherit the environment and store metrics in tmp_path
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(supervisor, "_run_worker", _short_lived_worker)
+    pool = supervisor.WorkerSupervisor(uvicorn.Config("app.main:app"), workers=1)
+
+    pool._spawn(0)
+    pids = []
+    for _ in range(RECYCLES):
+        process = pool._slots[0]
+        _wait_for_exit(process)
+        pids.append(process.pid)
+        pool._reap()  # compacts the exited worker and starts its replacement
+    last = pool._slots[0]
+    _wait_for_exit(last)
+    last.join()
+    pool._cleanup(last)
+    pids.append(last.pid)
+
+    files = sorted(path.name for path in tmp_path.glob("*.db"))
+    assert not [name for name in files if re.search(r"_\d+\.db$", name)], files
+    assert {
+        "counter_aggregate.db",
+        "gauge_max_aggregate.db",
+        "histogram_aggregate.db",
+    } <= set(files)
+
+    values = _values(tmp_path)
+    total = REQUESTS_PER_WORKER * len(pids)
+    assert values["recycle_requests_total"] == total
+    assert values["recycle_latency_seconds_count"] == total
+    assert values["recycle_latency_seconds_bucket"] == total
+    assert values["recycle_peak"] == max(pid % 1000 for pid in pids)
+    assert "recycle_live" not in values
+
+
+@pytest.mark.slow
+def test_scrape_compacts_workers_that_exited_unsupervised(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(supervisor, "_run_worker", _short_lived_worker)
+    pool = supervisor.WorkerSupervisor(uvicorn.Config("app.main:app"), workers=1)
+    pool._spawn(0)
+    _wait_for_exit(pool._slots[0])
+    pool._slots[0].join()
+
+    body, _ = get_metrics()
+
+    assert b'recycle_requests_total{route="/api/v1/routes/calculate"} 5.0' in body
+    assert not list(tmp_path.glob(f"*_{pool._slots[0].pid}.db"))
@@ -0,0 +1,170 @@
+"""Sampling profiler, per-request profiling and the admin profile endpoints."""
+
+import time
+
+import fakeredis
+import httpx
+import orjson
+import pytest
+from fastapi import FastAPI
+
+from app.config.settings import get_settings
+from app.features.admin.router import router as admin_router
+from app.middleware.profiling_middleware import ProfilingMiddleware
+from app.utils.profiler import SamplingProfiler, profile_store
+
+ADMIN_KEY = "admin-secret"
+
+
+def busy(seconds: float) -> int:
+    total = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture
+def app(monkeypatch, redis):
+    monkeypatch.setattr(get_settings(), "ADMIN_API_KEY", ADMIN_KEY)
+    monkeypatch.setattr(get_settings(), "PROFILING_MAX_SECONDS", 1)
+    app = FastAPI()
+    app.state.redis = redis
+    app.include_router(admin_router)
+
+    @app.get("/api/v1/work")
+    async def work():
+        blob = [bytes(1024) for _ in range(200)]
+        return {"iterations": busy(0.05), "allocated": len(blob)}
+
+    app.add_middleware(ProfilingMiddleware, interval=0.001, profile_ttl=60)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+def test_sampling_profiler_records_the_busy_function():
+    profiler = SamplingProfiler(0.001)
+    profiler.start()
+    busy(0.05)
+    profiler.stop()
+
+    assert profiler.duration >= 0.05
+    collapsed = profiler.collapsed()
+    assert "busy" in collapsed
+    line = collapsed.splitlines()[0]
+    assert line.startswith("thread: ")
+    assert int(line.rsplit(" ", 1)[1]) > 0
+
+    document = profiler.speedscope("test")
+    (cpu,) = document["profiles"]
+    assert cpu["unit"] == "milliseconds"
+    assert len(cpu["samples"]) == len(cpu["weights"])
+    names = {frame["name"] for frame in document["shared"]["frames"]}
+    assert "busy" in names
+
+
+async def test_profiles_are_shared_through_redis_and_expire(redis):
+    profiler = SamplingProfiler()
+    await profile_store.add(redis, "abc", "GET /", profiler)
+
+    assert await redis.ttl(profile_store.key("abc")) == profile_store.ttl
+    name, collapsed = await profile_store.get(redis, "abc", "collapsed")
+    assert name == "GET /"
+    assert collapsed == profiler.collapsed()
+    assert await profile_store.get(redis, "other", "speedscope") is None
+
+
+async def test_request_profile_is_stored_and_served(client):
+    async with client:
+        response = await client.get(
+            "/api/v1/work", headers={"X-Profile": "cpu", "X-Admin-Key": ADMIN_KEY}
+        )
+        profile_id = response.headers["X-Profile-Id"]
+
+        document = (
+            await client.get(
+                f"/api/v1/admin/profiles/{profile_id}",
+                headers={"X-Admin-Key": ADMIN_KEY},
+            )
+        ).json()
+        collapsed = await client.get(
+            f"/api/v1/admin/profiles/{profile_id}?format=collapsed",
+            headers={"X-Admin-Key": ADMIN_KEY},
+        )
+        missing = await client.get(
+            "/api/v1/admin/profiles/unknown", headers={"X-Admin-Key": ADMIN_KEY}
+        )
+
+    assert response.status_code == 200
+    assert document["name"] == "GET /api/v1/work"
+    assert document["profiles"][0]["samples"]
+    assert "busy" in collapsed.text
+    assert missing.status_code == 404
+
+
+async def test_allocation_profile_is_added(client, redis):
+    async with client:
+        response = await client.get(
+            "/api/v1/work",
+            headers={"X-Profile": "allocations", "X-Admin-Key": ADMIN_KEY},
+        )
+    _, body = await profile_store.get(
+        redis, response.headers["X-Profile-Id"], "speedscope"
+    )
+    cpu, allocated = orjson.loads(body)["profiles"]
+    assert allocated["unit"] == "bytes"
+    assert allocated["endValue"] > 0
+
+
+async def test_profile_is_not_stored_without_redis(app, client, redis):
+    del app.state.redis
+    async with client:
+        response = await client.get(
+            "/api/v1/work", headers={"X-Profile": "cpu", "X-Admin-Key": ADMIN_KEY}
+        )
+    assert response.status_code == 200
+    assert not await redis.keys("profile:*")
+
+
+async def test_profile_header_needs_the_admin_key(client):
+    async with client:
+        plain = await client.get("/api/v1/work", headers={"X-Profile": "cpu"})
+        wrong = await client.get(
+            "/api/v1/work", headers={"X-Profile": "cpu", "X-Admin-Key": "wrong"}
+        )
+    assert "X-Profile-Id" not in plain.headers
+    assert "X-Profile-Id" not in wrong.headers
+
+
+async def test_worker_profile_endpoint(client):
+    headers = {"X-Admin-Key": ADMIN_KEY}
+    async with client:
+        speedscope = await client.post(
+            "/api/v1/admin/profile?seconds=0.05&allocations=true", headers=headers
+        )
+        collapsed = await client.post(
+            "/api/v1/admin/profile?seconds=0.05&format=collapsed", headers=headers
+        )
+        too_long = await client.post("/api/v1/admin/profile?seconds=5", headers=headers)
+        mismatched = await client.post(
+            "/api/v1/admin/profile?seconds=0.05&format=collapsed&allocations=true",
+            headers=headers,
+        )
+
+    assert speedscope.status_code == 200
+    assert "attachment" in speedscope.headers["Content-Disposition"]
+    assert len(speedscope.json()["profiles"]) == 2
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert too_long.status_code == 422
+    assert mismatched.status_code == 422
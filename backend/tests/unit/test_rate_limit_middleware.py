@@ -0,0 +1,144 @@
+"""Sliding-window rate limiting: the Redis script and the middleware around it."""
+
+from types import SimpleNamespace
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.config.settings import get_settings
+from app.middleware import rate_limit_middleware
+from app.middleware.rate_limit_middleware import (
+    _SLIDING_WINDOW_SCRIPT,
+    RateLimitMiddleware,
+)
+
+PERIOD_MS = 60_000
+# 10 s into a window
+NOW = 1_700_000_000.0 - 1_700_000_000.0 % 60 + 10
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture
+def script(redis):
+    sliding_window = redis.register_script(_SLIDING_WINDOW_SCRIPT)
+
+    async def call(limit, requested, elapsed, current="cur", previous="prev"):
+        granted, remaining = await sliding_window(
+            keys=[current, previous], args=[limit, requested, PERIOD_MS, elapsed]
+        )
+        return int(granted), int(remaining)
+
+    return call
+
+
+async def test_grants_up_to_the_limit(script):
+    assert await script(limit=10, requested=4, elapsed=0) == (4, 6)
+    assert await script(limit=10, requested=4, elapsed=0) == (4, 2)
+    assert await script(limit=10, requested=4, elapsed=0) == (2, 0)
+    assert await script(limit=10, requested=1, elapsed=0) == (0, 0)
+
+
+async def test_previous_window_counts_by_its_overlap(script, redis):
+    await redis.set("prev", 10)
+    # Half of the previous window still overlaps: 5 of its 10 requests count
+    assert await script(limit=10, requested=10, elapsed=PERIOD_MS // 2) == (5, 0)
+    # Near the end of the window none of it does
+    assert await script(limit=20, requested=1, elapsed=PERIOD_MS - 1) == (1, 14)
+
+
+async def test_current_window_expires_after_two_periods(script, redis):
+    await script(limit=10, requested=1, elapsed=0)
+    assert 0 < await redis.pttl("cur") <= 2 * PERIOD_MS
+
+
+def _app(redis, limit: int):
+    app = FastAPI()
+    app.state.redis = redis
+
+    @app.get("/api/v1/searches")
+    async def searches():
+        return {}
+
+    @app.post("/api/v1/routes/calculate")
+    async def calculate():
+        return {}
+
+    app.add_middleware(RateLimitMiddleware, limit=limit, period_seconds=60)
+    return app
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+@pytest.fixture(autouse=True)
+def _enabled_at_a_fixed_time(monkeypatch):
+    monkeypatch.setattr(get_settings(), "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(
+        rate_limit_middleware, "time", SimpleNamespace(time=lambda: NOW)
+    )
+
+
+async def test_rejects_over_the_limit_with_headers(redis):
+    async with _client(_app(redis, limit=5)) as client:
+        responses = [await client.get("/api/v1/searches") for _ in range(6)]
+
+    assert [r.status_code for r in responses] == [200] * 5 + [429]
+    assert [r.headers["RateLimit-Remaining"] for r in responses[:5]] == [
+        "4",
+        "3",
+        "2",
+        "1",
+        "0",
+    ]
+    rejected = responses[-1]
+    assert rejected.headers["RateLimit-Limit"] == "5"
+    assert rejected.headers["RateLimit-Policy"] == "5;w=60"
+    assert rejected.headers["Retry-After"] == "50"
+
+
+async def test_workers_share_the_limit(redis):
+    workers = [_app(redis, limit=6), _app(redis, limit=6)]
+    statuses = []
+    async with _client(workers[0]) as first, _client(workers[1]) as second:
+        for _ in range(5):
+            statuses.append((await first.get("/api/v1/searches")).status_code)
+            statuses.append((await second.get("/api/v1/searches")).status_code)
+    assert statuses.count(200) == 6
+
+
+async def test_route_rejections_do_not_drain_the_overall_limit(monkeypatch, redis):
+    monkeypatch.setattr(
+        get_settings(), "RATE_LIMIT_ROUTE_LIMITS", {"/api/v1/routes/calculate": 2}
+    )
+    async with _client(_app(redis, limit=5)) as client:
+        limited = [
+            (await client.post("/api/v1/routes/calculate")).status_code
+            for _ in range(4)
+        ]
+        overall = [(await client.get("/api/v1/searches")).status_code for _ in range(4)]
+    assert limited == [200, 200, 429, 429]
+    assert overall == [200, 200, 200, 429]
+
+
+async def test_redis_errors_fail_open():
+    class Unavailable:
+        def register_script(self, script):
+            async def call(**kwargs):
+                raise ConnectionError("redis down")
+
+            return call
+
+    async with _client(_app(Unavailable(), limit=1)) as client:
+        statuses = [
+            (await client.get("/api/v1/searches")).status_code for _ in range(3)
+        ]
+    assert statuses == [200, 200, 200]
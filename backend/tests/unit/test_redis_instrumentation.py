@@ -0,0 +1,74 @@
+"""InstrumentedRedis: commands and pipelines are recorded as round trips."""
+
+import fakeredis
+import pytest
+
+from app.connections.instrumentation import (
+    InstrumentedPipeline,
+    InstrumentedRedis,
+    redis_command_duration_seconds,
+    redis_pipeline_commands,
+)
+
+
+def _count(histogram, **labels) -> float:
+    return next(
+        sample.value
+        for sample in histogram.labels(**labels).collect()[0].samples
+        if sample.name.endswith("_count")
+    )
+
+
+def _sum(histogram, **labels) -> float:
+    return next(
+        sample.value
+        for sample in histogram.labels(**labels).collect()[0].samples
+        if sample.name.endswith("_sum")
+    )
+
+
+@pytest.fixture
+def redis():
+    fake = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return InstrumentedRedis(connection_pool=fake.connection_pool)
+
+
+async def test_commands_are_timed(redis):
+    before = _count(redis_command_duration_seconds, command="SET", status="ok")
+    await redis.set("key", "value")
+    assert await redis.get("key") == "value"
+    assert (
+        _count(redis_command_duration_seconds, command="SET", status="ok") == before + 1
+    )
+
+
+@pytest.mark.parametrize(
+    ("transaction", "command"), [(False, "PIPELINE"), (True, "MULTI")]
+)
+async def test_pipeline_is_one_operation_with_its_size(redis, transaction, command):
+    latency = _count(redis_command_duration_seconds, command=command, status="ok")
+    sets = _count(redis_command_duration_seconds, command="SET", status="ok")
+    sizes = _sum(redis_pipeline_commands, command=command)
+
+    async with redis.pipeline(transaction=transaction) as pipe:
+        assert isinstance(pipe, InstrumentedPipeline)
+        pipe.set("a", 1).set("b", 2).incr("a")
+        assert await pipe.execute() == [True, True, 2]
+
+    assert (
+        _count(redis_command_duration_seconds, command=command, status="ok")
+        == latency + 1
+    )
+    assert _sum(redis_pipeline_commands, command=command) == sizes + 3
+    # Queued commands are not counted as commands of their own
+    assert _count(redis_command_duration_seconds, command="SET", status="ok") == sets
+
+
+async def test_empty_pipeline_is_not_recorded(redis):
+    before = _count(redis_command_duration_seconds, command="PIPELINE", status="ok")
+    async with redis.pipeline(transaction=False) as pipe:
+        assert await pipe.execute() == []
+    assert (
+        _count(redis_command_duration_seconds, command="PIPELINE", status="ok")
+        == before
+    )
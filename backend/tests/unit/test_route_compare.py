@@ -0,0 +1,138 @@
+"""Comparing land, sea and air between the same two points."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.config.enums import EMISSION_FACTORS
+from app.features.routes import modes
+from app.features.routes.dto import RouteCompareRequest
+from app.features.routes.service import RouteService
+from app.utils import deadline
+
+BERLIN = [13.404954, 52.520008]
+NEW_YORK = [-74.006, 40.7128]
+
+
+class _Mapbox:
+    """Driving directions that can be held back or fail."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.release = asyncio.Event()
+        self.release.set()
+        self.calls = 0
+        self.answered = 0
+
+    async def get_directions(self, *, profile, coordinates, alternatives):
+        self.calls += 1
+        await self.release.wait()
+        deadline.timeout_for(5.0, "mapbox directions")  # as MapboxClient does
+        if self.error:
+            raise self.error
+        self.answered += 1
+        line = {"type": "LineString", "coordinates": coordinates}
+        return {
+            "routes": [
+                {"distance": 7_000_000, "duration": 360_000, "geometry": line},
+                {"distance": 6_500_000, "duration": 370_000, "geometry": line},
+            ]
+        }
+
+
+def _payload(modes=("land", "sea", "air")):
+    return RouteCompareRequest(
+        origin={"name": "Berlin", "lng": BERLIN[0], "lat": BERLIN[1]},
+        destination={"name": "New York", "lng": NEW_YORK[0], "lat": NEW_YORK[1]},
+        cargo_weight_kg=2000,
+        modes=list(modes),
+    )
+
+
+def _service(mapbox, compare_timeout=1.0):
+    return RouteService(mapbox, None, None, compare_timeout=compare_timeout)
+
+
+def test_great_circle_km():
+    assert modes.great_circle_km(BERLIN, BERLIN) == 0
+    assert modes.great_circle_km(BERLIN, NEW_YORK) == pytest.approx(6385, rel=0.01)
+
+
+async def test_every_mode_is_compared():
+    result = await _service(_Mapbox()).compare(payload=_payload())
+
+    assert result["complete"] is True
+    land, sea, air = (result["modes"][m] for m in ("land", "sea", "air"))
+    assert land["source"] == "mapbox_driving"
+    assert land["distance_km"] == 6500  # shortest alternative
+    assert sea["source"] == air["source"] == "great_circle_estimate"
+    assert sea["distance_km"] == pytest.approx(
+        modes.great_circle_km(BERLIN, NEW_YORK) * modes.DETOUR_FACTORS["sea"]
+    )
+    for mode, route in result["modes"].items():
+        factor = EMISSION_FACTORS[mode]["default"]
+        assert route["status"] == "ok"
+        assert route["emission_factor"] == factor
+        assert route["co2_emissions_kg"] == pytest.approx(
+            route["distance_km"] * 2 * factor
+        )
+    assert result["lowest_emissions"] == "sea"
+    assert result["fastest"] == "air"
+
+
+async def test_slow_mode_is_reported_as_timeout():
+    mapbox = _Mapbox()
+    mapbox.release.clear()
+
+    result = await _service(mapbox, compare_timeout=0.05).compare(payload=_payload())
+
+    assert result["modes"]["land"] == {"status": "timeout"}
+    assert result["complete"] is False
+    assert result["fastest"] == "air"
+    mapbox.release.set()
+    await asyncio.sleep(0)
+
+
+async def test_late_mode_outlives_the_request_deadline():
+    mapbox = _Mapbox()
+    mapbox.release.clear()
+    deadline.deadline_var.set(time.monotonic() + 0.05)
+
+    result = await _service(mapbox).compare(payload=_payload(["land", "sea"]))
+    assert result["modes"]["land"] == {"status": "timeout"}
+
+    await asyncio.sleep(0.05)  # the request's deadline has passed
+    mapbox.release.set()
+    await asyncio.sleep(0.01)
+    assert mapbox.answered == 1
+
+
+@pytest.mark.parametrize(
+    ("error", "status"),
+    [
+        (httpx.ReadTimeout("slow upstream"), "timeout"),
+        (RuntimeError("mapbox down"), "error"),
+    ],
+)
+async def test_failed_mode_does_not_fail_the_comparison(error, status):
+    result = await _service(_Mapbox(error=error)).compare(
+        payload=_payload(["land", "sea", "land"])
+    )
+
+    assert result["modes"] == {
+        "land": {"status": status},
+        "sea": result["modes"]["sea"],
+    }
+    assert result["modes"]["sea"]["status"] == "ok"
+    assert result["lowest_emissions"] == result["fastest"] == "sea"
+
+
+async def test_nothing_completes():
+    result = await _service(_Mapbox(error=RuntimeError("down"))).compare(
+        payload=_payload(["land"])
+    )
+    assert result["complete"] is False
+    assert result["lowest_emissions"] is None
+    assert result["fastest"] is None
@@ -0,0 +1,142 @@
+"""Route calculation answered from a recent search between nearby points."""
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+from app.features.routes.dto import RouteCalculateRequest
+from app.features.routes.repository import EARTH_RADIUS_M, RouteRepository
+from app.features.routes.service import RouteService
+
+LINE = {"type": "LineString", "coordinates": [[13.4, 52.5], [2.35, 48.86]]}
+
+
+def _route(distance_km, co2):
+    return {
+        "distance_km": distance_km,
+        "duration_hours": distance_km / 100,
+        "co2_emissions_kg": co2,
+        "geometry": LINE,
+    }
+
+
+class _Mapbox:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_directions(self, *, profile, coordinates, alternatives):
+        self.calls += 1
+        return {
+            "routes": [{"distance": 1_000_000, "duration": 36_000, "geometry": LINE}]
+        }
+
+
+class _Searches:
+    def __init__(self, found=None, error=None):
+        self.found = found
+        self.error = error
+        self.lookups = []
+        self.saved = []
+
+    async def find_recent_nearby(self, **kwargs):
+        self.lookups.append(kwargs)
+        if self.error:
+            raise self.error
+        return self.found
+
+    async def save(self, **search):
+        self.saved.append(search)
+
+
+class _Versions:
+    async def begin_change(self, user_id):
+        pass
+
+    async def bump(self, user_id, settle=0):
+        return 1
+
+
+def _payload(mode="land", weight=4000):
+    return RouteCalculateRequest(
+        origin={"name": "Berlin", "lng": 13.4, "lat": 52.5},
+        destination={"name": "Paris", "lng": 2.35, "lat": 48.86},
+        cargo_weight_kg=weight,
+        transport_mode=mode,
+    )
+
+
+def _service(repo, mapbox):
+    return RouteService(
+        mapbox,
+        repo,
+        _Versions(),
+        reuse_radius_m=500,
+        reuse_max_age={"land": 3600},
+    )
+
+
+async def test_recent_nearby_search_is_reused_with_rescaled_emissions():
+    found = {
+        "cargo_weight_kg": 2000,
+        "shortest_route": _route(1000, 124.0),
+        "efficient_route": _route(1020, 120.0),
+    }
+    repo, mapbox = _Searches(found), _Mapbox()
+
+    result = await _service(repo, mapbox).calculate(user_id="u1", payload=_payload())
+
+    assert mapbox.calls == 0
+    assert result["shortest_route"]["co2_emissions_kg"] == 248.0
+    assert result["efficient_route"]["co2_emissions_kg"] == 240.0
+    assert result["efficient_route"]["savings"] == {
+        "co2_saved_kg": 8.0,
+        "percentage": 3.23,
+    }
+    (lookup,) = repo.lookups
+    assert lookup["origin"] == [13.4, 52.5]
+    assert lookup["radius_m"] == 500
+    assert len(repo.saved) == 1  # still recorded in the user's history
+
+
+@pytest.mark.parametrize(
+    "repo",
+    [
+        _Searches(found=None),
+        _Searches(found={"cargo_weight_kg": 0}),
+        _Searches(error=ServerSelectionTimeoutError("no primary")),
+    ],
+    ids=["miss", "unusable", "mongo-error"],
+)
+async def test_falls_back_to_mapbox(repo):
+    mapbox = _Mapbox()
+    result = await _service(repo, mapbox).calculate(user_id="u1", payload=_payload())
+    assert mapbox.calls == 1
+    assert result["shortest_route"]["distance_km"] == 1000
+
+
+async def test_modes_without_a_max_age_are_not_reused():
+    repo, mapbox = _Searches(found={"cargo_weight_kg": 1}), _Mapbox()
+    await _service(repo, mapbox).calculate(user_id="u1", payload=_payload(mode="sea"))
+    assert repo.lookups == []
+    assert mapbox.calls == 1
+
+
+def test_nearby_filter_bounds_both_ends():
+    since = object()
+    query = RouteRepository.nearby_filter(
+        origin=[13.4, 52.5],
+        destination=[2.35, 48.86],
+        transport_mode="land",
+        since=since,
+        radius_m=500,
+    )
+    radians = 500 / EARTH_RADIUS_M
+    assert query == {
+        "origin.coordinates": {
+            "$geoWithin": {"$centerSphere": [[13.4, 52.5], radians]}
+        },
+        "destination.coordinates": {
+            "$geoWithin": {"$centerSphere": [[2.35, 48.86], radians]}
+        },
+        "transport_mode": "land",
+        "created_at": {"$gte": since},
+    }
@@ -0,0 +1,222 @@
+"""Search history ETags: 304s, invalidation on delete and the content fallback."""
+
+import asyncio
+
+import fakeredis
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from redis.exceptions import ConnectionError
+
+from app.features.auth.dependency import get_current_user_id
+from app.features.search import service as search_service
+from app.features.search.dependency import get_search_service
+from app.features.search.repository import SearchVersionRepository
+from app.features.search.router import router
+from app.features.search.service import SearchService
+
+USER_ID = ObjectId()
+
+
+class _Searches:
+    """The SearchRepository calls the service makes, over a list of documents."""
+
+    def __init__(self, count: int):
+        self.docs = [
+            {
+                "_id": ObjectId(),
+                "user_id": USER_ID,
+                "origin": {"name": "A", "coordinates": [0.0, 0.0]},
+                "destination": {"name": "B", "coordinates": [1.0, 1.0]},
+                "cargo_weight_kg": 1000.0,
+                "transport_mode": "land",
+                "shortest_route": {},
+                "efficient_route": {},
+                "created_at": i,
+            }
+            for i in range(count)
+        ]
+        self.queries = 0
+
+    async def list(self, *, user_id, page, limit, sort, mode):
+        self.queries += 1
+        return self.docs[:limit], len(self.docs)
+
+    async def get(self, *, search_id, user_id):
+        self.queries += 1
+        return next((d for d in self.docs if d["_id"] == search_id), None)
+
+    async def delete(self, *, search_id, user_id):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if d["_id"] != search_id]
+        return len(self.docs) < before
+
+    async def stats(self, *, user_id):
+        self.queries += 1
+        return {
+            "total_searches": len(self.docs),
+            "total_co2_saved": 0.0,
+            "avg_cargo_weight": 0.0,
+        }
+
+    async def fingerprint(self, *, user_id):
+        newest = max(self.docs, key=lambda d: d["created_at"], default=None)
+        return len(self.docs), newest["_id"] if newest else None
+
+
+class _Unavailable:
+    async def get(self, user_id):
+        raise ConnectionError("redis down")
+
+    async def begin_change(self, user_id):
+        raise ConnectionError("redis down")
+
+    async def bump(self, user_id, settle=0):
+        raise ConnectionError("redis down")
+
+
+@pytest.fixture(autouse=True)
+async def _no_pending_bumps():
+    yield
+    for task in list(search_service._retries):
+        task.cancel()
+    await asyncio.gather(*search_service._retries, return_exceptions=True)
+    assert not search_service._retrying
+
+
+@pytest.fixture
+def repo():
+    return _Searches(count=3)
+
+
+@pytest.fixture
+def versions():
+    return SearchVersionRepository(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.fixture
+def client_for(repo):
+    def build(versions):
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_current_user_id] = lambda: USER_ID
+        app.dependency_overrides[get_search_service] = lambda: SearchService(
+            repo, versions
+        )
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        )
+
+    return build
+
+
+@pytest.mark.parametrize("path", ["/api/v1/searches", "/api/v1/searches/stats"])
+async def test_unchanged_history_is_not_modified(client_for, versions, repo, path):
+    async with client_for(versions) as client:
+        first = await client.get(path)
+        assert first.status_code == 200
+        assert first.headers["Cache-Control"] == "private, no-cache"
+        etag = first.headers["ETag"]
+
+        queries = repo.queries
+        second = await client.get(path, headers={"If-None-Match": f"W/{etag}"})
+        assert second.status_code == 304
+        assert second.headers["ETag"] == etag
+        assert second.content == b""
+        assert repo.queries == queries  # answered without touching Mongo
+
+
+async def test_delete_changes_every_etag(client_for, versions, repo):
+    search_id = str(repo.docs[0]["_id"])
+    async with client_for(versions) as client:
+        views = [
+            "/api/v1/searches",
+            "/api/v1/searches/stats",
+            f"/api/v1/searches/{search_id}",
+        ]
+        etags = [(await client.get(path)).headers["ETag"] for path in views]
+
+        assert (await client.delete(f"/api/v1/searches/{search_id}")).status_code == 204
+
+        listing, stats, detail = [
+            await client.get(path, headers={"If-None-Match": etag})
+            for path, etag in zip(views, etags)
+        ]
+    assert listing.status_code == stats.status_code == 200
+    assert detail.status_code == 404  # not a 304 for a deleted search
+
+
+async def test_detail_must_be_revalidated(client_for, versions, repo):
+    path = f"/api/v1/searches/{repo.docs[1]['_id']}"
+    async with client_for(versions) as client:
+        first = await client.get(path)
+        assert first.headers["Cache-Control"] == "private, no-cache"
+        again = await client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+
+async def test_etags_differ_per_view(client_for, versions):
+    async with client_for(versions) as client:
+        etags = {
+            (await client.get(path)).headers["ETag"]
+            for path in (
+                "/api/v1/searches",
+                "/api/v1/searches?page=2",
+                "/api/v1/searches?mode=sea",
+                "/api/v1/searches/stats",
+            )
+        }
+    assert len(etags) == 4
+
+
+async def test_content_etags_while_redis_is_down(client_for, repo):
+    async with client_for(_Unavailable()) as client:
+        first = await client.get("/api/v1/searches")
+        etag = first.headers["ETag"]
+        assert etag.startswith('"c3.')
+        cached = await client.get("/api/v1/searches", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+
+        search_id = repo.docs[-1]["_id"]
+        assert (await client.delete(f"/api/v1/searches/{search_id}")).status_code == 204
+        changed = await client.get("/api/v1/searches", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+async def test_pending_changes_are_settled_one_by_one(versions):
+    await versions.begin_change(USER_ID)
+    await versions.begin_change(USER_ID)
+
+    await versions.bump(USER_ID, 1)
+    assert await versions.get(USER_ID) is None  # the other change is in flight
+    await versions.bump(USER_ID, 1)
+    assert await versions.get(USER_ID) is not None
+
+
+async def test_failed_bump_is_seen_by_every_worker(monkeypatch, repo, versions):
+    monkeypatch.setattr(search_service, "_BUMP_RETRY_DELAYS", (0.01, 0.01))
+    writer = SearchService(repo, versions)
+    # Another worker: its own repository over the same Redis
+    other = SearchService(repo, SearchVersionRepository(versions.redis))
+    before = await other.etag(user_id=USER_ID, variant="stats")
+
+    bump = versions.bump
+    failures = iter([True, True])  # the bump and its first retry
+
+    async def flaky_bump(user_id, settle=0):
+        if next(failures, False):
+            raise ConnectionError("redis down")
+        return await bump(user_id, settle)
+
+    monkeypatch.setattr(versions, "bump", flaky_bump)
+    await writer.delete_search(search_id=str(repo.docs[0]["_id"]), user_id=USER_ID)
+
+    # Pending: the unchanged counter is not trusted by the other worker either
+    pending = await other.etag(user_id=USER_ID, variant="stats")
+    assert pending.startswith('"c') and pending != before
+
+    await asyncio.gather(*list(search_service._retries))
+    after = await other.etag(user_id=USER_ID, variant="stats")
+    assert not after.startswith('"c') and after != before
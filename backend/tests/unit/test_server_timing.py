@@ -0,0 +1,101 @@
+"""Per-request cost accounting and the Server-Timing header."""
+
+import asyncio
+import re
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.middleware.server_middleware import MetricsMiddleware
+from app.utils.request_cost import (
+    RequestCost,
+    TimedORJSONResponse,
+    record_cost,
+    request_cost_var,
+    track_cost,
+)
+
+
+def test_server_timing_renders_calls_and_bytes():
+    cost = RequestCost()
+    cost.record("mongo", 0.002)
+    cost.record("mongo", 0.0011, 512)
+    cost.record("auth", 0.0004)
+    assert cost.server_timing(0.01) == (
+        b'mongo;dur=3.1;desc="2 calls, 512 B", '
+        b'auth;dur=0.4;desc="1 call", '
+        b"total;dur=10.0"
+    )
+
+
+def test_recording_outside_a_request_is_a_no_op():
+    assert request_cost_var.get() is None
+    record_cost("mongo", 1.0)
+    with track_cost("auth"):
+        pass
+
+
+def test_tracked_time_excludes_nested_categories():
+    cost = RequestCost()
+    token = request_cost_var.set(cost)
+    try:
+        with track_cost("auth"):
+            record_cost("redis", 10.0)  # a revocation lookup, say
+    finally:
+        request_cost_var.reset(token)
+    assert cost.durations["redis"] == 10.0
+    assert 0 <= cost.durations["auth"] < 0.1
+
+
+def _client(**options):
+    app = FastAPI()
+
+    @app.get("/api/v1/searches", response_class=TimedORJSONResponse)
+    async def searches():
+        with track_cost("auth"):
+            await asyncio.sleep(0.002)
+
+        # Executor threads see the same accumulator
+        await asyncio.to_thread(record_cost, "mongo", 0.004, 2048)
+        return {"searches": list(range(100))}
+
+    app.add_middleware(MetricsMiddleware, project_name="server-timing", **options)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+def _metrics(header: str) -> dict[str, str]:
+    # Entries are comma-separated, and so are the parts of a description
+    entries = re.split(r", (?=\w+;)", header)
+    return dict(entry.split(";", 1) for entry in entries)
+
+
+async def test_header_breaks_down_the_request():
+    async with _client(timing_allow_origin="https://app.example") as client:
+        response = await client.get("/api/v1/searches")
+
+    metrics = _metrics(response.headers["Server-Timing"])
+    assert list(metrics) == ["auth", "mongo", "serialize", "total"]
+    assert metrics["mongo"] == 'dur=4.0;desc="1 call, 2048 B"'
+    assert f"{len(response.content)} B" in metrics["serialize"]
+    auth_ms = float(metrics["auth"].split(";")[0].removeprefix("dur="))
+    assert auth_ms >= 2.0
+    assert response.headers["Timing-Allow-Origin"] == "https://app.example"
+    assert "X-Process-Time" in response.headers
+
+
+@pytest.mark.parametrize(
+    ("options", "headers", "expected"),
+    [
+        ({"server_timing": False}, {}, False),
+        ({"server_timing_gated": True}, {}, False),
+        ({"server_timing_gated": True}, {"X-Server-Timing": "1"}, True),
+    ],
+)
+async def test_header_can_be_disabled_or_gated(options, headers, expected):
+    async with _client(**options) as client:
+        response = await client.get("/api/v1/searches", headers=headers)
+    assert ("Server-Timing" in response.headers) is expected
+    assert "Timing-Allow-Origin" not in response.headers
@@ -0,0 +1,166 @@
+"""WorkerSupervisor recycling and draining, with stand-in worker processes."""
+
+import os
+import signal
+import threading
+from types import SimpleNamespace
+
+import pytest
+import uvicorn
+
+from app.lifecycle import signals, supervisor
+
+MB = 1024 * 1024
+
+
+class _Process:
+    """A worker process that never runs; tests decide when it is alive."""
+
+    pids = iter(range(10_000, 20_000))
+
+    def __init__(self, target, args, name):
+        self.config, self.sockets, self.cpu = args
+        self.limit = self.config.limit_max_requests
+        self.name = name
+        self.pid = None
+        self.alive = False
+        self.exitcode = None
+        self.terminated = self.killed = False
+        self.drains = True
+
+    def start(self):
+        self.pid = next(self.pids)
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        pass
+
+    def terminate(self):
+        self.terminated = True
+        if self.drains:
+            self.exit(0)
+
+    def kill(self):
+        self.killed = True
+        self.exit(-9)
+
+    def exit(self, code):
+        self.alive = False
+        self.exitcode = code
+
+
+@pytest.fixture
+def compacted(monkeypatch):
+    pids = []
+    monkeypatch.setattr(supervisor, "compact_dead_worker", pids.append)
+    return pids
+
+
+def _pool(**options):
+    pool = supervisor.WorkerSupervisor(
+        uvicorn.Config("app.main:app", host="127.0.0.1", port=0), **options
+    )
+    pool._context = SimpleNamespace(Process=_Process)
+    return pool
+
+
+def test_workers_get_jittered_request_limits_and_cpus(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1})
+    pool = _pool(
+        workers=3, max_requests=1000, max_requests_jitter=50, cpu_affinity=True
+    )
+    for slot in range(3):
+        pool._spawn(slot)
+
+    workers = [pool._slots[slot] for slot in range(3)]
+    assert all(1000 <= worker.limit <= 1050 for worker in workers)
+    assert [worker.cpu for worker in workers] == [0, 1, 0]
+
+
+def test_exited_workers_are_replaced_and_compacted(compacted):
+    pool = _pool(workers=2)
+    pool._spawn(0)
+    pool._spawn(1)
+    crashed = pool._slots[1]
+    crashed.exit(1)
+
+    pool._reap()
+
+    assert pool._slots[1] is not crashed
+    assert pool._slots[1].is_alive()
+    assert compacted == [crashed.pid]
+
+
+def test_oversized_worker_is_replaced_before_it_drains(monkeypatch, compacted):
+    pool = _pool(workers=1, max_rss_mb=100, graceful_timeout=30)
+    pool._spawn(0)
+    old = pool._slots[0]
+    old.drains = False
+    sizes = {old.pid: 150 * MB}
+    monkeypatch.setattr(
+        supervisor.psutil,
+        "Process",
+        lambda pid: SimpleNamespace(
+            memory_info=lambda: SimpleNamespace(rss=sizes.get(pid, 50 * MB))
+        ),
+    )
+
+    pool._recycle_oversized()
+
+    new = pool._slots[0]
+    assert new is not old and new.is_alive()
+    assert old.terminated and old in pool._draining
+
+    pool._reap()  # still draining within its grace period
+    assert old in pool._draining
+    pool._draining[old] = 0  # grace period over
+    pool._reap()
+    assert old.killed
+    assert not pool._draining
+    assert compacted == [old.pid]
+
+
+def test_stop_all_drains_then_kills(compacted):
+    pool = _pool(workers=2, graceful_timeout=0)
+    pool._spawn(0)
+    pool._spawn(1)
+    stuck = pool._slots[1]
+    stuck.drains = False
+
+    pool._stop_all()
+
+    assert not stuck.is_alive() and stuck.killed
+    assert not pool._slots
+    assert len(compacted) == 2
+
+
+@pytest.fixture
+def restore_signal_handlers():
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    yield
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+
+def test_run_spawns_workers_until_asked_to_exit(restore_signal_handlers, compacted):
+    pool = _pool(workers=2, check_interval=0.01)
+    threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGTERM)).start()
+
+    pool.run()
+
+    assert not pool._slots
+    assert len(compacted) == 2
+    assert all(sock.fileno() == -1 for sock in pool._sockets)
+
+
+def test_second_signal_exits_immediately(restore_signal_handlers):
+    calls = []
+    signals.setup_signal_handlers(lambda: calls.append("drain"))
+
+    os.kill(os.getpid(), signal.SIGTERM)
+    assert calls == ["drain"]
+    with pytest.raises(SystemExit):
+        os.kill(os.getpid(), signal.SIGINT)
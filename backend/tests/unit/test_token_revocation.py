@@ -0,0 +1,191 @@
+"""Access-token revocation: the Bloom filter, the revocation list and logout."""
+
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from redis.exceptions import ConnectionError
+
+from app.features.auth.dependency import get_token_payload
+from app.features.auth.repository import RefreshTokenRepository
+from app.features.auth.revocation import BloomFilter, TokenRevocationList
+from app.features.auth.security import (
+    ALGORITHM,
+    SECRET_KEY,
+    create_token,
+    hash_password,
+)
+from app.features.auth.service import AuthService
+
+PASSWORD = "correct horse battery staple"
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+
+def test_bloom_filter_false_positive_rate_is_near_target():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives / 10_000 < 0.03
+
+
+def test_bloom_filter_sizing():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    # m = -n ln p / ln(2)^2 and k = m/n ln 2
+    assert bloom.size == 9585
+    assert bloom.hash_count == 7
+    assert len(bloom.bits) == (bloom.size + 7) // 8
+    assert "anything" not in BloomFilter(capacity=10, error_rate=0.01)
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture
+def revocations(redis):
+    return TokenRevocationList(
+        redis, capacity=1000, error_rate=0.01, rebuild_interval=60
+    )
+
+
+async def test_revoked_jti_is_confirmed_in_redis(revocations):
+    await revocations.revoke("abc", ttl_seconds=60)
+    assert await revocations.is_revoked("abc")
+    assert not await revocations.is_revoked("def")
+    assert not await revocations.is_revoked(None)
+
+
+async def test_expired_tokens_are_not_stored(revocations, redis):
+    await revocations.revoke("abc", ttl_seconds=0)
+    assert not await revocations.is_revoked("abc")
+    assert await redis.dbsize() == 0
+
+
+async def test_rebuild_loads_revocations_from_other_workers(redis, revocations):
+    other_worker = TokenRevocationList(
+        redis, capacity=1000, error_rate=0.01, rebuild_interval=60
+    )
+    await other_worker.revoke("abc", ttl_seconds=60)
+    assert not await revocations.is_revoked("abc")  # not seen through pub/sub
+    await revocations.rebuild()
+    assert await revocations.is_revoked("abc")
+
+
+async def test_revocations_reach_other_workers_through_pub_sub(redis, revocations):
+    other_worker = TokenRevocationList(
+        redis, capacity=1000, error_rate=0.01, rebuild_interval=60
+    )
+    await revocations.start()
+    try:
+        await asyncio.sleep(0.05)  # let the listener subscribe
+        await other_worker.revoke("abc", ttl_seconds=60)
+        for _ in range(100):
+            if await revocations.is_revoked("abc"):
+                break
+            await asyncio.sleep(0.01)
+        assert await revocations.is_revoked("abc")
+    finally:
+        await revocations.stop()
+    assert revocations._listener.cancelled()
+
+
+async def test_unconfirmed_possible_match_counts_as_revoked(revocations, monkeypatch):
+    await revocations.revoke("abc", ttl_seconds=60)
+
+    async def unavailable(jti):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(revocations.repo, "exists", unavailable)
+    assert await revocations.is_revoked("abc")
+    assert not await revocations.is_revoked("def")  # not in the filter: no lookup
+
+
+def _bearer(token_type="access", jti="jti-1"):
+    token = create_token(
+        user_id="65f0c0ffee65f0c0ffee65f0",
+        email="user@example.com",
+        token_type=token_type,
+        expires_minutes=5,
+        jti=jti,
+    )
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+async def test_dependency_rejects_revoked_and_wrong_tokens(revocations):
+    payload = await get_token_payload(_bearer(), revocations)
+    assert payload["sub"] == "65f0c0ffee65f0c0ffee65f0"
+
+    await revocations.revoke("jti-1", ttl_seconds=60)
+    for credentials, detail in [
+        (_bearer(), "Token revoked"),
+        (_bearer(token_type="refresh", jti="jti-2"), "Invalid token type"),
+        (
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials="x"),
+            "Invalid token",
+        ),
+    ]:
+        with pytest.raises(HTTPException) as excinfo:
+            await get_token_payload(credentials, revocations)
+        assert excinfo.value.status_code == 401
+        assert excinfo.value.detail == detail
+
+
+class _Users:
+    def __init__(self, user):
+        self.user = user
+
+    async def get_by_email(self, email):
+        return self.user if email == self.user.email else None
+
+    async def get_by_id(self, user_id):
+        return self.user if user_id == str(self.user.id) else None
+
+
+@pytest.fixture
+def service(redis, revocations):
+    user = SimpleNamespace(
+        id="65f0c0ffee65f0c0ffee65f0",
+        email="user@example.com",
+        password_hash=hash_password(PASSWORD),
+    )
+    return AuthService(_Users(user), RefreshTokenRepository(redis), revocations)
+
+
+@pytest.mark.parametrize("logout_with", ["access_token", "refresh_token"])
+async def test_logout_revokes_both_tokens_of_the_login(
+    service, revocations, logout_with
+):
+    tokens = await service.login("user@example.com", PASSWORD)
+    access = jwt.decode(tokens["access_token"], SECRET_KEY, algorithms=[ALGORITHM])
+
+    await service.logout(tokens[logout_with])
+
+    assert await revocations.is_revoked(access["jti"])
+    with pytest.raises(HTTPException) as excinfo:
+        await service.refresh(tokens["refresh_token"])
+    assert excinfo.value.status_code == 401
+
+
+async def test_refresh_rotates_and_logout_ends_the_new_session(service):
+    tokens = await service.login("user@example.com", PASSWORD)
+    rotated = await service.refresh(tokens["refresh_token"])
+
+    with pytest.raises(HTTPException):
+        await service.refresh(tokens["refresh_token"])  # single use
+
+    await service.logout(rotated["access_token"])
+    with pytest.raises(HTTPException):
+        await service.refresh(rotated["refresh_token"])
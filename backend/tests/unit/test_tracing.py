@@ -0,0 +1,114 @@
+"""OpenTelemetry spans for requests and Redis calls, via an in-memory exporter."""
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import SpanKind, StatusCode
+
+from app.config.settings import get_settings
+from app.connections.instrumentation import InstrumentedRedis
+from app.middleware.server_middleware import CorrelationIdMiddleware
+from app.middleware.tracing_middleware import TracingMiddleware
+from app.utils import tracing
+
+UPSTREAM_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracing.setup_tracing(get_settings(), exporter=exporter, sampling_ratio=1.0)
+    yield exporter
+    tracing.shutdown_tracing()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+    app.add_middleware(CorrelationIdMiddleware)
+    fake = fakeredis.FakeAsyncRedis(decode_responses=True)
+    app.state.redis = InstrumentedRedis(connection_pool=fake.connection_pool)
+
+    @app.get("/api/v1/items/{item_id}")
+    async def item(item_id: str, request: Request):
+        redis = request.app.state.redis
+        await redis.get(f"item:{item_id}")
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.incr("a").incr("b")
+            await pipe.execute()
+        return {"id": item_id}
+
+    @app.get("/api/v1/broken")
+    async def broken():
+        return JSONResponse({"error": "boom"}, status_code=500)
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+def _server_span(exporter):
+    return next(s for s in exporter.get_finished_spans() if s.kind == SpanKind.SERVER)
+
+
+async def test_server_span_is_named_after_the_route_template(exporter, client):
+    async with client:
+        response = await client.get("/api/v1/items/42")
+
+    span = _server_span(exporter)
+    assert span.name == "GET /api/v1/items/{item_id}"
+    assert span.attributes["http.route"] == "/api/v1/items/{item_id}"
+    assert span.attributes["http.response.status_code"] == 200
+    assert span.attributes["correlation_id"] == response.headers["X-Correlation-ID"]
+    assert response.headers["X-Trace-ID"] == format(span.context.trace_id, "032x")
+
+
+async def test_redis_calls_are_child_spans(exporter, client):
+    async with client:
+        await client.get("/api/v1/items/42")
+
+    server = _server_span(exporter)
+    children = {
+        s.name: s for s in exporter.get_finished_spans() if s.kind == SpanKind.CLIENT
+    }
+    assert set(children) == {"redis GET", "redis PIPELINE"}
+    for span in children.values():
+        assert span.parent.span_id == server.context.span_id
+        assert span.attributes["db.system"] == "redis"
+    assert children["redis PIPELINE"].attributes["db.operation.batch.size"] == 2
+
+
+async def test_incoming_trace_context_is_continued(exporter, client):
+    traceparent = f"00-{UPSTREAM_TRACE_ID}-00f067aa0ba902b7-01"
+    async with client:
+        response = await client.get(
+            "/api/v1/items/42", headers={"traceparent": traceparent}
+        )
+
+    span = _server_span(exporter)
+    assert format(span.context.trace_id, "032x") == UPSTREAM_TRACE_ID
+    assert span.parent.span_id == 0x00F067AA0BA902B7
+    assert response.headers["X-Trace-ID"] == UPSTREAM_TRACE_ID
+
+
+async def test_server_errors_mark_the_span(exporter, client):
+    async with client:
+        await client.get("/api/v1/broken")
+
+    span = _server_span(exporter)
+    assert span.status.status_code == StatusCode.ERROR
+    assert span.attributes["http.response.status_code"] == 500
+
+
+async def test_no_spans_when_tracing_is_disabled(client):
+    assert tracing.get_tracer() is None
+    async with client:
+        response = await client.get("/api/v1/items/42")
+    assert response.status_code == 200
+    assert "X-Trace-ID" not in response.headers